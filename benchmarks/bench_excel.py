@@ -0,0 +1,113 @@
+"""
+Benchmark de generate_excel: tiempo y pico de memoria (RSS) por tamano.
+
+Cada medida corre en un proceso aparte, para que el pico de RSS sea solo
+el de esa generacion. Con --legacy se mide tambien otra version del script
+(p. ej. la anterior al escritor en streaming):
+
+    git show <commit>:eu_funding_radar.py > /tmp/radar_old.py
+
+Uso:  python benchmarks/bench_excel.py [n_convocatorias ...] [--legacy RUTA]
+      (por defecto 1000 10000 50000)
+"""
+
+import importlib.util
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "eu_funding_radar.py"
+
+WORDS = (
+    "urban climate energy city cities support innovation digital water building renewable "
+    "transport mobility local authority europe research action neutral smart circular "
+    "economy green infrastructure adaptation hydrogen eficiencia movilidad vivienda municipio"
+).split()
+
+
+def load(path):
+    spec = importlib.util.spec_from_file_location("radar_bench", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_calls(radar, n, seed=42):
+    """n convocatorias sinteticas repartidas entre las tres fuentes."""
+    rng = random.Random(seed)
+    words = lambda a, b: " ".join(rng.choice(WORDS) for _ in range(rng.randint(a, b)))
+    sources = list(radar.CallSource)
+    calls = {}
+    for i in range(n):
+        source = sources[i % len(sources)]
+        deadline = date(2026, 1, 1) + timedelta(days=rng.randint(0, 900))
+        call = radar.Call(
+            id=f"BENCH-{source.name}-{i:06d}",
+            title=words(6, 16),
+            source=source,
+            status=rng.choice([radar.CallStatus.OPEN, radar.CallStatus.FORTHCOMING]),
+            programme=rng.choice(["HORIZON", "LIFE", "CEF", "BDNS", "Euskadi"]),
+            deadline=deadline,
+            description=words(40, 120),
+            url=f"https://example.org/calls/{i}",
+            action_type=rng.choice(["Ayuda/Subvencion", "Licitacion", "HORIZON-RIA"]),
+            budget_min=rng.randint(1, 500) * 100000,
+            budget_max=rng.randint(500, 900) * 100000,
+            call_id=f"CALL-{i // 10}",
+            tags=words(0, 4),
+            relevance=rng.choice(list(radar.Relevance)),
+            relevance_note=words(2, 6),
+        )
+        calls[call.id] = call
+    return calls
+
+
+def measure(path, n):
+    """Genera el Excel con n convocatorias y devuelve (segundos, pico RSS MB, bytes)."""
+    radar = load(path)
+    calls = make_calls(radar, n)
+    new_calls = {k: calls[k] for k in list(calls)[: n // 20]}
+    with tempfile.TemporaryDirectory() as tmp:
+        radar.CONFIG["output_excel"] = os.path.join(tmp, "bench.xlsx")
+        t0 = time.perf_counter()
+        radar.generate_excel(calls, new_calls)
+        elapsed = time.perf_counter() - t0
+        size = os.path.getsize(radar.CONFIG["output_excel"])
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+    return elapsed, peak_mb, size
+
+
+def run(path, n):
+    out = subprocess.run([sys.executable, __file__, "--child", str(path), str(n)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv):
+    if argv[:1] == ["--child"]:
+        print(json.dumps(measure(argv[1], int(argv[2]))))
+        return 0
+    versions = [("actual", SCRIPT)]
+    if "--legacy" in argv:
+        i = argv.index("--legacy")
+        versions.append(("anterior", Path(argv[i + 1])))
+        argv = argv[:i] + argv[i + 2:]
+    sizes = [int(a) for a in argv] or [1000, 10000, 50000]
+
+    print(f"{'convocatorias':>13}  {'version':<9} {'total (s)':>10} {'us/conv':>9} {'pico RSS (MB)':>14} {'xlsx (KB)':>10}")
+    for n in sizes:
+        for name, path in versions:
+            elapsed, peak_mb, size = run(path, n)
+            print(f"{n:>13}  {name:<9} {elapsed:>10.2f} {elapsed / n * 1e6:>9.0f} {peak_mb:>14.0f} {size / 1024:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,292 @@
+"""
+Benchmark del extractor SEDIA: parse_results actual (patrones precompilados,
+cada campo de metadata decodificado una vez) frente a la version anterior
+(re.sub por campo, json.loads de actions dos veces, strptime).
+
+Uso:  python benchmarks/bench_extractor.py [n_resultados] [respuesta_sedia.json ...]
+      Sin ficheros se usan respuestas sinteticas con la forma de SEDIA;
+      con ficheros (respuestas guardadas del endpoint de busqueda) se miden esas.
+"""
+
+import html
+import json
+import random
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import eu_funding_radar as radar  # noqa: E402
+
+WORDS = (
+    "urban climate energy city cities support innovation digital water building renewable "
+    "transport mobility local authority europe research action neutral smart circular "
+    "economy green infrastructure adaptation hydrogen pilot demonstration citizens"
+).split()
+PROGRAMMES = ["HORIZON-CL5-2026-D2", "LIFE-2026-CET", "CEF-T-2026-AFIFCOEN", "DIGITAL-2026-AI", "INNOVFUND-2026-NZT"]
+STATUS = ["Open", "Forthcoming", "Closed"]
+
+
+def make_item(rng, i):
+    """Un resultado con la forma del endpoint de busqueda SEDIA."""
+    topic = f"{rng.choice(PROGRAMMES)}-{i:05d}"
+    words = lambda a, b: " ".join(rng.choice(WORDS) for _ in range(rng.randint(a, b)))
+    year = rng.randint(2024, 2027)
+    deadline = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    actions = [{"status": {"abbreviation": rng.choice(STATUS)}, "deadlineDates": [deadline],
+                "types": [{"typeOfAction": "HORIZON-RIA"}]}]
+    budget = {"budgetTopicActionMap": {"1": [{"action": topic, "minContribution": 2000000,
+                                              "maxContribution": rng.choice([2000000, 5000000])}]}}
+    return {
+        "reference": f"{topic}COMPETITIVE_CALLen",
+        "url": f"https://ec.europa.eu/info/funding-tenders/opportunities/data/topicDetails/{topic.lower()}.json",
+        "title": None,
+        "summary": f"<p>{words(20, 40)} &amp; {words(5, 10)}</p>",
+        "content": f"<div>{words(20, 40)}</div>",
+        "metadata": {
+            "identifier": [topic],
+            "title": [f"<b>{words(5, 12)}</b>"],
+            "descriptionByte": [f"<p>{words(60, 120)}</p><ul><li>{words(10, 20)}</li></ul>"],
+            "actions": [json.dumps(actions)],
+            "deadlineDate": [f"{deadline}T17:00:00.000+0000"],
+            "typesOfAction": ["HORIZON Research and Innovation Actions"],
+            "budgetOverview": [json.dumps(budget)],
+            "callIdentifier": [topic.rsplit("-", 1)[0]],
+            "tags": [rng.choice(WORDS) for _ in range(rng.randint(0, 5))],
+        },
+    }
+
+
+def make_responses(n, page_size=50, seed=42):
+    rng = random.Random(seed)
+    items = [make_item(rng, i) for i in range(n)]
+    return [{"results": items[i:i + page_size]} for i in range(0, n, page_size)]
+
+
+# ─── Version anterior del parseo completo (copiada tal cual) ───
+
+def legacy_parse_results(api_response):
+    calls = []
+    if not api_response or "results" not in api_response:
+        return calls
+    for item in api_response.get("results", []):
+        try:
+            topic_id = radar.extract_topic_id(item)
+            if not topic_id:
+                continue
+
+            url = item.get("url", "")
+            content = item.get("content", "")
+            title = item.get("title", "")
+            summary = item.get("summary", "")
+            metadata = item.get("metadata", {})
+
+            # ─── TITULO ───
+            # Preferir metadata.title sobre el campo title raiz (que suele ser null)
+            clean_title = ""
+            if metadata.get("title"):
+                clean_title = re.sub(r'<[^>]+>', '', str(metadata["title"][0])).strip()
+            if not clean_title or clean_title == "None":
+                clean_title = re.sub(r'<[^>]+>', '', str(title or "")).strip()
+            if not clean_title or clean_title == "None":
+                clean_title = re.sub(r'<[^>]+>', '', str(summary or "")).strip()
+            if not clean_title or clean_title == "None":
+                clean_title = topic_id
+
+            # ─── DESCRIPCION ───
+            clean_summary = re.sub(r'<[^>]+>', '', str(summary or "")).strip()[:500]
+            clean_content = re.sub(r'<[^>]+>', '', str(content or "")).strip()[:300]
+            description = clean_summary or clean_content
+
+            # Intentar obtener descripcion mas rica de descriptionByte
+            if metadata.get("descriptionByte"):
+                raw_desc = re.sub(r'<[^>]+>', '', str(metadata["descriptionByte"][0])).strip()
+                if len(raw_desc) > len(description):
+                    description = raw_desc[:600]
+
+            # ─── ESTADO ───
+            status = "Unknown"
+            # Extraer de metadata.actions que tiene el status real
+            if metadata.get("actions"):
+                try:
+                    actions_data = json.loads(metadata["actions"][0])
+                    if isinstance(actions_data, list) and actions_data:
+                        action_status = actions_data[0].get("status", {}).get("abbreviation", "")
+                        if action_status:
+                            status = action_status  # "Closed", "Open", "Forthcoming"
+                except (json.JSONDecodeError, IndexError, KeyError):
+                    pass
+            # Fallback: buscar en texto
+            if status == "Unknown":
+                text_lower = (clean_content + clean_summary + str(metadata.get("sortStatus", ""))).lower()
+                if "forthcoming" in text_lower or "upcoming" in text_lower:
+                    status = "Forthcoming"
+                elif "open" in text_lower:
+                    status = "Open"
+                elif "closed" in text_lower:
+                    status = "Closed"
+
+            # ─── DEADLINE ───
+            deadline = ""
+            if metadata.get("deadlineDate"):
+                try:
+                    raw_date = metadata["deadlineDate"][0]
+                    # Formato: "2023-04-27T00:00:00.000+0000"
+                    date_part = raw_date[:10]  # "2023-04-27"
+                    dt = datetime.strptime(date_part, "%Y-%m-%d")
+                    deadline = dt.strftime("%d/%m/%Y")
+                except (ValueError, IndexError):
+                    deadline = raw_date[:10] if raw_date else ""
+            # Fallback: extraer del actions
+            if not deadline and metadata.get("actions"):
+                try:
+                    actions_data = json.loads(metadata["actions"][0])
+                    if isinstance(actions_data, list) and actions_data:
+                        dd = actions_data[0].get("deadlineDates", [])
+                        if dd:
+                            dt = datetime.strptime(dd[0], "%Y-%m-%d")
+                            deadline = dt.strftime("%d/%m/%Y")
+                except:
+                    pass
+
+            # ─── PROGRAMA ───
+            programme = ""
+            tid_upper = topic_id.upper()
+            if "HORIZON" in tid_upper:
+                programme = "Horizon Europe"
+            elif "LIFE" in tid_upper:
+                programme = "LIFE"
+            elif "CEF" in tid_upper:
+                programme = "CEF"
+            elif "DIGITAL" in tid_upper:
+                programme = "Digital Europe"
+            elif "INTERREG" in tid_upper:
+                programme = "INTERREG"
+            elif "INNOVFUND" in tid_upper:
+                programme = "Innovation Fund"
+            elif "URBACT" in tid_upper:
+                programme = "URBACT"
+
+            # ─── TIPO DE ACCION ───
+            action_type = ""
+            if metadata.get("typesOfAction"):
+                action_type = metadata["typesOfAction"][0].replace("HORIZON ", "")
+
+            # ─── PRESUPUESTO ───
+            budget = ""
+            if metadata.get("budgetOverview"):
+                try:
+                    bo = json.loads(metadata["budgetOverview"][0])
+                    for topic_key, actions in bo.get("budgetTopicActionMap", {}).items():
+                        for a in actions:
+                            min_c = a.get("minContribution", 0)
+                            max_c = a.get("maxContribution", 0)
+                            if max_c:
+                                if min_c == max_c:
+                                    budget = f"{max_c:,.0f}"
+                                else:
+                                    budget = f"{min_c:,.0f} - {max_c:,.0f}"
+                                break
+                        if budget:
+                            break
+                except:
+                    pass
+
+            # ─── CALL ID ───
+            call_id = ""
+            if metadata.get("callIdentifier"):
+                call_id = metadata["callIdentifier"][0]
+
+            # ─── URL ───
+            # Preferir metadata.url sobre url raiz
+            final_url = ""
+            if metadata.get("url"):
+                final_url = metadata["url"][0]
+            elif url:
+                final_url = url
+            if not final_url or "topic-details" not in final_url:
+                if "calls-for-proposals" not in final_url and "competitive-calls" not in final_url:
+                    # Construir URL manualmente
+                    if topic_id:
+                        final_url = f"https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/opportunities/topic-details/{topic_id}"
+                    else:
+                        continue
+            if final_url.endswith(".json"):
+                continue
+
+            # ─── TAGS ───
+            tags = metadata.get("tags", [])
+
+            call_data = {
+                "id": topic_id,
+                "title": clean_title,
+                "status": status,
+                "programme": programme,
+                "deadline": deadline,
+                "description": description,
+                "url": final_url,
+                "action_type": action_type,
+                "budget": budget,
+                "call_id": call_id,
+                "tags": ", ".join(tags) if tags else "",
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+            }
+
+            # Anadir relevancia para Bilbao
+            rel_level, rel_note = radar.get_relevance_for_call(SimpleNamespace(**call_data))
+            call_data["relevance_level"] = rel_level
+            call_data["relevance_note"] = rel_note
+            calls.append(call_data)
+        except Exception:
+            continue
+    return calls
+
+
+def parse_and_score(api_response):
+    """Parseo actual + la etapa de relevancia del pipeline (SediaSource.score)."""
+    source = radar.SediaSource()
+    calls = radar.parse_results(api_response)
+    for call in calls:
+        source.score(call)
+    return calls
+
+
+def timed(fn, responses):
+    t0 = time.perf_counter()
+    out = [call for resp in responses for call in fn(resp)]
+    return time.perf_counter() - t0, out
+
+
+def main(argv):
+    n = int(argv[0]) if argv and argv[0].isdigit() else 10000
+    files = [a for a in argv if not a.isdigit()]
+    if files:
+        responses = [json.loads(Path(f).read_text(encoding="utf-8")) for f in files]
+        origin = f"{len(files)} respuestas guardadas"
+    else:
+        responses = make_responses(n)
+        origin = "sinteticos"
+    total = sum(len(r.get("results", [])) for r in responses)
+
+    legacy_s, legacy_out = timed(legacy_parse_results, responses)
+    new_s, new_out = timed(parse_and_score, responses)
+    new_out = [call.to_dict() for call in new_out]
+
+    # Mismos registros salvo fetched_at y las entidades HTML (ahora decodificadas)
+    norm = lambda c: {k: html.unescape(v) if isinstance(v, str) else v
+                      for k, v in c.items() if k != "fetched_at"}
+    differ = sum(1 for a, b in zip(legacy_out, new_out) if norm(a) != norm(b))
+
+    print(f"{total} resultados ({origin})")
+    print(f"{'version':<12} {'total (s)':>10} {'us/resultado':>13} {'resultados/s':>13}")
+    for name, elapsed in (("anterior", legacy_s), ("compilada", new_s)):
+        print(f"{name:<12} {elapsed:>10.3f} {elapsed / max(total, 1) * 1e6:>13.1f} {total / elapsed:>13.0f}")
+    print(f"speedup x{legacy_s / new_s:.2f}  registros: {len(legacy_out)} / {len(new_out)}  distintos: {differ}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
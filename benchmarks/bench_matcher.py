@@ -0,0 +1,154 @@
+"""
+Benchmark de los filtros por keywords (texto normalizado una vez con
+fold_text + bucles `kw in text`) frente a los bucles anteriores sobre
+.lower(), y frente a un motor de una sola pasada: una alternancia
+compilada (re) con las keywords en forma de trie.
+
+El motor de una pasada sale mas caro que los bucles con estas tablas
+(decenas de keywords): cada `in` es una busqueda en C y re recorre el texto
+posicion a posicion. Por eso los filtros usan bucles.
+
+Uso:  python benchmarks/bench_matcher.py [n_registros ...]
+      (por defecto 10000 y 50000)
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import eu_funding_radar as radar  # noqa: E402
+
+WORDS = (
+    "the of and urban climate energy project city cities support funding innovation "
+    "digital water building renewable transport mobility local authority europe research "
+    "action neutral smart circular economy green infrastructure adaptation hydrogen "
+    "energía eficiencia movilidad sostenible rehabilitación vivienda ayuntamiento "
+    "municipio subvención convocatoria ayudas empresas pyme formación cultura deporte "
+    "agricultura pesca turismo comercio empleo social educación sanidad bilbao euskadi"
+).split()
+
+
+def make_records(n, seed=42):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14)))
+        desc = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 90)))
+        records.append(radar.Call(id=f"HORIZON-2026-{i:06d}", title=title, description=desc))
+    return records
+
+
+# ─── Implementaciones anteriores (bucles de subcadenas) ───
+
+def legacy_relevance(call):
+    best_level = "INFO"
+    level_order = {"MUY ALTA": 4, "ALTA": 3, "MEDIA": 2, "BAJA": 1, "INFO": 0}
+    call_text = f"{call.id} {call.title} {call.description}".lower()
+    for keyword_fragment, (level, note) in radar.BILBAO_RELEVANCE.items():
+        if keyword_fragment.lower() in call_text:
+            if level_order.get(level, 0) > level_order.get(best_level, 0):
+                best_level = level
+    return best_level
+
+
+def legacy_record_filters(call):
+    """Relevancia SEDIA + tema BDNS + tema y niveles Euskadi, como antes."""
+    level = legacy_relevance(call)
+    text = f"{call.title} {call.description}".lower()
+    tema_bdns = any(kw in text for kw in radar.BDNS_TEMAS_OK)
+    tema_eus = any(kw in text for kw in radar.EUSKADI_TEMAS_OK)
+    rel = "MEDIA"
+    for kw in radar.EUSKADI_MUY_ALTA_KW:
+        if kw in text:
+            rel = "MUY ALTA"
+            break
+    if rel != "MUY ALTA":
+        for kw in radar.EUSKADI_ALTA_KW:
+            if kw in text:
+                rel = "ALTA"
+                break
+    return level, tema_bdns, tema_eus, rel
+
+
+def current_record_filters(call):
+    """Mismo trabajo con las funciones del radar (fold_text una vez por texto)."""
+    level, _ = radar.get_relevance_for_call(call)
+    folded = radar.fold_text(f"{call.title} {call.description}")
+    tema_bdns = radar.contains_any(folded, radar.BDNS_TEMAS_OK)
+    tema_eus = radar.contains_any(folded, radar.EUSKADI_TEMAS_OK)
+    rel = radar.tiered_relevance(folded, radar.EUSKADI_RELEVANCE_TIERS, "MEDIA")
+    return level, tema_bdns, tema_eus, rel
+
+
+def trie_pattern(words):
+    """Alternancia con prefijos comunes factorizados: clim(?:a(?:te ...)?|...)"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 and "" not in node else "(?:" + "|".join(alts) + ")"
+        return body + "?" if "" in node else body
+    return build(trie)
+
+
+def timed(fn, records):
+    t0 = time.perf_counter()
+    for rec in records:
+        fn(rec)
+    return time.perf_counter() - t0
+
+
+def table_cases(records):
+    """Por tabla: bucle `in` vs una pasada con re (todas las coincidencias y la primera)."""
+    all_keywords = sorted(set(list(radar.BILBAO_RELEVANCE) + radar.BDNS_TEMAS_OK + radar.EUSKADI_TEMAS_OK
+                              + radar.BDNS_REGIONES_OK + radar.BDNS_LOCAL_EUSKADI))
+    tables = [
+        ("BILBAO_RELEVANCE", list(radar.BILBAO_RELEVANCE)),
+        ("EUSKADI_TEMAS_OK", radar.EUSKADI_TEMAS_OK),
+        ("todas las tablas", all_keywords),
+    ]
+    texts = [radar.fold_text(f"{c.id} {c.title} {c.description}") for c in records]
+    rows = []
+    for name, keywords in tables:
+        folded = list(dict.fromkeys(radar.fold_text(kw) for kw in keywords))
+        # Lookahead: una coincidencia por posicion, tambien las solapadas
+        every = re.compile(f"(?=({trie_pattern(folded)}))")
+        first = re.compile(trie_pattern(folded))
+        label = f"{name} ({len(keywords)})"
+        rows.append((f"{label} bucle todas", timed(lambda t: [k for k in folded if k in t], texts)))
+        rows.append((f"{label} re todas", timed(every.findall, texts)))
+        rows.append((f"{label} bucle alguna", timed(lambda t: radar.contains_any(t, folded), texts)))
+        rows.append((f"{label} re alguna", timed(first.search, texts)))
+    return rows
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or [10000, 50000]
+    cases = [
+        ("relevancia SEDIA (bucle)", legacy_relevance),
+        ("relevancia SEDIA (fold_text)", lambda c: radar.get_relevance_for_call(c)),
+        ("todos los filtros (bucles)", legacy_record_filters),
+        ("todos los filtros (fold_text)", current_record_filters),
+        ("fold_text", lambda c: radar.fold_text(f"{c.title} {c.description}")),
+    ]
+    print(f"{'registros':>10}  {'caso':<42} {'total (s)':>10} {'us/registro':>12}")
+    for n in sizes:
+        records = make_records(n)
+        rows = [(name, timed(fn, records)) for name, fn in cases] + table_cases(records)
+        for name, elapsed in rows:
+            print(f"{n:>10}  {name:<42} {elapsed:>10.3f} {elapsed / n * 1e6:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
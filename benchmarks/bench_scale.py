@@ -0,0 +1,250 @@
+"""
+Benchmark por etapas sobre el corpus sintetico (benchmarks/corpus.py):
+tiempo y pico de memoria de cada etapa a 100 / 1k / 10k / 100k convocatorias.
+
+Etapas:
+  sedia_parse     parse_results sobre las paginas de la busqueda SEDIA
+  sedia_filter    filtro de plazo/estado de fetch_all_calls (SediaSource.check)
+  relevance       get_relevance_for_call de las vigentes (SediaSource.score)
+  bdns_parse      prefiltro del listado + build_bdns_call de cada detalle
+  euskadi_parse   resultados del buscador + parse_euskadi_search_result
+  generate_html   informe HTML del conjunto fusionado
+  generate_excel  Excel del conjunto fusionado
+
+Cada tamano corre en un proceso aparte. El tiempo se mide sin tracemalloc:
+la mejor de las pasadas que quepan en MIN_TIME segundos (hasta MAX_RUNS;
+las etapas lentas, una sola). El pico de memoria sale de otra pasada con
+tracemalloc: memoria Python reservada por la etapa por encima de la que
+habia al empezar.
+
+Con --save se guardan los resultados como baseline (JSON); con --compare
+se comparan con uno guardado y se marca cada etapa que empeora mas que la
+tolerancia (codigo de salida 1 si hay alguna).
+
+Uso:  python benchmarks/bench_scale.py [n ...] [--stages a,b] [--no-memory]
+                                       [--save [RUTA]] [--compare [RUTA]] [--tolerance 0.25]
+      (por defecto 100 1000 10000 100000; baseline en benchmarks/baseline_scale.json)
+
+benchmarks/baseline_scale.json esta commiteado (lleva la version de Python y
+la plataforma en que se midio). Los tiempos solo son comparables en la misma
+maquina: en otra, regenerarlo con --save antes de tocar el codigo y comparar
+despues con --compare.
+"""
+
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+BASELINE = Path(__file__).resolve().parent / "baseline_scale.json"
+STAGES = ["sedia_parse", "sedia_filter", "relevance", "bdns_parse", "euskadi_parse",
+          "generate_html", "generate_excel"]
+MIN_TIME = 0.5
+MAX_RUNS = 10
+# Diferencias por debajo de esto son ruido aunque superen la tolerancia relativa
+MIN_DELTA = {"seconds": 0.01, "peak_mb": 1.0}
+
+
+def build_stages(radar, corpus, tmp):
+    """Etapas encadenadas: cada una recibe la salida de las anteriores en `state`."""
+    today = corpus.TODAY
+    sedia = radar.SediaSource(today=today)
+    radar.CONFIG["output_html"] = os.path.join(tmp, "bench.html")
+    radar.CONFIG["output_excel"] = os.path.join(tmp, "bench.xlsx")
+
+    def sedia_parse(state):
+        state["sedia"] = [call for page in state["corpus"]["sedia"] for call in radar.parse_results(page)]
+        return len(state["sedia"])
+
+    def sedia_filter(state):
+        state["current"] = [call for call in state["sedia"] if not sedia.check(call, today)]
+        return len(state["sedia"])
+
+    def relevance(state):
+        for call in state["current"]:
+            sedia.score(call)
+        return len(state["current"])
+
+    def bdns_parse(state):
+        details = state["corpus"]["bdns_details"]
+        calls = []
+        for page in state["corpus"]["bdns_listing"]:
+            for conv in page["content"]:
+                if radar.bdns_prefilter(conv):
+                    call, _ = radar.build_bdns_call(conv["numeroConvocatoria"], details[conv["numeroConvocatoria"]], today)
+                    if call:
+                        calls.append(call)
+        state["bdns"] = calls
+        return len(details)
+
+    def euskadi_parse(state):
+        calls, seen = [], set()
+        for page in state["corpus"]["euskadi"]:
+            for path, title in radar.EUSKADI_RESULT_RE.findall(page):
+                url = f"https://www.euskadi.eus{path}"
+                if url not in seen:
+                    seen.add(url)
+                    call = radar.parse_euskadi_search_result(url, title.strip(), "bench")
+                    if call:
+                        calls.append(call)
+        state["euskadi"] = calls
+        return len(seen)
+
+    def merged(state):
+        if "all" not in state:
+            calls = {}
+            for key in ("current", "bdns", "euskadi"):
+                calls.update((call.id, call) for call in state.get(key, ()))
+            state["all"] = calls
+            state["new"] = {k: calls[k] for k in list(calls)[::20]}
+        return state["all"], state["new"]
+
+    def generate_html(state):
+        all_calls, new_calls = merged(state)
+        radar.generate_html(all_calls, new_calls, generated_at=today)
+        return len(all_calls)
+
+    def generate_excel(state):
+        all_calls, new_calls = merged(state)
+        radar.generate_excel(all_calls, new_calls, generated_at=today)
+        return len(all_calls)
+
+    return {fn.__name__: fn for fn in (sedia_parse, sedia_filter, relevance, bdns_parse, euskadi_parse,
+                                       generate_html, generate_excel)}
+
+
+def measure(n, stages, memory, seed=42):
+    """Mide las etapas pedidas (y las que estas necesitan antes) con n convocatorias."""
+    import corpus
+    import eu_funding_radar as radar
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        state = {"corpus": corpus.make_corpus(n, seed)}
+        fns = build_stages(radar, corpus, tmp)
+        last = max(STAGES.index(s) for s in stages)
+        for name in STAGES[:last + 1]:
+            fn = fns[name]
+            with contextlib.redirect_stdout(devnull):
+                best, spent, runs = float("inf"), 0.0, 0
+                while runs < MAX_RUNS and (runs == 0 or spent < MIN_TIME):
+                    t0 = time.perf_counter()
+                    items = fn(state)
+                    elapsed = time.perf_counter() - t0
+                    best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+                peak_mb = None
+                if memory and name in stages:
+                    tracemalloc.start()
+                    start = tracemalloc.get_traced_memory()[0]
+                    fn(state)
+                    peak_mb = (tracemalloc.get_traced_memory()[1] - start) / 2**20
+                    tracemalloc.stop()
+            if name in stages:
+                results[name] = {"items": items, "seconds": round(best, 6),
+                                 "peak_mb": None if peak_mb is None else round(peak_mb, 2)}
+    return results
+
+
+def run(n, stages, memory):
+    out = subprocess.run([sys.executable, __file__, "--child", str(n), ",".join(stages), str(int(memory))],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(current, baseline, tolerance):
+    """[(n, etapa, metrica, antes, ahora)] de las que empeoran mas que la tolerancia."""
+    regressions = []
+    for n, stages in current.items():
+        for stage, now in stages.items():
+            before = baseline.get(n, {}).get(stage)
+            if not before:
+                continue
+            for metric, min_delta in MIN_DELTA.items():
+                old, new = before.get(metric), now.get(metric)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > min_delta:
+                    regressions.append((n, stage, metric, old, new))
+    return regressions
+
+
+def pop_option(argv, name, default=None, const=None):
+    """--name [valor]: devuelve (valor, argv sin la opcion). const si va sin valor."""
+    if name not in argv:
+        return default, argv
+    i = argv.index(name)
+    if i + 1 < len(argv) and not argv[i + 1].startswith("--") and not argv[i + 1].isdigit():
+        return argv[i + 1], argv[:i] + argv[i + 2:]
+    return const, argv[:i] + argv[i + 1:]
+
+
+def main(argv):
+    if argv[:1] == ["--child"]:
+        print(json.dumps(measure(int(argv[1]), argv[2].split(","), argv[3] == "1")))
+        return 0
+
+    save, argv = pop_option(argv, "--save", const=str(BASELINE))
+    baseline_path, argv = pop_option(argv, "--compare", const=str(BASELINE))
+    tolerance, argv = pop_option(argv, "--tolerance", default="0.25")
+    stages, argv = pop_option(argv, "--stages", default=",".join(STAGES))
+    memory = "--no-memory" not in argv
+    argv = [a for a in argv if a != "--no-memory"]
+    stages = [s for s in stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        print(f"Etapas desconocidas: {', '.join(sorted(unknown))} (disponibles: {', '.join(STAGES)})")
+        return 2
+    sizes = [int(a) for a in argv] or [100, 1000, 10000, 100000]
+
+    baseline = {}
+    if baseline_path:
+        if not Path(baseline_path).exists():
+            print(f"No hay baseline en {baseline_path}: crealo antes con --save")
+            return 2
+        baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]
+
+    results = {}
+    print(f"{'convocatorias':>13}  {'etapa':<15} {'items':>7} {'total (s)':>10} {'us/item':>9} {'pico (MB)':>10} {'vs baseline':>18}")
+    for n in sizes:
+        results[str(n)] = run(n, stages, memory)
+        for stage, r in results[str(n)].items():
+            before = baseline.get(str(n), {}).get(stage)
+            delta = ""
+            if before:
+                delta = f"{(r['seconds'] / before['seconds'] - 1) * 100:+.0f}% t" if before["seconds"] else ""
+                if r["peak_mb"] is not None and before.get("peak_mb"):
+                    delta += f" {(r['peak_mb'] / before['peak_mb'] - 1) * 100:+.0f}% m"
+            peak = "-" if r["peak_mb"] is None else f"{r['peak_mb']:.1f}"
+            print(f"{n:>13}  {stage:<15} {r['items']:>7} {r['seconds']:>10.3f} "
+                  f"{r['seconds'] / max(r['items'], 1) * 1e6:>9.1f} {peak:>10} {delta:>18}")
+
+    if save:
+        Path(save).write_text(json.dumps({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"\nBaseline guardado en {save}")
+
+    if baseline_path:
+        regressions = compare(results, baseline, float(tolerance))
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regresiones (tolerancia {float(tolerance):.0%}):")
+            for n, stage, metric, old, new in regressions:
+                print(f"   {n:>7} {stage:<15} {metric:<8} {old:.3f} -> {new:.3f}")
+            return 1
+        print(f"\n✅ Sin regresiones frente a {baseline_path} (tolerancia {float(tolerance):.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,240 @@
+"""
+Corpus sintetico de convocatorias con la forma de las tres fuentes.
+
+- SEDIA: paginas de la busqueda ({"totalResults", "results": [...]}) con
+  metadata en las listas/JSON embebido que devuelve la API
+- BDNS: paginas del listado `busqueda` ({"content": [...]}) y el detalle
+  de cada numConv (organo, regiones, beneficiarios, fondos, plazo...)
+- Euskadi: paginas HTML del buscador de tramites de euskadi.eus
+
+Cada elemento sale de un Random sembrado con (semilla, fuente, indice), asi
+el mismo indice da siempre el mismo registro, se genere todo el corpus o
+solo una pagina. Los plazos se reparten alrededor de TODAY (hay vencidas,
+abiertas y proximas) y parte de los registros no pasan los filtros de
+region/tema, como en las respuestas reales.
+
+Uso:  python benchmarks/corpus.py N DIR [--seed S]
+      (escribe el corpus de N convocatorias en DIR: sedia/, bdns/, euskadi/)
+"""
+
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Fecha de referencia de los plazos: pasarla como `today` a los filtros
+TODAY = datetime(2026, 6, 1, tzinfo=timezone.utc)
+PAGE_SIZE = 50
+FIRST_BDNS = 900000  # numConv mas reciente; el listado va hacia atras
+
+WORDS_EN = (
+    "urban climate energy city cities support innovation digital water building renewable "
+    "transport mobility local authority europe research action neutral smart circular "
+    "economy green infrastructure adaptation hydrogen pilot demonstration citizens heat "
+    "district storage grid resilience nature based solutions biodiversity flood coastal"
+).split()
+WORDS_ES = (
+    "ayudas subvenciones energia renovable eficiencia energetica movilidad sostenible "
+    "rehabilitacion edificios vivienda municipio entidades locales residuos economia circular "
+    "agua saneamiento transporte publico innovacion digital autoconsumo fotovoltaica "
+    "alumbrado publico biodiversidad empleo formacion cultura deporte comercio turismo pesca"
+).split()
+SEDIA_PROGRAMMES = ["HORIZON-CL5-2026-D2", "HORIZON-MISS-2026-CIT", "LIFE-2026-CET", "CEF-T-2026-AFIFCOEN",
+                    "DIGITAL-2026-AI", "INNOVFUND-2026-NZT", "INTERREG-2026-SUDOE"]
+SEDIA_STATUS = ["Open", "Forthcoming", "Closed"]
+BDNS_ORGANOS = [
+    ("ESTATAL", "MINISTERIO PARA LA TRANSICION ECOLOGICA Y EL RETO DEMOGRAFICO"),
+    ("ESTATAL", "MINISTERIO DE TRANSPORTES Y MOVILIDAD SOSTENIBLE"),
+    ("ESTATAL", "MINISTERIO DE CULTURA"),
+    ("AUTONOMICO", "PAIS VASCO - GOBIERNO VASCO"),
+    ("AUTONOMICO", "ANDALUCIA - JUNTA DE ANDALUCIA"),
+    ("LOCAL", "BIZKAIA - AYUNTAMIENTO DE BILBAO"),
+    ("LOCAL", "MADRID - AYUNTAMIENTO DE MADRID"),
+    ("OTROS", "INSTITUTO PARA LA DIVERSIFICACION Y AHORRO DE LA ENERGIA"),
+]
+BDNS_REGIONES = ["ES21 - PAIS VASCO", "ES213 - BIZKAIA", "ES - TODAS LAS COMUNIDADES",
+                 "ES61 - ANDALUCIA", "ES30 - COMUNIDAD DE MADRID"]
+BDNS_BENEFICIARIOS = ["ENTIDADES LOCALES", "PYME Y PERSONAS FISICAS QUE DESARROLLAN ACTIVIDAD ECONOMICA",
+                      "PERSONAS JURIDICAS QUE NO DESARROLLAN ACTIVIDAD ECONOMICA", "PERSONAS FISICAS"]
+BDNS_FONDOS = ["MRR - Mecanismo de Recuperacion y Resiliencia", "FEDER", "FSE+", ""]
+EUSKADI_TIPOS = ["ayuda_subvencion", "anuncio_contratacion"]
+
+
+def _rng(seed, source, i):
+    return random.Random(f"{seed}/{source}/{i}")
+
+
+def _words(rng, pool, a, b):
+    return " ".join(rng.choice(pool) for _ in range(rng.randint(a, b)))
+
+
+def _deadline(rng):
+    """Plazo alrededor de TODAY: ~20% vencidos, el resto hasta dos años despues."""
+    return TODAY.date() + timedelta(days=rng.randint(-180, 720))
+
+
+# ─── SEDIA ───
+
+def sedia_item(i, seed=42):
+    """Un resultado de la busqueda SEDIA (mismo i -> mismo resultado)."""
+    rng = _rng(seed, "sedia", i)
+    topic = f"{rng.choice(SEDIA_PROGRAMMES)}-{i:06d}"
+    deadline = _deadline(rng).isoformat() if rng.random() < 0.9 else None
+    actions = [{"status": {"abbreviation": rng.choice(SEDIA_STATUS)},
+                "deadlineDates": [deadline] if deadline else [],
+                "types": [{"typeOfAction": "HORIZON-RIA"}]}]
+    low = rng.choice([500000, 1000000, 2000000])
+    budget = {"budgetTopicActionMap": {"1": [{"action": topic, "minContribution": low,
+                                              "maxContribution": rng.choice([low, low * 5])}]}}
+    metadata = {
+        "identifier": [topic],
+        "title": [f"<b>{_words(rng, WORDS_EN, 5, 12)}</b>"],
+        "descriptionByte": [f"<p>{_words(rng, WORDS_EN, 60, 160)}</p><ul><li>{_words(rng, WORDS_EN, 10, 30)}</li></ul>"],
+        "actions": [json.dumps(actions)],
+        "typesOfAction": ["HORIZON Research and Innovation Actions"],
+        "budgetOverview": [json.dumps(budget)],
+        "callIdentifier": [topic.rsplit("-", 1)[0]],
+        "tags": [rng.choice(WORDS_EN) for _ in range(rng.randint(0, 5))],
+    }
+    if deadline:
+        metadata["deadlineDate"] = [f"{deadline}T17:00:00.000+0000"]
+    return {
+        "reference": f"{topic}COMPETITIVE_CALLen",
+        "url": f"https://ec.europa.eu/info/funding-tenders/opportunities/data/topicDetails/{topic.lower()}.json",
+        "title": None,
+        "summary": f"<p>{_words(rng, WORDS_EN, 20, 40)} &amp; {_words(rng, WORDS_EN, 5, 10)}</p>",
+        "content": f"<div>{_words(rng, WORDS_EN, 20, 40)}</div>",
+        "metadata": metadata,
+    }
+
+
+def sedia_page(n, page_number, page_size=PAGE_SIZE, seed=42):
+    """Pagina page_number (desde 1) de una busqueda con n resultados en total."""
+    start = (page_number - 1) * page_size
+    return {"totalResults": n,
+            "results": [sedia_item(i, seed) for i in range(start, min(start + page_size, n))]}
+
+
+# ─── BDNS ───
+
+def bdns_listing_entry(num_conv, seed=42):
+    rng = _rng(seed, "bdns", num_conv)
+    nivel1, nivel2 = rng.choice(BDNS_ORGANOS)
+    received = TODAY.date() - timedelta(days=(FIRST_BDNS - num_conv) // 40)
+    return {"numeroConvocatoria": str(num_conv), "descripcion": _words(rng, WORDS_ES, 5, 12),
+            "fechaRecepcion": received.isoformat(), "nivel1": nivel1, "nivel2": nivel2}
+
+
+def bdns_listing_page(n, page, page_size=PAGE_SIZE, seed=42):
+    """Pagina page (desde 0) del listado `busqueda`, mas recientes primero."""
+    start = page * page_size
+    nums = range(FIRST_BDNS - start, FIRST_BDNS - min(start + page_size, n), -1)
+    return {"content": [bdns_listing_entry(num, seed) for num in nums],
+            "totalElements": n, "number": page, "size": page_size}
+
+
+def bdns_detail(num_conv, seed=42):
+    """Detalle de una convocatoria BDNS (endpoint convocatorias?numConv=)."""
+    num_conv = int(num_conv)
+    rng = _rng(seed, "bdns", num_conv)
+    nivel1, nivel2 = rng.choice(BDNS_ORGANOS)  # primer sorteo: el mismo organo que en el listado
+    regiones = [{"descripcion": r} for r in rng.sample(BDNS_REGIONES, rng.randint(0, 2))]
+    return {
+        "id": num_conv,
+        "codigoBDNS": str(num_conv),
+        "descripcion": f"{rng.choice(['Ayudas', 'Subvenciones', 'Convocatoria de ayudas'])} "
+                       f"{_words(rng, WORDS_ES, 4, 14)}",
+        "descripcionFinalidad": _words(rng, WORDS_ES, 2, 6),
+        "descripcionBasesReguladoras": _words(rng, WORDS_ES, 10, 30),
+        "organo": {"nivel1": nivel1, "nivel2": nivel2},
+        "regiones": regiones,
+        "tiposBeneficiarios": [{"descripcion": b} for b in rng.sample(BDNS_BENEFICIARIOS, rng.randint(1, 2))],
+        "fondos": [{"descripcion": f} for f in (rng.choice(BDNS_FONDOS),) if f],
+        "fechaFinSolicitud": _deadline(rng).isoformat() if rng.random() < 0.85 else "",
+        "abierto": rng.random() < 0.8,
+        "presupuestoTotal": float(rng.randint(10, 5000) * 1000),
+    }
+
+
+def bdns_numbers(n):
+    return range(FIRST_BDNS, FIRST_BDNS - n, -1)
+
+
+# ─── Euskadi ───
+
+def euskadi_result(i, seed=42):
+    """(tipo, ruta, titulo) de un resultado del buscador de tramites."""
+    rng = _rng(seed, "euskadi", i)
+    tipo = rng.choice(EUSKADI_TIPOS)
+    prefix = "Ayudas para" if tipo == "ayuda_subvencion" else "Contrato de"
+    return tipo, f"/{tipo}/{i:07d}-{rng.randint(2024, 2026)}/web01-a2/es/", f"{prefix} {_words(rng, WORDS_ES, 4, 12)}"
+
+
+def euskadi_search_html(results):
+    """Pagina del buscador de euskadi.eus con los resultados dados."""
+    items = "\n".join(
+        f'<li class="r01srItem"><em class="r01srItemDocName"><a href="{path}" title="{title}">{title}</a></em>'
+        f'<p class="r01srItemDocSummary">{tipo.replace("_", " ")}</p></li>'
+        for tipo, path, title in results)
+    return (f'<!DOCTYPE html><html lang="es"><head><meta charset="ISO-8859-1"><title>Tramites y servicios</title></head>'
+            f'<body><div class="r01srResults"><ul>\n{items}\n</ul></div></body></html>')
+
+
+def euskadi_pages(n, page_size=PAGE_SIZE, seed=42):
+    results = [euskadi_result(i, seed) for i in range(n)]
+    return [euskadi_search_html(results[i:i + page_size]) for i in range(0, n, page_size)]
+
+
+# ─── Corpus completo ───
+
+def split(n):
+    """Reparto de n convocatorias entre fuentes: 50% SEDIA, 30% BDNS, 20% Euskadi."""
+    sedia = n // 2
+    bdns = n * 3 // 10
+    return sedia, bdns, n - sedia - bdns
+
+
+def make_corpus(n, seed=42):
+    """Corpus de n convocatorias: respuestas en bruto de las tres fuentes."""
+    n_sedia, n_bdns, n_eus = split(n)
+    pages = -(-n_sedia // PAGE_SIZE)
+    return {
+        "sedia": [sedia_page(n_sedia, p, seed=seed) for p in range(1, pages + 1)],
+        "bdns_listing": [bdns_listing_page(n_bdns, p, seed=seed) for p in range(-(-n_bdns // PAGE_SIZE))],
+        "bdns_details": {str(num): bdns_detail(num, seed) for num in bdns_numbers(n_bdns)},
+        "euskadi": euskadi_pages(n_eus, seed=seed),
+    }
+
+
+def write_corpus(corpus, directory):
+    directory = Path(directory)
+    for name in ("sedia", "bdns", "euskadi"):
+        (directory / name).mkdir(parents=True, exist_ok=True)
+    for i, page in enumerate(corpus["sedia"], 1):
+        (directory / "sedia" / f"page_{i:05d}.json").write_text(json.dumps(page, ensure_ascii=False), encoding="utf-8")
+    for i, page in enumerate(corpus["bdns_listing"]):
+        (directory / "bdns" / f"busqueda_{i:05d}.json").write_text(json.dumps(page, ensure_ascii=False), encoding="utf-8")
+    (directory / "bdns" / "details.json").write_text(json.dumps(corpus["bdns_details"], ensure_ascii=False), encoding="utf-8")
+    for i, page in enumerate(corpus["euskadi"], 1):
+        (directory / "euskadi" / f"search_{i:05d}.html").write_text(page, encoding="iso-8859-1", errors="replace")
+
+
+def main(argv):
+    seed = 42
+    if "--seed" in argv:
+        i = argv.index("--seed")
+        seed = int(argv[i + 1])
+        argv = argv[:i] + argv[i + 2:]
+    if len(argv) != 2:
+        print("Uso:  python benchmarks/corpus.py N DIR [--seed S]")
+        return 2
+    n, directory = int(argv[0]), argv[1]
+    write_corpus(make_corpus(n, seed), directory)
+    n_sedia, n_bdns, n_eus = split(n)
+    print(f"Corpus en {directory}/: {n_sedia} SEDIA, {n_bdns} BDNS, {n_eus} Euskadi (semilla {seed})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
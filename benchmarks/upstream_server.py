@@ -0,0 +1,336 @@
+"""
+Servidor local que imita las APIs de las tres fuentes, con latencia y fallos
+configurables, para probar la capa de descarga sin tocar los hosts reales.
+
+Rutas (las mismas que usa eu_funding_radar.py, en un solo puerto):
+  sedia          POST /search-api/prod/rest/search?text=..&pageSize=..&pageNumber=..
+  bdns_busqueda  GET  /bdnstrans/api/convocatorias/busqueda?page=..&pageSize=..
+  bdns_detalle   GET  /bdnstrans/api/convocatorias?numConv=..
+  euskadi        GET  /gobierno-vasco/tramites-servicios/?r01kQry=tT:<tipo>;tC:<texto>
+  otros          404 (API de eventos y Open Data de euskadi.eus: el radar
+                 pasa a su alternativa, como con los hosts reales)
+  GET /__stats   contadores del servidor en JSON
+
+Las respuestas salen de benchmarks/corpus.py: cada busqueda SEDIA devuelve
+--sedia-hits resultados de un corpus de --calls convocatorias, empezando en
+un desplazamiento que depende del texto (las keywords se solapan en parte,
+como en SEDIA), y lo mismo el buscador de euskadi.eus.
+
+Fallos y latencia, para todas las rutas o solo una (prefijo "ruta="):
+  --latency [ruta=]SPEC     const:MS | uniform:MIN:MAX | normal:MEDIA:DESV |
+                            lognormal:MEDIANA:SIGMA | exp:MEDIA   (ms)
+  --error-rate [ruta=]P     fraccion de respuestas 5xx (--error-codes)
+  --drip-rate [ruta=]P      fraccion de cuerpos enviados a --drip-bps bytes/s
+  --drop-rate [ruta=]P      fraccion de conexiones cortadas sin responder
+  --rate-limit R            peticiones/s por cliente y ruta (token bucket,
+                            rafaga --rate-burst); por encima, 429 + Retry-After
+
+El radar se apunta al servidor con RADAR_HTTP_HOST_MAP (se imprime al
+arrancar); las URLs y la cabecera Host siguen siendo las reales.
+
+Uso:  python benchmarks/upstream_server.py [--port 8765] [--calls 2000]
+          [--latency lognormal:120:0.6] [--latency bdns_detalle=uniform:50:400]
+          [--error-rate 0.02] [--drip-rate euskadi=0.1] [--rate-limit 10] ...
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import corpus  # noqa: E402
+
+ROUTES = ("sedia", "bdns_busqueda", "bdns_detalle", "euskadi", "otros")
+UPSTREAM_HOSTS = ("api.tech.ec.europa.eu", "www.infosubvenciones.es", "www.euskadi.eus",
+                  "api.euskadi.eus", "opendata.euskadi.eus")
+
+
+# ─── Configuracion por ruta ───
+
+def parse_latency(spec):
+    """SPEC -> funcion(rng) que devuelve la latencia en segundos."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(":")] if args else []
+    makers = {
+        "const": lambda ms: lambda rng: ms,
+        "uniform": lambda lo, hi: lambda rng: rng.uniform(lo, hi),
+        "normal": lambda mean, sd: lambda rng: max(0.0, rng.gauss(mean, sd)),
+        "lognormal": lambda median, sigma: lambda rng: median * math.exp(sigma * rng.gauss(0, 1)),
+        "exp": lambda mean: lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0,
+    }
+    if kind.replace(".", "", 1).isdigit() and not args:
+        kind, values = "const", [float(kind)]
+    if kind not in makers:
+        raise argparse.ArgumentTypeError(f"latencia desconocida: {spec} ({' | '.join(makers)})")
+    try:
+        sample_ms = makers[kind](*values)
+    except TypeError:
+        raise argparse.ArgumentTypeError(f"parametros incorrectos para {kind}: {spec}") from None
+    return lambda rng: sample_ms(rng) / 1000
+
+
+def per_route(values, parse, default):
+    """["0.1", "bdns_detalle=0.5"] -> {ruta: valor}; sin prefijo vale para todas."""
+    table = dict.fromkeys(ROUTES, default)
+    for value in values or ():
+        route, sep, spec = value.partition("=")
+        if not sep:
+            table = dict.fromkeys(ROUTES, parse(value))
+            continue
+        if route not in ROUTES:
+            raise SystemExit(f"ruta desconocida: {route} (rutas: {', '.join(ROUTES)})")
+        table[route] = parse(spec)
+    return table
+
+
+class TokenBuckets:
+    """Token bucket por clave (cliente, ruta), como HostRateLimiter del radar."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """True si hay ficha; si no, segundos hasta la siguiente."""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+class Upstream:
+    """Estado del servidor: corpus, fallos por ruta y contadores."""
+
+    def __init__(self, args):
+        self.args = args
+        self.n_sedia, self.n_bdns, self.n_eus = corpus.split(args.calls)
+        self.latency = per_route(args.latency, parse_latency, lambda rng: 0.0)
+        self.error_rate = per_route(args.error_rate, float, 0.0)
+        self.drip_rate = per_route(args.drip_rate, float, 0.0)
+        self.drop_rate = per_route(args.drop_rate, float, 0.0)
+        self.limiter = TokenBuckets(args.rate_limit, args.rate_burst)
+        self.rng = random.Random(args.seed)
+        self.rng_lock = threading.Lock()
+        self.stats = {"requests": 0, "bytes": 0, "routes": {}, "status": {}, "faults": {}}
+        self.stats_lock = threading.Lock()
+
+    def draw(self, fn):
+        with self.rng_lock:
+            return fn(self.rng)
+
+    def count(self, route, status=None, sent=0, fault=None):
+        with self.stats_lock:
+            s = self.stats
+            if status is not None:
+                s["requests"] += 1
+                s["bytes"] += sent
+                s["routes"][route] = s["routes"].get(route, 0) + 1
+                s["status"][str(status)] = s["status"].get(str(status), 0) + 1
+            if fault:
+                s["faults"][fault] = s["faults"].get(fault, 0) + 1
+
+    # ─── Respuestas ───
+    @staticmethod
+    def route(path):
+        if path.startswith("/search-api/") and path.rstrip("/").endswith("/search"):
+            return "sedia"
+        if path.rstrip("/").endswith("/bdnstrans/api/convocatorias/busqueda"):
+            return "bdns_busqueda"
+        if path.rstrip("/").endswith("/bdnstrans/api/convocatorias"):
+            return "bdns_detalle"
+        if path.startswith("/gobierno-vasco/tramites-servicios"):
+            return "euskadi"
+        return "otros"
+
+    def body(self, route, query):
+        """(status, content-type, bytes) de una ruta; query: dict de parametros."""
+        seed = self.args.seed
+        if route == "sedia":
+            size = int(query.get("pageSize", corpus.PAGE_SIZE))
+            page = max(1, int(query.get("pageNumber", 1)))
+            total = min(self.args.sedia_hits, self.n_sedia)
+            offset = zlib.crc32(query.get("text", "").encode("utf-8")) % max(self.n_sedia, 1)
+            start = (page - 1) * size
+            results = [corpus.sedia_item((offset + j) % self.n_sedia, seed)
+                       for j in range(start, min(start + size, total))]
+            return 200, "application/json", json.dumps({"totalResults": total, "results": results}).encode("utf-8")
+        if route == "bdns_busqueda":
+            page = corpus.bdns_listing_page(self.n_bdns, int(query.get("page", 0)),
+                                            int(query.get("pageSize", corpus.PAGE_SIZE)), seed)
+            return 200, "application/json", json.dumps(page, ensure_ascii=False).encode("utf-8")
+        if route == "bdns_detalle":
+            num = query.get("numConv", "")
+            if not num.isdigit():
+                return 400, "application/json", b'{"error":"numConv"}'
+            return 200, "application/json", json.dumps(corpus.bdns_detail(num, seed), ensure_ascii=False).encode("utf-8")
+        if route == "euskadi":
+            fields = dict(part.split(":", 1) for part in query.get("r01kQry", "").split(";") if ":" in part)
+            tipo, text = fields.get("tT", ""), fields.get("tC", "")
+            offset = zlib.crc32(f"{tipo}/{text}".encode("utf-8")) % max(self.n_eus, 1)
+            results = []
+            for j in range(self.n_eus):
+                result = corpus.euskadi_result((offset + j) % self.n_eus, seed)
+                if not tipo or result[0] == tipo:
+                    results.append(result)
+                if len(results) >= self.args.euskadi_hits:
+                    break
+            page = corpus.euskadi_search_html(results)
+            return 200, "text/html; charset=ISO-8859-1", page.encode("iso-8859-1", "replace")
+        return 404, "text/plain", b"Not Found"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como los hosts reales
+    server_version = "RadarUpstream/1.0"
+    upstream = None  # se asigna en main()
+
+    def log_message(self, fmt, *args):
+        if self.upstream.args.verbose:
+            super().log_message(fmt, *args)
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.handle_request()
+
+    def handle_request(self):
+        up = self.upstream
+        parts = urllib.parse.urlsplit(self.path)
+        if parts.path == "/__stats":
+            with up.stats_lock:
+                data = json.dumps(up.stats, indent=2).encode("utf-8")
+            return self.reply(200, "application/json", data)
+
+        route = up.route(parts.path)
+        query = dict(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+
+        delay = up.draw(up.latency[route])
+        if delay:
+            time.sleep(delay)
+        if up.drop_rate[route] and up.draw(lambda rng: rng.random()) < up.drop_rate[route]:
+            up.count(route, fault="drop")
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        wait = up.limiter.take((self.client_address[0], route))
+        if wait is not True:
+            up.count(route, fault="429")
+            return self.reply(429, "application/json", b'{"error":"Too Many Requests"}', route,
+                              extra={"Retry-After": str(max(1, math.ceil(wait)))})
+        if up.error_rate[route] and up.draw(lambda rng: rng.random()) < up.error_rate[route]:
+            status = up.draw(lambda rng: rng.choice(up.args.error_codes))
+            up.count(route, fault=str(status))
+            return self.reply(status, "text/plain", f"Upstream error {status}".encode(), route)
+
+        status, ctype, body = up.body(route, query)
+        drip = up.drip_rate[route] and up.draw(lambda rng: rng.random()) < up.drip_rate[route]
+        if drip:
+            up.count(route, fault="drip")
+        self.reply(status, ctype, body, route, drip=drip)
+
+    def reply(self, status, ctype, body, route="otros", extra=None, drip=False):
+        up = self.upstream
+        headers = {"Content-Type": ctype}
+        if status == 200 and up.args.etag:
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+        if body and len(body) > 1024 and "gzip" in (self.headers.get("Accept-Encoding") or "") and not up.args.no_gzip:
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+        headers.update(extra or {})
+        headers["Content-Length"] = str(len(body))
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            if drip:
+                # Cuerpo a goteo: trozos pequenos a --drip-bps bytes/s
+                chunk = max(1, up.args.drip_bps // 10)
+                for i in range(0, len(body), chunk):
+                    self.wfile.write(body[i:i + chunk])
+                    self.wfile.flush()
+                    time.sleep(chunk / up.args.drip_bps)
+            else:
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        up.count(route, status=status, sent=len(body))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local que imita SEDIA, BDNS y euskadi.eus")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--calls", type=int, default=2000, help="tamano del corpus (reparto de corpus.split)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sedia-hits", type=int, default=120, help="resultados por busqueda SEDIA")
+    parser.add_argument("--euskadi-hits", type=int, default=25, help="resultados por busqueda euskadi.eus")
+    parser.add_argument("--latency", action="append", metavar="[RUTA=]SPEC")
+    parser.add_argument("--error-rate", action="append", metavar="[RUTA=]P")
+    parser.add_argument("--error-codes", type=lambda v: [int(c) for c in v.split(",")], default=[500, 502, 503])
+    parser.add_argument("--drip-rate", action="append", metavar="[RUTA=]P")
+    parser.add_argument("--drip-bps", type=int, default=4096, help="bytes/s de los cuerpos a goteo")
+    parser.add_argument("--drop-rate", action="append", metavar="[RUTA=]P")
+    parser.add_argument("--rate-limit", type=float, default=0, help="peticiones/s por cliente y ruta (0 = sin limite)")
+    parser.add_argument("--rate-burst", type=int, default=10)
+    parser.add_argument("--etag", action="store_true", help="ETag + 304 con If-None-Match")
+    parser.add_argument("--no-gzip", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="una linea de log por peticion")
+    args = parser.parse_args(argv)
+
+    Handler.upstream = Upstream(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    host, port = server.server_address[:2]
+    target = f"http://{host}:{port}"
+    print(f"Servidor en {target} ({Handler.upstream.n_sedia} SEDIA, {Handler.upstream.n_bdns} BDNS, "
+          f"{Handler.upstream.n_eus} Euskadi)")
+    print("Apunta el radar aqui con:")
+    print(f"  export RADAR_HTTP_HOST_MAP=\"{','.join(f'{h}={target}' for h in UPSTREAM_HOSTS)}\"")
+    sys.stdout.flush()
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt  # kill tambien imprime los contadores
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(Handler.upstream.stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
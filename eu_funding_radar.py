@@ -6,33 +6,68 @@ filtra convocatorias relevantes para el Ayuntamiento de Bilbao
 y genera un informe HTML + Excel con fichas + alertas por email.
 
 Uso:  python eu_funding_radar.py
-Requisitos:  pip install openpyxl
+      python eu_funding_radar.py --record [DIR]   (graba las respuestas HTTP)
+      python eu_funding_radar.py --offline [DIR]  (ejecucion sin red desde DIR)
+      python eu_funding_radar.py --profile [DIR]  (cProfile + memoria por etapa en DIR)
+Requisitos:  pip install openpyxl  (opcional: brotli, para los .br de docs/)
 """
 
+import argparse
+import base64
+import cProfile
+import gzip
+import hashlib
+import html
+import http.client
+import io
 import json
 import os
+import pstats
+import queue
 import re
+import shutil
 import sys
 import smtplib
+import sqlite3
+import tempfile
+import threading
 import time
-import urllib.request
+import tracemalloc
+import unicodedata
 import urllib.parse
+import zipfile
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
 from pathlib import Path
 
 # Intentar importar openpyxl
 try:
     from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
     from openpyxl.utils import get_column_letter
+    from openpyxl.comments import Comment
+    from openpyxl.writer.excel import ExcelWriter
     HAS_OPENPYXL = True
 except ImportError:
     HAS_OPENPYXL = False
     print("⚠️  openpyxl no instalado. Ejecuta: pip install openpyxl")
     print("   El Excel no se generará, pero el HTML sí.\n")
 
+# brotli es opcional: sin el, la web publicada lleva solo los .gz
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
 # ──────────────────────────────────────────────
 # CONFIGURACIÓN
 # ──────────────────────────────────────────────
@@ -90,8 +125,60 @@ CONFIG = {
 
     "seen_file": "seen_calls.json",
     "output_file": "resultados_convocatorias.json",
+    # Estado entre ejecuciones (sustituye a seen_calls.json, que solo se
+    # lee para la importacion inicial)
+    "db_file": os.environ.get("RADAR_DB", "radar.db"),
+    # Volcado de texto de la base (lo que se commitea en lugar del binario);
+    # si radar.db no existe, se reconstruye desde aqui
+    "db_export": os.environ.get("RADAR_DB_EXPORT", "radar_state.jsonl"),
+    # Las convocatorias vencidas hace mas de estos dias se borran de la base
+    "db_ttl_days": int(os.environ.get("RADAR_DB_TTL_DAYS") or "365"),
     "output_html": "resultados_convocatorias.html",
     "output_excel": "resultados_convocatorias.xlsx",
+    # Web estatica (GitHub Pages): index.html + .gz/.br, JSON y Excel
+    "site_dir": os.environ.get("RADAR_SITE_DIR", "docs"),
+    # Regenerar HTML/Excel/JSON (y email) aunque el conjunto no haya cambiado
+    "force_reports": os.environ.get("RADAR_FORCE_REPORTS", "") == "1",
+    # Metricas de la ejecucion (tiempos por etapa, HTTP por host) en JSON y,
+    # si se indica ruta, en formato textfile de Prometheus (node_exporter)
+    "metrics_file": os.environ.get("RADAR_METRICS_FILE", "radar_metrics.json"),
+    "prometheus_file": os.environ.get("RADAR_PROMETHEUS_FILE", ""),
+
+    # Concurrencia de las busquedas SEDIA (1 = modo secuencial)
+    "concurrency": int(os.environ.get("RADAR_CONCURRENCY") or "8"),
+    # Limite de peticiones por segundo y host (token bucket)
+    "rate_limit_per_host": float(os.environ.get("RADAR_RATE_LIMIT") or "10"),
+    "rate_limit_burst": int(os.environ.get("RADAR_RATE_BURST") or "10"),
+    # Paginacion SEDIA: tope de seguridad de paginas por keyword
+    "eu_page_size": 50,
+    "eu_max_pages": int(os.environ.get("RADAR_EU_MAX_PAGES") or "20"),
+    # BDNS: paginas del listado (x50) y pool de descarga de detalles.
+    # Con marca de agua se pagina hasta cruzarla; bdns_max_pages es solo un
+    # limite de seguridad. Sin marca (primera ejecucion) se leen bdns_pages.
+    "bdns_pages": 10,
+    "bdns_max_pages": int(os.environ.get("RADAR_BDNS_MAX_PAGES") or "40"),
+    "bdns_workers": int(os.environ.get("RADAR_BDNS_WORKERS") or "8"),
+    "bdns_queue_size": 100,
+
+    # Redirige hosts a otro servidor (p. ej. benchmarks/upstream_server.py):
+    # "api.tech.ec.europa.eu=http://127.0.0.1:8765,www.infosubvenciones.es=..."
+    "http_host_map": os.environ.get("RADAR_HTTP_HOST_MAP", ""),
+
+    # Grabaciones HTTP (--record / --offline): una respuesta por peticion
+    "cassette_dir": os.environ.get("RADAR_CASSETTE_DIR", "cassettes"),
+
+    # Cache local (se conserva entre ejecuciones via actions/cache)
+    "cache_dir": os.environ.get("RADAR_CACHE_DIR", ".cache"),
+    # Timeout uniforme (segundos) de todas las peticiones HTTP
+    "http_timeout": float(os.environ.get("RADAR_HTTP_TIMEOUT") or "30"),
+    "bdns_cache_ttl_days": float(os.environ.get("RADAR_BDNS_CACHE_TTL_DAYS") or "3"),
+    "bdns_cache_max_entries": int(os.environ.get("RADAR_BDNS_CACHE_MAX") or "5000"),
+
+    # Presupuesto de tiempo (segundos) de cada fuente; corren en paralelo y
+    # una fuente que se pasa se descarta como si hubiera fallado
+    "eu_timeout": float(os.environ.get("RADAR_EU_TIMEOUT") or "900"),
+    "bdns_timeout": float(os.environ.get("RADAR_BDNS_TIMEOUT") or "900"),
+    "euskadi_timeout": float(os.environ.get("RADAR_EUSKADI_TIMEOUT") or "300"),
 }
 
 # Relevancia por keywords para Bilbao
@@ -137,404 +224,2233 @@ BILBAO_RELEVANCE = {
 }
 
 
+# ──────────────────────────────────────────────
+# METRICAS DE EJECUCION
+# ──────────────────────────────────────────────
+
+class RunMetrics:
+    """Metricas de una ejecucion, para ver entre ejecuciones donde se va el tiempo.
+
+    - stages: segundos por etapa (fuentes, parseo/filtro de cada fuente,
+      HTML, Excel, email...). Las etapas que corren en varios hilos a la vez
+      (parse.eu) suman el tiempo de todos y pueden superar al de pared.
+    - http: por host, peticiones, status, errores, bytes recibidos (tal cual
+      llegan, comprimidos), histograma de latencias, espera del rate limit y
+      resultado de la cache (revalidated = 304 servido de .cache/, fetched =
+      respuesta completa, cassette = servida desde una grabacion).
+    - counters / run: contadores sueltos y resumen de la ejecucion.
+    - profiler: StageProfiler (--profile) que envuelve cada stage()
+
+    Seguro entre hilos. write() vuelca el JSON y, si se pide, el textfile de
+    Prometheus.
+    """
+
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self):
+        self.stages = {}
+        self.hosts = {}
+        self.counters = {}
+        self.run = {}
+        self.profiler = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            if self.profiler:
+                with self.profiler.stage(name):
+                    yield
+            else:
+                yield
+        finally:
+            self.add_stage(name, time.perf_counter() - t0)
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _host(self, host):
+        entry = self.hosts.get(host)
+        if entry is None:
+            entry = self.hosts[host] = {"requests": 0, "status": {}, "errors": {}, "bytes": 0,
+                                        "latencies": [], "rate_limit_wait": 0.0, "cache": {}}
+        return entry
+
+    def http(self, host, seconds, status=None, size=0, error=None, cache=None):
+        """Una ida y vuelta al servidor (o a la grabacion): status o error."""
+        with self._lock:
+            entry = self._host(host or "?")
+            entry["requests"] += 1
+            entry["bytes"] += size
+            entry["latencies"].append(seconds)
+            if status is not None:
+                entry["status"][str(status)] = entry["status"].get(str(status), 0) + 1
+            kind = str(status) if status is not None and status >= 400 else type(error).__name__ if error else None
+            if kind:
+                entry["errors"][kind] = entry["errors"].get(kind, 0) + 1
+            if cache:
+                entry["cache"][cache] = entry["cache"].get(cache, 0) + 1
+
+    def rate_wait(self, host, seconds):
+        with self._lock:
+            self._host(host or "?")["rate_limit_wait"] += seconds
+
+    @staticmethod
+    def _percentile(ordered, q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+    def to_dict(self):
+        with self._lock:
+            http = {}
+            for host, entry in sorted(self.hosts.items()):
+                ordered = sorted(entry["latencies"])
+                buckets = {str(le): sum(1 for s in ordered if s <= le) for le in self.LATENCY_BUCKETS}
+                buckets["+Inf"] = len(ordered)
+                served = entry["cache"].get("revalidated", 0) + entry["cache"].get("cassette", 0)
+                lookups = sum(entry["cache"].values())
+                http[host] = {
+                    "requests": entry["requests"],
+                    "status": dict(sorted(entry["status"].items())),
+                    "errors": dict(sorted(entry["errors"].items())),
+                    "bytes": entry["bytes"],
+                    "latency": {
+                        "buckets": buckets,
+                        "sum": round(sum(ordered), 4),
+                        "count": len(ordered),
+                        "p50": round(self._percentile(ordered, 0.5), 4),
+                        "p95": round(self._percentile(ordered, 0.95), 4),
+                        "max": round(ordered[-1], 4) if ordered else 0.0,
+                    },
+                    "rate_limit_wait": round(entry["rate_limit_wait"], 4),
+                    "cache": dict(sorted(entry["cache"].items())),
+                    "cache_hit_rate": round(served / lookups, 4) if lookups else None,
+                }
+            return {
+                "run": dict(self.run),
+                "stages": {k: round(v, 4) for k, v in self.stages.items()},
+                "http": http,
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def prometheus(self, data=None):
+        """Formato de exposicion de texto de Prometheus (textfile collector)."""
+        data = data or self.to_dict()
+        lines = []
+
+        def esc(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{esc(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        run, http = data["run"], data["http"]
+        if run.get("timestamp"):
+            metric("radar_last_run_timestamp_seconds", "gauge", "Hora de la ejecucion (epoch)",
+                   [({}, run["timestamp"])])
+        metric("radar_stage_duration_seconds", "gauge", "Duracion de cada etapa",
+               [({"stage": k}, v) for k, v in data["stages"].items()])
+        metric("radar_source_up", "gauge", "1 si la fuente termino sin error",
+               [({"source": k}, int(v["ok"])) for k, v in run.get("sources", {}).items()])
+        metric("radar_calls", "gauge", "Convocatorias por fuente en el conjunto fusionado",
+               [({"source": k}, v) for k, v in run.get("calls_by_source", {}).items()])
+        metric("radar_calls_changed", "gauge", "Convocatorias nuevas, modificadas y retiradas",
+               [({"kind": k}, run[k]) for k in ("new", "modified", "removed") if k in run])
+        metric("radar_http_requests", "gauge", "Peticiones HTTP por host y status",
+               [({"host": h, "status": s}, n) for h, e in http.items() for s, n in e["status"].items()])
+        metric("radar_http_errors", "gauge", "Errores HTTP por host (status >= 400 o excepcion)",
+               [({"host": h, "kind": k}, n) for h, e in http.items() for k, n in e["errors"].items()])
+        metric("radar_http_response_bytes", "gauge", "Bytes recibidos por host",
+               [({"host": h}, e["bytes"]) for h, e in http.items()])
+        metric("radar_http_cache_requests", "gauge", "Peticiones por resultado de cache",
+               [({"host": h, "result": r}, n) for h, e in http.items() for r, n in e["cache"].items()])
+        metric("radar_http_rate_limit_wait_seconds", "gauge", "Espera del rate limit por host",
+               [({"host": h}, e["rate_limit_wait"]) for h, e in http.items()])
+        name = "radar_http_request_duration_seconds"
+        lines.append(f"# HELP {name} Latencia de las peticiones HTTP")
+        lines.append(f"# TYPE {name} histogram")
+        for host, e in http.items():
+            latency = e["latency"]
+            for le, n in latency["buckets"].items():
+                lines.append(f'{name}_bucket{{host="{esc(host)}",le="{le}"}} {n}')
+            lines.append(f'{name}_sum{{host="{esc(host)}"}} {latency["sum"]}')
+            lines.append(f'{name}_count{{host="{esc(host)}"}} {latency["count"]}')
+        metric("radar_counter", "gauge", "Contadores sueltos de la ejecucion",
+               [({"name": k}, v) for k, v in data["counters"].items()])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, prometheus_path=""):
+        data = self.to_dict()
+        if path:
+            self._write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2))
+        if prometheus_path:
+            self._write_atomic(prometheus_path, self.prometheus(data))
+        return data
+
+    @staticmethod
+    def _write_atomic(path, text):
+        # El textfile collector puede leer el fichero en cualquier momento
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+class StageProfiler:
+    """--profile: cProfile y tracemalloc en cada etapa de RunMetrics.stage().
+
+    Por etapa deja en el directorio:
+    - <etapa>.pstats: perfil del hilo principal (python -m pstats, snakeviz...)
+    - <etapa>.<fuente>.pstats: hilos lanzados durante la etapa, agrupados
+      por fuente (eu / bdns / eus): en "fuentes" es donde esta parse_results
+    - <etapa>.txt: funciones con mas tiempo acumulado y propio (todos los
+      hilos juntos), pico de memoria y lineas que mas memoria han reservado
+    y al final summary.json con tiempo y memoria de todas las etapas.
+
+    Solo se perfilan las etapas del hilo principal (las fuente.* corren en
+    sus hilos y caen dentro de "fuentes"). tracemalloc es global: el pico de
+    una etapa incluye lo que reservan todos sus hilos.
+    """
+
+    TOP = 30
+    # Lo que reservan tracemalloc y la importacion de modulos no es de la etapa
+    IGNORE = (tracemalloc.Filter(False, tracemalloc.__file__),
+              tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+              tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"))
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.summary = {}
+        self._threads = []  # (etiqueta, cProfile.Profile) de los hilos nuevos
+        self._lock = threading.Lock()
+        self._active = None
+
+    def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tracemalloc.start()
+
+    def stop(self):
+        tracemalloc.stop()
+        (self.directory / "summary.json").write_text(json.dumps(self.summary, indent=2), encoding="utf-8")
+        print(f"\n🔬 Perfil por etapa en {self.directory}/:")
+        for name, entry in self.summary.items():
+            print(f"   {name:<10} {entry['seconds']:>8.2f}s  pico {entry['peak_mb']:>8.1f} MB  "
+                  f"retenido {entry['net_mb']:>+8.1f} MB")
+
+    def _thread_hook(self, frame, event, arg):
+        # threading.setprofile: se llama una vez al arrancar cada hilo nuevo;
+        # profile.enable() sustituye el hook por el perfil de ese hilo
+        profile = cProfile.Profile()
+        with self._lock:
+            self._threads.append(((source_label() or "hilos").lower(), profile))
+        profile.enable()
+
+    @contextmanager
+    def stage(self, name):
+        if self._active or threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        self._active = name
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        threading.setprofile(self._thread_hook)
+        profile = cProfile.Profile()
+        t0 = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - t0
+            threading.setprofile(None)
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            with self._lock:
+                threads, self._threads = self._threads, []
+            self._active = None
+            self._report(name, elapsed, profile, threads, before, after, peak - base, current - base)
+
+    def _report(self, name, elapsed, profile, threads, before, after, peak, net):
+        safe = re.sub(r"[^\w.-]", "_", name)
+        files = [f"{safe}.pstats"]
+        profile.dump_stats(self.directory / files[0])
+        merged = pstats.Stats(profile)
+        by_label = {}
+        for label, thread_profile in threads:
+            by_label.setdefault(label, []).append(thread_profile)
+        for label, profiles in sorted(by_label.items()):
+            # Un hilo abandonado (fuente con timeout) puede seguir corriendo:
+            # se guarda lo que lleve hasta ahora
+            stats = pstats.Stats(*profiles)
+            files.append(f"{safe}.{label}.pstats")
+            stats.dump_stats(self.directory / files[-1])
+            merged.add(stats)
+
+        sites = after.filter_traces(self.IGNORE).compare_to(before.filter_traces(self.IGNORE), "lineno")
+        out = io.StringIO()
+        out.write(f"Etapa {name}: {elapsed:.3f}s, pico {peak / 2**20:.1f} MB, "
+                  f"retenido {net / 2**20:+.1f} MB ({len(threads)} hilos nuevos)\n\n")
+        merged.stream = out
+        for order in ("cumulative", "tottime"):
+            out.write(f"=== Funciones por tiempo {'acumulado' if order == 'cumulative' else 'propio'} ===\n")
+            merged.sort_stats(order).print_stats(self.TOP)
+        out.write(f"=== Lineas que mas memoria reservan (retenida al acabar la etapa) ===\n")
+        for stat in sites[:self.TOP]:
+            out.write(f"{stat.size_diff / 1024:>+12.1f} KiB {stat.count_diff:>+9} bloques  {stat.traceback}\n")
+        (self.directory / f"{safe}.txt").write_text(out.getvalue(), encoding="utf-8")
+
+        self.summary[name] = {"seconds": round(elapsed, 4), "peak_mb": round(peak / 2**20, 2),
+                              "net_mb": round(net / 2**20, 2), "pstats": files, "report": f"{safe}.txt"}
+
+
+METRICS = RunMetrics()
+
+
+# ──────────────────────────────────────────────
+# CLIENTE HTTP COMPARTIDO
+# ──────────────────────────────────────────────
+
+class HostRateLimiter:
+    """Token bucket por host: como mucho `rate` peticiones/segundo a cada servidor."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._buckets = {}  # host -> (tokens, ultimo_refill)
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        if self.rate <= 0:
+            return
+        host = urllib.parse.urlsplit(url).netloc
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (float(self.burst), now))
+                tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class HttpError(Exception):
+    """Respuesta HTTP con status >= 400."""
+
+    def __init__(self, status, reason, url):
+        super().__init__(f"HTTP {status} {reason}")
+        self.status = status
+        self.reason = reason
+        self.url = url
+
+
+class HttpResponse:
+    """Respuesta ya leida y descomprimida."""
+
+    def __init__(self, url, status, headers, body, from_cache=False):
+        self.url = url
+        self.status = status
+        self.headers = headers  # dict con claves en minusculas
+        self.body = body
+        self.from_cache = from_cache
+
+    def header(self, name, default=""):
+        return self.headers.get(name.lower(), default)
+
+    def text(self, default_encoding="utf-8", errors="strict"):
+        match = re.search(r'charset=([\w\-]+)', self.header("Content-Type"), re.IGNORECASE)
+        encoding = match.group(1) if match else default_encoding
+        try:
+            return self.body.decode(encoding, errors)
+        except (LookupError, UnicodeDecodeError):
+            return self.body.decode("iso-8859-1")
+
+    def json(self):
+        return json.loads(self.text())
+
+
+class CassetteMiss(ConnectionError):
+    """Peticion sin grabacion en modo offline (para las fuentes, como sin red)."""
+
+
+class Cassette:
+    """Grabacion de respuestas HTTP en disco para ejecuciones sin red.
+
+    Un JSON por peticion en <directorio>/<host>/<clave>.json. La clave sale
+    de la peticion normalizada (metodo, URL con el host en minusculas y los
+    parametros ordenados, hash del cuerpo), asi el orden de los parametros
+    o el puerto por defecto no cambian la grabacion. Se guarda la respuesta
+    final (tras redirecciones y descompresion), tambien los status >= 400.
+
+    mode "record" graba lo que devuelve la red; "replay" sirve solo desde
+    disco y una peticion no grabada falla con CassetteMiss.
+    """
+
+    META_FILE = "cassette.json"
+
+    def __init__(self, directory, mode):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"modo de cassette desconocido: {mode}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.stats = {"grabadas": 0, "servidas": 0, "sin grabacion": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    @staticmethod
+    def normalise(method, url, data=None):
+        """"POST https://host/path?a=1&b=2 <sha256 del cuerpo>" """
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        if parts.port and parts.port != {"http": 80, "https": 443}.get(scheme):
+            host = f"{host}:{parts.port}"
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+        request = f"{method.upper()} {scheme}://{host}{parts.path or '/'}" + (f"?{query}" if query else "")
+        if data:
+            request += " " + hashlib.sha256(data).hexdigest()
+        return request
+
+    def _path(self, request):
+        host = urllib.parse.urlsplit(request.split(" ")[1]).netloc.replace(":", "_")
+        key = hashlib.sha256(request.encode("utf-8")).hexdigest()[:24]
+        return self.directory / host / f"{key}.json"
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def recorded_at(self):
+        """Hora de la grabacion (UTC) o None si no hay cassette.json."""
+        try:
+            meta = json.loads((self.directory / self.META_FILE).read_text(encoding="utf-8"))
+            return datetime.fromisoformat(meta["recorded_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def start_recording(self, recorded_at):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta = {"recorded_at": recorded_at.isoformat()}
+        (self.directory / self.META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+    def record(self, method, url, data, status, reason, headers=None, body=b""):
+        request = self.normalise(method, url, data)
+        entry = {"request": request, "url": url, "status": status, "reason": reason,
+                 "headers": headers or {}}
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(body).decode("ascii")
+        path = self._path(request)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+        self._count("grabadas")
+
+    def replay(self, method, url, data=None):
+        request = self.normalise(method, url, data)
+        try:
+            with open(self._path(request), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count("sin grabacion")
+            raise CassetteMiss(f"sin grabacion: {request}") from None
+        self._count("servidas")
+        if entry["status"] >= 400:
+            raise HttpError(entry["status"], entry["reason"], entry["url"])
+        if "body_b64" in entry:
+            body = base64.b64decode(entry["body_b64"])
+        else:
+            body = entry.get("body", "").encode("utf-8")
+        return HttpResponse(entry["url"], entry["status"], entry["headers"], body)
+
+    def summary(self):
+        return ", ".join(f"{v} {k}" for k, v in self.stats.items() if v)
+
+
+class HttpClient:
+    """Cliente HTTP unico para todas las fuentes.
+
+    - Pool de conexiones persistentes (keep-alive) por host
+    - Accept-Encoding gzip/deflate con descompresion transparente
+    - Revalidacion ETag / If-Modified-Since con cache de respuestas en disco
+    - Timeout uniforme y rate limit por host
+    - Grabacion / reproduccion de respuestas (self.cassette, ver Cassette)
+    - host_map: host -> servidor al que se conecta en su lugar (la URL y la
+      cabecera Host siguen siendo las originales)
+    - metrics: RunMetrics donde se anota cada ida y vuelta (latencia, status,
+      bytes, espera del rate limit, resultado de la cache)
+    """
+
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout=30, cache_dir=None, rate_limiter=None, max_idle_per_host=8, host_map=None,
+                 metrics=None):
+        self.timeout = timeout
+        self.metrics = metrics
+        self.host_map = host_map or {}
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.rate_limiter = rate_limiter
+        self.max_idle_per_host = max_idle_per_host
+        self.cassette = None
+        self.closed = False
+        self._idle = {}  # (scheme, host, port) -> [conexiones libres]
+        self._lock = threading.Lock()
+
+    # ─── Pool de conexiones ───
+    def _checkout(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        return conn, False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if not self.closed and len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Cierra el pool. Despues, las peticiones fallan y no se escribe en la
+        cache: un hilo de una fuente abandonada por timeout no toca .cache/
+        cuando la ejecucion ya ha terminado."""
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    # ─── Cache de revalidacion ───
+    def _cache_paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def _load_cached(self, url):
+        if not self.cache_dir:
+            return None
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            meta["body"] = body_path.read_bytes()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached(self, url, headers, body):
+        if self.closed or not self.cache_dir or not (headers.get("etag") or headers.get("last-modified")):
+            return
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            body_path.write_bytes(body)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "headers": headers}, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+    def _touch_cached(self, url):
+        for path in self._cache_paths(url):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def prune_cache(self, max_age_days=30):
+        """Borra respuestas cacheadas que no se han usado en max_age_days."""
+        if not self.cache_dir or not self.cache_dir.exists():
+            return 0
+        limit = time.time() - max_age_days * 86400
+        removed = 0
+        for path in self.cache_dir.iterdir():
+            try:
+                if path.stat().st_mtime < limit:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    # ─── Peticiones ───
+    @staticmethod
+    def _decode(body, encoding):
+        encoding = encoding.lower()
+        if encoding in ("gzip", "x-gzip"):
+            return gzip.decompress(body)
+        if encoding == "deflate":
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+        return body
+
+    @staticmethod
+    def parse_host_map(spec):
+        """"host=http://127.0.0.1:8765,..." -> {host: (scheme, host, port)}"""
+        mapping = {}
+        for entry in filter(None, (e.strip() for e in spec.split(","))):
+            host, _, target = entry.partition("=")
+            parts = urllib.parse.urlsplit(target.strip())
+            if not host or parts.scheme not in ("http", "https") or not parts.hostname:
+                raise ValueError(f"entrada de host_map no valida: {entry!r}")
+            mapping[host.strip().lower()] = (parts.scheme, parts.hostname, parts.port)
+        return mapping
+
+    def _send(self, method, url, headers, data):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        if parts.hostname in self.host_map:
+            key = self.host_map[parts.hostname]
+            headers = dict(headers, Host=parts.netloc)
+
+        # Una conexion reutilizada puede haber sido cerrada por el servidor:
+        # en ese caso se reintenta una vez con una conexion nueva.
+        for attempt in range(2):
+            conn, reused = self._checkout(key)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            return resp.status, resp.reason, resp_headers, body
+
+    def _observe(self, url, t0, **kwargs):
+        if self.metrics:
+            self.metrics.http(urllib.parse.urlsplit(url).hostname, time.perf_counter() - t0, **kwargs)
+
+    def request(self, method, url, headers=None, data=None):
+        if self.closed:
+            raise ConnectionError(f"cliente HTTP cerrado: {url}")
+        cassette = self.cassette
+        if cassette and cassette.replaying:
+            t0 = time.perf_counter()
+            try:
+                response = cassette.replay(method, url, data)
+            except Exception as e:
+                self._observe(url, t0, status=getattr(e, "status", None), error=e, cache="cassette")
+                raise
+            self._observe(url, t0, status=response.status, size=len(response.body), cache="cassette")
+            return response
+        try:
+            response = self._request(method, url, headers, data)
+        except HttpError as e:
+            if cassette:
+                cassette.record(method, url, data, e.status, e.reason)
+            raise
+        if cassette:
+            cassette.record(method, url, data, response.status, "OK", response.headers, response.body)
+        return response
+
+    def _request(self, method, url, headers=None, data=None):
+        send_headers = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        send_headers.update(headers or {})
+
+        for _ in range(self.MAX_REDIRECTS + 1):
+            cached = self._load_cached(url) if method == "GET" else None
+            req_headers = dict(send_headers)
+            if cached:
+                if cached["headers"].get("etag"):
+                    req_headers["If-None-Match"] = cached["headers"]["etag"]
+                if cached["headers"].get("last-modified"):
+                    req_headers["If-Modified-Since"] = cached["headers"]["last-modified"]
+
+            t0 = time.perf_counter()
+            if self.rate_limiter:
+                self.rate_limiter.acquire(url)
+                if self.metrics:
+                    self.metrics.rate_wait(urllib.parse.urlsplit(url).hostname, time.perf_counter() - t0)
+                t0 = time.perf_counter()
+            try:
+                status, reason, resp_headers, body = self._send(method, url, req_headers, data)
+            except Exception as e:
+                self._observe(url, t0, error=e)
+                raise
+            cache = ("revalidated" if status == 304 and cached else "fetched") if self.cache_dir and method == "GET" else None
+            self._observe(url, t0, status=status, size=len(body), cache=cache)
+
+            if status == 304 and cached:
+                self._touch_cached(url)
+                return HttpResponse(url, 200, cached["headers"], cached["body"], from_cache=True)
+            if status in (301, 302, 303, 307, 308) and resp_headers.get("location"):
+                url = urllib.parse.urljoin(url, resp_headers["location"])
+                if status == 303:
+                    method, data = "GET", None
+                continue
+            if status >= 400:
+                raise HttpError(status, reason, url)
+
+            body = self._decode(body, resp_headers.pop("content-encoding", ""))
+            resp_headers.pop("content-length", None)
+            if method == "GET":
+                self._store_cached(url, resp_headers, body)
+            return HttpResponse(url, status, resp_headers, body)
+        raise HttpError(310, "Too many redirects", url)
+
+    def get(self, url, headers=None):
+        return self.request("GET", url, headers=headers)
+
+    def post(self, url, data=b"", headers=None):
+        return self.request("POST", url, headers=headers, data=data)
+
+
+RATE_LIMITER = HostRateLimiter(CONFIG["rate_limit_per_host"], CONFIG["rate_limit_burst"])
+HTTP = HttpClient(
+    timeout=CONFIG["http_timeout"],
+    cache_dir=Path(CONFIG["cache_dir"]) / "http",
+    rate_limiter=RATE_LIMITER,
+    host_map=HttpClient.parse_host_map(CONFIG["http_host_map"]),
+    metrics=METRICS,
+)
+
+
+# ──────────────────────────────────────────────
+# MATCHING DE KEYWORDS
+# ──────────────────────────────────────────────
+
+# Letras acentuadas habituales (castellano, euskera, catalan): se cambian con
+# str.replace, en C; lo que quede fuera de ASCII pasa por NFKD
+_FOLD_PAIRS = (("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u"), ("ü", "u"),
+               ("ñ", "n"), ("à", "a"), ("è", "e"), ("ò", "o"), ("ç", "c"))
+
+
+def fold_text(text):
+    """Minusculas y sin acentos ("Energía" -> "energia"). Aplicar una vez por registro.
+
+    Los simbolos no ASCII que no son letras acentuadas (€, –) se descartan:
+    las keywords son ASCII y asi todo el trabajo se hace en C.
+    """
+    text = str(text or "").lower()
+    if text.isascii():
+        return text
+    for accented, plain in _FOLD_PAIRS:
+        if accented in text:
+            text = text.replace(accented, plain)
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def contains_any(text, keywords):
+    """True si alguna keyword (ya en minusculas y sin acentos) esta en el texto."""
+    for kw in keywords:
+        if kw in text:
+            return True
+    return False
+
+
+def tiered_relevance(folded, tiers, default):
+    """Primer nivel con alguna keyword en el texto: tiers = [(keywords, nivel), ...]"""
+    for keywords, level in tiers:
+        if contains_any(folded, keywords):
+            return level
+    return default
+
+
+# ──────────────────────────────────────────────
+# REGISTRO DE CONVOCATORIA
+# ──────────────────────────────────────────────
+
+class CallStatus(str, Enum):
+    """Estado de la convocatoria; rank = orden en los informes."""
+
+    def __new__(cls, value, rank):
+        member = str.__new__(cls, value)
+        member._value_ = value
+        member.rank = rank
+        return member
+
+    OPEN = ("Open", 0)
+    FORTHCOMING = ("Forthcoming", 1)
+    CLOSED = ("Closed", 2)
+    UNKNOWN = ("Unknown", 2)
+
+    @classmethod
+    def parse(cls, value):
+        """(estado, texto original): un valor que no es de la enumeracion da
+        UNKNOWN y se devuelve tal cual para no perderlo ("" si se reconoce)."""
+        try:
+            return cls(value), ""
+        except ValueError:
+            return cls.UNKNOWN, str(value or "")
+
+
+class CallSource(str, Enum):
+    """Fuente de la convocatoria; rank = orden de los grupos en el Excel."""
+
+    def __new__(cls, value, rank):
+        member = str.__new__(cls, value)
+        member._value_ = value
+        member.rank = rank
+        return member
+
+    EU = ("EU", 0)
+    BDNS = ("BDNS", 1)
+    EUSKADI = ("KontratazioA", 2)
+
+
+class Relevance(str, Enum):
+    """Relevancia para Bilbao; rank = orden en los informes."""
+
+    def __new__(cls, value, rank):
+        member = str.__new__(cls, value)
+        member._value_ = value
+        member.rank = rank
+        return member
+
+    MUY_ALTA = ("MUY ALTA", 0)
+    ALTA = ("ALTA", 1)
+    MEDIA = ("MEDIA", 2)
+    BAJA = ("BAJA", 3)
+    INFO = ("INFO", 3)
+
+
+_DDMMYYYY_RE = re.compile(r'(\d{2})/(\d{2})/(\d{4})$')
+_BUDGET_RANGE_RE = re.compile(r'([\d,]+(?:\.\d+)?)(?: - ([\d,]+(?:\.\d+)?))?( EUR)?$')
+_NO_DEADLINE_KEY = date.max.toordinal()
+
+
+def _parse_ddmmyyyy(value):
+    match = _DDMMYYYY_RE.match(value or "")
+    if not match:
+        return None
+    d, m, y = match.groups()
+    try:
+        return date(int(y), int(m), int(d))
+    except ValueError:
+        return None
+
+
+def _euros_to_cents(value):
+    """1234.5 / "1,234.50" -> 123450"""
+    if isinstance(value, str):
+        value = value.replace(",", "")
+    return round(float(value) * 100)
+
+
+@dataclass(slots=True)
+class Call:
+    """Una convocatoria, de cualquier fuente.
+
+    deadline es un date (deadline_raw guarda el texto si la fuente trae una
+    fecha que no se pudo interpretar), status_raw el estado que no es de
+    CallStatus ("Cancelled") y el presupuesto va en centimos. Se
+    serializa con to_dict() al formato de resultados_convocatorias.json:
+    las de SEDIA llevan fetched_at y relevance_note y no llevan "source".
+    """
+    id: str
+    title: str
+    source: CallSource = CallSource.EU
+    status: CallStatus = CallStatus.UNKNOWN
+    programme: str = ""
+    deadline: date | None = None
+    description: str = ""
+    url: str = ""
+    action_type: str = ""
+    budget_min: int | None = None
+    budget_max: int | None = None
+    call_id: str = ""
+    tags: str = ""
+    relevance: Relevance = Relevance.INFO
+    relevance_note: str | None = None
+    fetched_at: str | None = None
+    deadline_raw: str = ""
+    status_raw: str = ""
+    deadline_key: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.deadline_key = self.deadline.toordinal() if self.deadline else _NO_DEADLINE_KEY
+
+    @property
+    def sort_key(self):
+        """Estado -> relevancia -> deadline (las que no tienen, al final) -> ID."""
+        return (self.status.rank, self.relevance.rank, self.deadline_key, self.id)
+
+    @property
+    def status_text(self):
+        """Estado tal y como se publica: el original si no es de CallStatus."""
+        if self.status is CallStatus.UNKNOWN and self.status_raw:
+            return self.status_raw
+        return self.status.value
+
+    @property
+    def deadline_text(self):
+        d = self.deadline
+        return f"{d.day:02d}/{d.month:02d}/{d.year}" if d else self.deadline_raw
+
+    @property
+    def budget_text(self):
+        if self.budget_max is None:
+            return ""
+        if self.source is CallSource.BDNS:
+            return f"{self.budget_max / 100:,.2f} EUR"
+        if self.budget_min == self.budget_max:
+            return f"{self.budget_max / 100:,.0f}"
+        return f"{self.budget_min / 100:,.0f} - {self.budget_max / 100:,.0f}"
+
+    def fingerprint(self):
+        return call_fingerprint(self.to_dict())
+
+    def to_dict(self):
+        if self.source is CallSource.EU:
+            return {
+                "id": self.id,
+                "title": self.title,
+                "status": self.status_text,
+                "programme": self.programme,
+                "deadline": self.deadline_text,
+                "description": self.description,
+                "url": self.url,
+                "action_type": self.action_type,
+                "budget": self.budget_text,
+                "call_id": self.call_id,
+                "tags": self.tags,
+                "fetched_at": self.fetched_at,
+                "relevance_level": self.relevance.value,
+                "relevance_note": self.relevance_note,
+            }
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "status": self.status_text,
+            "deadline": self.deadline_text,
+            "url": self.url,
+            "programme": self.programme,
+            "budget": self.budget_text,
+            "action_type": self.action_type,
+            "call_id": self.call_id,
+            "tags": self.tags,
+            "source": self.source.value,
+            "relevance_level": self.relevance.value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverso de to_dict() (resultados_convocatorias.json)."""
+        deadline_str = data.get("deadline") or ""
+        deadline = _parse_ddmmyyyy(deadline_str)
+        status, status_raw = CallStatus.parse(data.get("status") or CallStatus.UNKNOWN.value)
+        budget_min = budget_max = None
+        match = _BUDGET_RANGE_RE.match(data.get("budget") or "")
+        if match:
+            budget_min = _euros_to_cents(match.group(1))
+            budget_max = _euros_to_cents(match.group(2)) if match.group(2) else budget_min
+        return cls(
+            id=data["id"],
+            title=data.get("title", ""),
+            source=CallSource(data.get("source", "EU")),
+            status=status,
+            status_raw=status_raw,
+            programme=data.get("programme", ""),
+            deadline=deadline,
+            description=data.get("description", ""),
+            url=data.get("url", ""),
+            action_type=data.get("action_type", ""),
+            budget_min=budget_min,
+            budget_max=budget_max,
+            call_id=data.get("call_id", ""),
+            tags=data.get("tags", ""),
+            relevance=Relevance(data.get("relevance_level", "INFO")),
+            relevance_note=data.get("relevance_note"),
+            fetched_at=data.get("fetched_at"),
+            deadline_raw="" if deadline else deadline_str,
+        )
+
+
+# Campos que cuentan como cambio de contenido (fingerprint / changeset)
+SIGNIFICANT_FIELDS = ("title", "status", "programme", "deadline", "budget",
+                      "description", "url", "action_type", "call_id")
+FIELD_LABELS = {
+    "title": "Titulo", "status": "Estado", "programme": "Programa", "deadline": "Deadline",
+    "budget": "Presupuesto", "description": "Descripcion", "url": "Enlace",
+    "action_type": "Tipo de accion", "call_id": "Call ID",
+}
+
+
+def call_fingerprint(data):
+    """Huella de los campos significativos de un call serializado (to_dict)"""
+    raw = "\x1f".join(str(data.get(k) or "") for k in SIGNIFICANT_FIELDS)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def run_fingerprint(calls):
+    """Huella del conjunto fusionado de una ejecucion (id -> Call).
+
+    Cubre todo lo que se publica: contenido, fuente y relevancia. Si coincide
+    con la de la ejecucion anterior, los informes no tienen nada nuevo.
+    """
+    h = hashlib.sha1()
+    for call_id in sorted(calls):
+        call = calls[call_id]
+        h.update("\x1f".join((call_id, call.fingerprint(), call.source.value, call.relevance.value,
+                               call.relevance_note or "")).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+@dataclass(slots=True)
+class Changeset:
+    """Diferencias de esta ejecucion frente a la anterior.
+
+    added / modified: id -> Call; removed: id -> ultimo dict guardado;
+    diffs: id -> {campo: (antes, ahora)} de las modificadas.
+    """
+    added: dict = field(default_factory=dict)
+    modified: dict = field(default_factory=dict)
+    removed: dict = field(default_factory=dict)
+    diffs: dict = field(default_factory=dict)
+    skipped_sources: tuple = ()
+
+    def __bool__(self):
+        return bool(self.added or self.modified or self.removed)
+
+    def removed_calls(self):
+        """Retiradas como Call (desde el ultimo dict guardado), en orden de informe."""
+        calls = []
+        for data in self.removed.values():
+            try:
+                calls.append(Call.from_dict(data))
+            except (KeyError, ValueError, TypeError):
+                continue
+        return sorted(calls, key=lambda c: c.sort_key)
+
+    def describe(self, call_id, sep="; "):
+        """"Deadline: 01/03/2026 → 15/04/2026; Estado: Forthcoming → Open" """
+        return sep.join(f"{FIELD_LABELS.get(k, k)}: {old or '—'} → {new or '—'}"
+                        for k, (old, new) in self.diffs.get(call_id, {}).items())
+
+
 # ──────────────────────────────────────────────
 # API DE LA COMISIÓN EUROPEA (SEDIA)
 # ──────────────────────────────────────────────
 
 BASE_URL = "https://api.tech.ec.europa.eu/search-api/prod/rest/search"
 
-def search_eu_api(keyword, page_size=50):
+
+def search_eu_api(keyword, page_size=50, page_number=1):
     params = urllib.parse.urlencode({
         "apiKey": "SEDIA",
         "text": keyword,
         "pageSize": str(page_size),
-        "pageNumber": "1",
+        "pageNumber": str(page_number),
     })
     url = f"{BASE_URL}?{params}"
     try:
-        req = urllib.request.Request(
-            url,
-            data=b"",
-            headers={"User-Agent": "Mozilla/5.0 (EU-Funding-Radar-Bilbao/2.0)"},
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            return json.loads(response.read().decode("utf-8"))
+        response = HTTP.post(url, data=b"", headers={"User-Agent": "Mozilla/5.0 (EU-Funding-Radar-Bilbao/2.0)"})
+        return response.json()
     except Exception as e:
-        print(f"  ⚠️  Error: {e}")
+        print(f"  ⚠️  Error ({keyword}, pagina {page_number}): {e}")
         return None
 
 
+def iter_eu_pages(keyword, seen=None, today=None, page_size=None, max_pages=None, known=None, stats=None):
+    """Generador: recorre las paginas SEDIA de una keyword bajo demanda.
+
+    Devuelve (respuesta, calls) por pagina. Corta antes de llegar a
+    totalResults si una pagina no trae nada nuevo ni vigente: cada call
+    esta ya en `seen` o cerrado/caducado (los cerrados no se guardan nunca
+    como vistos, por eso no basta con mirar `seen`). `known` y `stats` se
+    pasan a parse_results; el corte se anota en stats["early_stop"].
+    """
+    seen = seen or {}
+    today = today or run_timestamp()
+    page_size = page_size or CONFIG["eu_page_size"]
+    max_pages = max_pages or CONFIG["eu_max_pages"]
+
+    for page in range(1, max_pages + 1):
+        response = search_eu_api(keyword, page_size=page_size, page_number=page)
+        if not response:
+            return
+        t0 = time.perf_counter()
+        calls = parse_results(response, known=known, stats=stats)
+        METRICS.add_stage("parse.eu", time.perf_counter() - t0)
+        yield response, calls
+
+        results = response.get("results", [])
+        if len(results) < page_size or page * page_size >= response.get("totalResults", 0):
+            return
+        # Corte temprano: nada nuevo ni vigente en esta pagina
+        if calls and all(c.id in seen or closed_reason(c, today) for c in calls):
+            if stats is not None:
+                stats["early_stop"] = stats.get("early_stop", 0) + 1
+            return
+
+
+_LEVEL_ORDER = {"MUY ALTA": 4, "ALTA": 3, "MEDIA": 2, "BAJA": 1, "INFO": 0}
+# (keyword en minusculas, orden del nivel, nivel, nota), en el orden de BILBAO_RELEVANCE
+_RELEVANCE_TABLE = tuple((fold_text(kw), _LEVEL_ORDER.get(level, 0), level, note)
+                         for kw, (level, note) in BILBAO_RELEVANCE.items())
+
+
 def get_relevance_for_call(call):
     """Determina la relevancia para Bilbao basándose en keywords."""
     best_level = "INFO"
     best_note = "Revisar relevancia para el Ayuntamiento de Bilbao."
-    level_order = {"MUY ALTA": 4, "ALTA": 3, "MEDIA": 2, "BAJA": 1, "INFO": 0}
+    best_order = 0
+    top = _LEVEL_ORDER["MUY ALTA"]
 
-    call_text = f"{call.get('id','')} {call.get('title','')} {call.get('description','')}".lower()
+    call_text = fold_text(f"{call.id} {call.title} {call.description}")
 
-    for keyword_fragment, (level, note) in BILBAO_RELEVANCE.items():
-        if keyword_fragment.lower() in call_text:
-            if level_order.get(level, 0) > level_order.get(best_level, 0):
-                best_level = level
-                best_note = note
+    # A igualdad de nivel gana la primera keyword de la tabla: con el nivel
+    # maximo ya no puede cambiar nada
+    for keyword_fragment, order, level, note in _RELEVANCE_TABLE:
+        if order > best_order and keyword_fragment in call_text:
+            best_order, best_level, best_note = order, level, note
+            if order == top:
+                break
     return best_level, best_note
 
 
-def parse_results(api_response):
+_TOPIC_RE = re.compile(r'((?:HORIZON|LIFE|CEF|DIGITAL|INTERREG|INNOVFUND)-[A-Z0-9\-]+)')
+
+
+def extract_topic_id(item):
+    """Fase barata del parseo: solo el topic ID de un resultado SEDIA ("" si no hay)."""
+    metadata = item.get("metadata", {})
+    url = item.get("url", "")
+    ref = item.get("reference", "")
+
+    # Preferir metadata.identifier
+    topic_id = ""
+    if metadata.get("identifier"):
+        topic_id = metadata["identifier"][0]
+    elif url:
+        parts = url.rstrip("/").split("/")
+        if parts:
+            topic_id = parts[-1]
+    if topic_id.endswith(".json"):
+        topic_id = topic_id[:-5]
+    if not topic_id:
+        match = _TOPIC_RE.search(ref)
+        if match:
+            topic_id = match.group(1)
+        else:
+            topic_id = ref[:60] if ref else ""
+    return topic_id
+
+
+# Patrones precompilados del extractor SEDIA
+_TAG_RE = re.compile(r'<[^>]+>')
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+# Prefijo del topic ID -> programa (se prueba en este orden)
+SEDIA_PROGRAMMES = [
+    ("HORIZON", "Horizon Europe"),
+    ("LIFE", "LIFE"),
+    ("CEF", "CEF"),
+    ("DIGITAL", "Digital Europe"),
+    ("INTERREG", "INTERREG"),
+    ("INNOVFUND", "Innovation Fund"),
+    ("URBACT", "URBACT"),
+]
+
+
+def strip_tags(value):
+    """Texto plano: quita etiquetas HTML y decodifica entidades (&amp; -> &)."""
+    text = str(value or "")
+    if "<" in text:
+        text = _TAG_RE.sub("", text)
+    if "&" in text:
+        text = html.unescape(text)
+    return text.strip()
+
+
+def _iso_date(value):
+    """"2023-04-27T00:00:00.000+0000" -> date(2023, 4, 27) (None si no es una fecha ISO)."""
+    match = _ISO_DATE_RE.match(value or "")
+    if not match:
+        return None
+    try:
+        return date(*map(int, match.groups()))
+    except ValueError:
+        return None
+
+
+def _first(metadata, key):
+    """Primer valor de un campo de metadata SEDIA (todos vienen como lista)."""
+    values = metadata.get(key)
+    if isinstance(values, list):
+        return values[0] if values else None
+    return values
+
+
+def _first_json(metadata, key):
+    raw = _first(metadata, key)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_sedia_record(item, topic_id=None, fetched_at=None):
+    """Fase completa del parseo: un resultado SEDIA -> Call (o None).
+
+    Cada campo de metadata se decodifica una sola vez (actions y
+    budgetOverview son JSON dentro de un string).
+    """
+    topic_id = topic_id or extract_topic_id(item)
+    if not topic_id:
+        return None
+    metadata = item.get("metadata") or {}
+    summary = item.get("summary", "")
+
+    # ─── TITULO ───
+    # Preferir metadata.title sobre el campo title raiz (que suele ser null)
+    clean_title = ""
+    for candidate in (_first(metadata, "title"), item.get("title"), summary):
+        if candidate:
+            clean_title = strip_tags(candidate)
+            if clean_title and clean_title != "None":
+                break
+    if not clean_title or clean_title == "None":
+        clean_title = topic_id
+
+    # ─── DESCRIPCION ───
+    clean_summary = strip_tags(summary)[:500]
+    clean_content = strip_tags(item.get("content", ""))[:300]
+    description = clean_summary or clean_content
+
+    # Intentar obtener descripcion mas rica de descriptionByte
+    desc_byte = _first(metadata, "descriptionByte")
+    if desc_byte:
+        raw_desc = strip_tags(desc_byte)
+        if len(raw_desc) > len(description):
+            description = raw_desc[:600]
+
+    # ─── ESTADO + DEADLINE (metadata.actions, decodificado una vez) ───
+    actions = _first_json(metadata, "actions")
+    first_action = actions[0] if isinstance(actions, list) and actions and isinstance(actions[0], dict) else {}
+
+    abbreviation = (first_action.get("status") or {}).get("abbreviation")
+    status, status_raw = CallStatus.parse(abbreviation or CallStatus.UNKNOWN.value)
+    # Fallback: buscar en texto (solo si SEDIA no trae estado; uno que no
+    # conocemos se publica tal cual)
+    if status is CallStatus.UNKNOWN and not status_raw:
+        text_lower = (clean_content + clean_summary + str(metadata.get("sortStatus", ""))).lower()
+        if "forthcoming" in text_lower or "upcoming" in text_lower:
+            status = CallStatus.FORTHCOMING
+        elif "open" in text_lower:
+            status = CallStatus.OPEN
+        elif "closed" in text_lower:
+            status = CallStatus.CLOSED
+
+    deadline, deadline_raw = None, ""
+    raw_date = _first(metadata, "deadlineDate")
+    if raw_date:
+        # Formato: "2023-04-27T00:00:00.000+0000"
+        deadline = _iso_date(raw_date)
+        if not deadline:
+            deadline_raw = raw_date[:10]
+    if not raw_date:
+        dd = first_action.get("deadlineDates") or []
+        if dd:
+            deadline = _iso_date(dd[0])
+
+    # ─── PROGRAMA ───
+    tid_upper = topic_id.upper()
+    programme = next((name for prefix, name in SEDIA_PROGRAMMES if prefix in tid_upper), "")
+
+    # ─── TIPO DE ACCION ───
+    action_type = str(_first(metadata, "typesOfAction") or "").replace("HORIZON ", "")
+
+    # ─── PRESUPUESTO ───
+    budget_min = budget_max = None
+    bo = _first_json(metadata, "budgetOverview")
+    if isinstance(bo, dict):
+        for actions_list in (bo.get("budgetTopicActionMap") or {}).values():
+            for a in actions_list or []:
+                min_c = a.get("minContribution") or 0
+                max_c = a.get("maxContribution") or 0
+                if isinstance(max_c, (int, float)) and isinstance(min_c, (int, float)) and max_c:
+                    # Importes enteros como en el informe ({:,.0f}), en centimos
+                    budget_min, budget_max = round(min_c) * 100, round(max_c) * 100
+                    break
+            if budget_max is not None:
+                break
+
+    # ─── CALL ID ───
+    call_id = str(_first(metadata, "callIdentifier") or "")
+
+    # ─── URL ───
+    # Preferir metadata.url sobre url raiz
+    final_url = _first(metadata, "url") or item.get("url", "") or ""
+    if "topic-details" not in final_url and "calls-for-proposals" not in final_url \
+            and "competitive-calls" not in final_url:
+        # Construir URL manualmente
+        final_url = f"https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/opportunities/topic-details/{topic_id}"
+    if final_url.endswith(".json"):
+        return None
+
+    # ─── TAGS ───
+    tags = metadata.get("tags") or []
+
+    return Call(
+        id=topic_id,
+        title=clean_title,
+        status=status,
+        status_raw=status_raw,
+        programme=programme,
+        deadline=deadline,
+        deadline_raw=deadline_raw,
+        description=description,
+        url=final_url,
+        action_type=action_type,
+        budget_min=budget_min,
+        budget_max=budget_max,
+        call_id=call_id,
+        tags=", ".join(tags),
+        fetched_at=fetched_at,
+    )
+
+
+def parse_results(api_response, known=None, stats=None):
+    """Parsea una respuesta SEDIA en dos fases.
+
+    Primero se extrae solo el topic ID; si ya esta en `known` (el mapa
+    id -> call de la ejecucion, compartido entre keywords) se reutiliza ese
+    registro y se salta el parseo completo. Los nuevos se anaden a `known`.
+    `stats` acumula items / parsed / skipped / errors.
+    """
     calls = []
     if not api_response or "results" not in api_response:
         return calls
+    if stats is None:
+        stats = {}
+    fetched_at = run_timestamp().isoformat()
 
     for item in api_response.get("results", []):
+        stats["items"] = stats.get("items", 0) + 1
+        if not isinstance(item, dict):
+            continue
+
+        # ─── FASE 1: TOPIC ID ───
+        topic_id = extract_topic_id(item)
+        if not topic_id:
+            continue
+        if known is not None and topic_id in known:
+            stats["skipped"] = stats.get("skipped", 0) + 1
+            calls.append(known[topic_id])
+            continue
+
+        # ─── FASE 2: EXTRACCION COMPLETA ───
         try:
-            ref = item.get("reference", "")
-            url = item.get("url", "")
-            content = item.get("content", "")
-            title = item.get("title", "")
-            summary = item.get("summary", "")
-            metadata = item.get("metadata", {})
-
-            # ─── TOPIC ID ───
-            # Preferir metadata.identifier
-            topic_id = ""
-            if metadata.get("identifier"):
-                topic_id = metadata["identifier"][0]
-            elif url:
-                parts = url.rstrip("/").split("/")
-                if parts:
-                    topic_id = parts[-1]
-            if topic_id.endswith(".json"):
-                topic_id = topic_id[:-5]
-            if not topic_id:
-                match = re.search(r'(HORIZON-[A-Z0-9\-]+|LIFE-[A-Z0-9\-]+|CEF-[A-Z0-9\-]+|DIGITAL-[A-Z0-9\-]+|INTERREG-[A-Z0-9\-]+|INNOVFUND-[A-Z0-9\-]+)', ref)
-                if match:
-                    topic_id = match.group(1)
-                else:
-                    topic_id = ref[:60] if ref else ""
-            if not topic_id:
-                continue
+            call_data = extract_sedia_record(item, topic_id, fetched_at)
+        except (AttributeError, TypeError, ValueError, KeyError, IndexError) as e:
+            # Resultado con forma inesperada: se descarta sin tumbar la pagina
+            stats["errors"] = stats.get("errors", 0) + 1
+            print(f"  ⚠️  Resultado SEDIA no valido ({topic_id}): {e}")
+            continue
+        if call_data is None:
+            continue
+        # La relevancia para Bilbao se anade en el pipeline (SediaSource.score)
 
-            # ─── TITULO ───
-            # Preferir metadata.title sobre el campo title raiz (que suele ser null)
-            clean_title = ""
-            if metadata.get("title"):
-                clean_title = re.sub(r'<[^>]+>', '', str(metadata["title"][0])).strip()
-            if not clean_title or clean_title == "None":
-                clean_title = re.sub(r'<[^>]+>', '', str(title or "")).strip()
-            if not clean_title or clean_title == "None":
-                clean_title = re.sub(r'<[^>]+>', '', str(summary or "")).strip()
-            if not clean_title or clean_title == "None":
-                clean_title = topic_id
-
-            # ─── DESCRIPCION ───
-            clean_summary = re.sub(r'<[^>]+>', '', str(summary or "")).strip()[:500]
-            clean_content = re.sub(r'<[^>]+>', '', str(content or "")).strip()[:300]
-            description = clean_summary or clean_content
-
-            # Intentar obtener descripcion mas rica de descriptionByte
-            if metadata.get("descriptionByte"):
-                raw_desc = re.sub(r'<[^>]+>', '', str(metadata["descriptionByte"][0])).strip()
-                if len(raw_desc) > len(description):
-                    description = raw_desc[:600]
-
-            # ─── ESTADO ───
-            status = "Unknown"
-            # Extraer de metadata.actions que tiene el status real
-            if metadata.get("actions"):
-                try:
-                    actions_data = json.loads(metadata["actions"][0])
-                    if isinstance(actions_data, list) and actions_data:
-                        action_status = actions_data[0].get("status", {}).get("abbreviation", "")
-                        if action_status:
-                            status = action_status  # "Closed", "Open", "Forthcoming"
-                except (json.JSONDecodeError, IndexError, KeyError):
-                    pass
-            # Fallback: buscar en texto
-            if status == "Unknown":
-                text_lower = (clean_content + clean_summary + str(metadata.get("sortStatus", ""))).lower()
-                if "forthcoming" in text_lower or "upcoming" in text_lower:
-                    status = "Forthcoming"
-                elif "open" in text_lower:
-                    status = "Open"
-                elif "closed" in text_lower:
-                    status = "Closed"
-
-            # ─── DEADLINE ───
-            deadline = ""
-            if metadata.get("deadlineDate"):
-                try:
-                    raw_date = metadata["deadlineDate"][0]
-                    # Formato: "2023-04-27T00:00:00.000+0000"
-                    date_part = raw_date[:10]  # "2023-04-27"
-                    dt = datetime.strptime(date_part, "%Y-%m-%d")
-                    deadline = dt.strftime("%d/%m/%Y")
-                except (ValueError, IndexError):
-                    deadline = raw_date[:10] if raw_date else ""
-            # Fallback: extraer del actions
-            if not deadline and metadata.get("actions"):
-                try:
-                    actions_data = json.loads(metadata["actions"][0])
-                    if isinstance(actions_data, list) and actions_data:
-                        dd = actions_data[0].get("deadlineDates", [])
-                        if dd:
-                            dt = datetime.strptime(dd[0], "%Y-%m-%d")
-                            deadline = dt.strftime("%d/%m/%Y")
-                except:
-                    pass
-
-            # ─── PROGRAMA ───
-            programme = ""
-            tid_upper = topic_id.upper()
-            if "HORIZON" in tid_upper:
-                programme = "Horizon Europe"
-            elif "LIFE" in tid_upper:
-                programme = "LIFE"
-            elif "CEF" in tid_upper:
-                programme = "CEF"
-            elif "DIGITAL" in tid_upper:
-                programme = "Digital Europe"
-            elif "INTERREG" in tid_upper:
-                programme = "INTERREG"
-            elif "INNOVFUND" in tid_upper:
-                programme = "Innovation Fund"
-            elif "URBACT" in tid_upper:
-                programme = "URBACT"
-
-            # ─── TIPO DE ACCION ───
-            action_type = ""
-            if metadata.get("typesOfAction"):
-                action_type = metadata["typesOfAction"][0].replace("HORIZON ", "")
-
-            # ─── PRESUPUESTO ───
-            budget = ""
-            if metadata.get("budgetOverview"):
-                try:
-                    bo = json.loads(metadata["budgetOverview"][0])
-                    for topic_key, actions in bo.get("budgetTopicActionMap", {}).items():
-                        for a in actions:
-                            min_c = a.get("minContribution", 0)
-                            max_c = a.get("maxContribution", 0)
-                            if max_c:
-                                if min_c == max_c:
-                                    budget = f"{max_c:,.0f}"
-                                else:
-                                    budget = f"{min_c:,.0f} - {max_c:,.0f}"
-                                break
-                        if budget:
-                            break
-                except:
-                    pass
-
-            # ─── CALL ID ───
-            call_id = ""
-            if metadata.get("callIdentifier"):
-                call_id = metadata["callIdentifier"][0]
-
-            # ─── URL ───
-            # Preferir metadata.url sobre url raiz
-            final_url = ""
-            if metadata.get("url"):
-                final_url = metadata["url"][0]
-            elif url:
-                final_url = url
-            if not final_url or "topic-details" not in final_url:
-                if "calls-for-proposals" not in final_url and "competitive-calls" not in final_url:
-                    # Construir URL manualmente
-                    if topic_id:
-                        final_url = f"https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/opportunities/topic-details/{topic_id}"
-                    else:
-                        continue
-            if final_url.endswith(".json"):
+        stats["parsed"] = stats.get("parsed", 0) + 1
+        if known is not None:
+            # Si otro worker se adelanto con el mismo topic, quedarse con el suyo
+            call_data = known.setdefault(topic_id, call_data)
+        calls.append(call_data)
+    return calls
+
+
+# ──────────────────────────────────────────────
+# PIPELINE DE FUENTES
+# ──────────────────────────────────────────────
+
+class Source:
+    """Fuente de convocatorias enchufable en run_pipeline().
+
+    items() produce los elementos en bruto de forma perezosa; el pipeline los
+    pasa por parse -> dedup -> check (plazo/estado) -> score -> sinks, uno a
+    uno, asi las etapas posteriores empiezan antes de que acabe la descarga.
+    """
+    name = ""
+
+    def items(self):
+        raise NotImplementedError
+
+    def parse(self, item):
+        """Elemento en bruto -> call (dict) o None si se descarta."""
+        return item
+
+    def check(self, call, today):
+        """Motivo de descarte por plazo/estado ("closed", "old"...) o None."""
+        return None
+
+    def score(self, call):
+        """Anade la relevancia al call (las fuentes que la calculan con
+        campos del detalle en bruto lo hacen ya en parse)."""
+
+    def close(self, summary):
+        """Fin del recorrido: guardar estado propio y escribir el resumen."""
+
+
+class DictSink:
+    """Sink que acumula los calls en un dict id -> call, en orden de llegada."""
+
+    def __init__(self):
+        self.calls = {}
+
+    def __call__(self, call):
+        self.calls[call.id] = call
+
+
+def run_pipeline(source, sinks=(), today=None):
+    """Recorre una fuente con generadores encadenados y entrega cada call a
+    los sinks. Devuelve el resumen de contadores (tambien se pasa a close)."""
+    today = today or run_timestamp()
+    summary = {"items": 0, "parsed": 0, "errors": 0, "duplicates": 0, "unique": 0, "emitted": 0}
+    # Segundos en parse / check / score (sin la descarga de items())
+    spent = {"parse": 0.0, "filtro": 0.0, "relevancia": 0.0}
+    clock = time.perf_counter
+
+    def parsed(items):
+        for item in items:
+            summary["items"] += 1
+            t0 = clock()
+            try:
+                call = source.parse(item)
+            except (AttributeError, TypeError, ValueError, KeyError, IndexError) as e:
+                # Elemento con forma inesperada: se descarta sin tumbar la fuente
+                summary["errors"] += 1
+                print(f"  ⚠️  Elemento {source.name} no valido: {str(e)[:60]}")
+                continue
+            finally:
+                spent["parse"] += clock() - t0
+            if call:
+                summary["parsed"] += 1
+                yield call
+
+    def unique(calls):
+        ids = set()
+        for call in calls:
+            if call.id in ids:
+                summary["duplicates"] += 1
+                continue
+            ids.add(call.id)
+            summary["unique"] += 1
+            yield call
+
+    def current(calls):
+        for call in calls:
+            t0 = clock()
+            reason = source.check(call, today)
+            spent["filtro"] += clock() - t0
+            if reason:
+                summary[reason] = summary.get(reason, 0) + 1
                 continue
+            yield call
 
-            # ─── TAGS ───
-            tags = metadata.get("tags", [])
-
-            call_data = {
-                "id": topic_id,
-                "title": clean_title,
-                "status": status,
-                "programme": programme,
-                "deadline": deadline,
-                "description": description,
-                "url": final_url,
-                "action_type": action_type,
-                "budget": budget,
-                "call_id": call_id,
-                "tags": ", ".join(tags) if tags else "",
-                "fetched_at": datetime.now(timezone.utc).isoformat(),
-            }
+    def scored(calls):
+        for call in calls:
+            t0 = clock()
+            source.score(call)
+            spent["relevancia"] += clock() - t0
+            yield call
 
-            # Anadir relevancia para Bilbao
-            rel_level, rel_note = get_relevance_for_call(call_data)
-            call_data["relevance_level"] = rel_level
-            call_data["relevance_note"] = rel_note
+    for call in scored(current(unique(parsed(source.items())))):
+        summary["emitted"] += 1
+        for sink in sinks:
+            sink(call)
+    for stage, seconds in spent.items():
+        METRICS.add_stage(f"{stage}.{source.name}", seconds)
+    source.close(summary)
+    return summary
 
-            calls.append(call_data)
-        except Exception:
-            continue
-    return calls
+
+def collect(source):
+    """Ejecuta una fuente y devuelve sus calls como dict id -> call."""
+    sink = DictSink()
+    run_pipeline(source, [sink])
+    return sink.calls
 
 
 # ──────────────────────────────────────────────
 # LÓGICA PRINCIPAL
 # ──────────────────────────────────────────────
 
+def run_timestamp():
+    """Hora de la ejecucion (UTC): la que se escribe en los informes y el
+    "hoy" de los filtros de plazo.
+
+    SOURCE_DATE_EPOCH la fija, para regenerar artefactos identicos; --offline
+    la pone a la hora de la grabacion si no viene dada.
+    """
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), timezone.utc)
+    return datetime.now(timezone.utc)
+
+
+# Formato de seen_calls.json. 1: dict plano {id: fecha}, con los IDs del
+# buscador de euskadi.eus sacados de hash(url); 2: {"schema": 2, "seen": {...}}
+# con IDs estables (stable_id). Solo se migran los ficheros de version 1.
+SEEN_SCHEMA = 2
+
+
 def load_seen():
+    """(seen, version) de seen_calls.json; ({}, SEEN_SCHEMA) si no hay."""
     path = Path(CONFIG["seen_file"])
     if path.exists():
         try:
             with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}, SEEN_SCHEMA
+        if isinstance(data, dict) and isinstance(data.get("seen"), dict):
+            return data["seen"], int(data.get("schema", SEEN_SCHEMA))
+        return (data if isinstance(data, dict) else {}), 1
+    return {}, SEEN_SCHEMA
 
 
-def save_seen(seen):
-    with open(CONFIG["seen_file"], "w", encoding="utf-8") as f:
-        json.dump(seen, f, ensure_ascii=False, indent=2)
+def canonical_url(url):
+    """Normaliza una URL para usarla como clave: esquema/host en minusculas,
+    sin fragmento, sin barra final y con los parametros ordenados."""
+    parts = urllib.parse.urlsplit(url.strip())
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
 
 
-def fetch_all_calls():
-    all_calls = {}
-    total = len(CONFIG["keywords"])
-    today = datetime.now(timezone.utc)
+def stable_id(prefix, key):
+    """ID determinista entre procesos: prefijo + 12 hex del SHA-1 de la clave.
 
-    print(f"\n🇪🇺 EU FUNDING RADAR — Bilbao Misión Climática")
-    print(f"{'='*50}")
-    print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-    print(f"🔍 Buscando en {total} categorías...\n")
+    A diferencia de hash(), no depende de PYTHONHASHSEED y 48 bits hacen
+    improbable una colision con los volumenes que manejamos.
+    """
+    return f"{prefix}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
 
-    for i, keyword in enumerate(CONFIG["keywords"], 1):
-        print(f"  [{i}/{total}] {keyword}...", end=" ", flush=True)
-        response = search_eu_api(keyword)
-        if response:
-            total_hits = response.get("totalResults", 0)
-            calls = parse_results(response)
-            new = 0
-            for call in calls:
-                if call["id"] not in all_calls:
-                    all_calls[call["id"]] = call
-                    new += 1
-            print(f"✓ {total_hits} hits, {new} convocatorias nuevas")
-        else:
-            print("✗ error")
 
-    print(f"\n📊 Total convocatorias encontradas: {len(all_calls)}")
+# Resultado del buscador de euskadi.eus: en la version 1 su ID era
+# EUS-NNNNN = hash(url) % 100000. Los de la API (EUS-<id del item>) tambien
+# pueden tener 5 cifras, por eso se mira de donde sale la URL y no solo el ID.
+# Los items del API sin id usaban hash(titulo) % 100000, que no se distingue
+# de un id real: esos se conservan tal cual
+_LEGACY_EUS_ID = re.compile(r'^EUS-\d{5}$')
+_EUSKADI_SEARCH_URL = re.compile(r'^https://www\.euskadi\.eus/(?:ayuda_subvencion|anuncio_contratacion)/')
+
+
+def load_previous_results():
+    """Convocatorias del ultimo resultados_convocatorias.json (lista vacia si no hay)"""
+    path = Path(CONFIG["output_file"])
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except (OSError, ValueError):
+            pass
+    return []
+
+
+def migrate_seen_ids(seen, previous_calls, version=1):
+    """Migra las claves de un seen_calls.json de version 1 (las de version
+    SEEN_SCHEMA se devuelven tal cual).
+
+    - Los IDs del buscador de euskadi.eus salian de hash(url) % 100000,
+      distinto en cada proceso: se traducen al ID estable con la URL que
+      tienen en el ultimo resultado, si es una URL del buscador. Los que no
+      aparecen ahi se conservan (no se puede saber de donde salieron).
+    - Las claves duplicadas con sufijo ".json" se funden con la clave limpia.
+
+    Devuelve (seen_migrado, {id_antiguo: id_nuevo}).
+    """
+    if version >= SEEN_SCHEMA:
+        return dict(seen), {}
+    url_by_id = {c.get("id"): c.get("url", "") for c in previous_calls if isinstance(c, dict)}
+    migrated = {}
+    renamed = {}
+    for key, ts in seen.items():
+        new_key = key
+        url = url_by_id.get(key, "")
+        if _LEGACY_EUS_ID.match(key) and _EUSKADI_SEARCH_URL.match(url):
+            new_key = stable_id("EUS", canonical_url(url))
+        elif key.endswith(".json"):
+            new_key = key[:-5]
+        if new_key != key:
+            renamed[key] = new_key
+        # Si dos claves acaban en la misma, conservar la marca mas reciente
+        migrated[new_key] = max(ts, migrated.get(new_key, ts))
+    return migrated, renamed
+
 
-    # ─── FILTRADO ESTRICTO POR FECHAS ───
-    filtered = {}
-    skipped_closed = 0
-    skipped_old = 0
+# ──────────────────────────────────────────────
+# ALMACEN SQLITE
+# ──────────────────────────────────────────────
 
-    for k, v in all_calls.items():
-        status = v.get("status", "Unknown")
-        deadline_str = v.get("deadline", "")
+RADAR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    id TEXT PRIMARY KEY,
+    source TEXT,
+    status TEXT,
+    relevance TEXT,
+    deadline TEXT,
+    data TEXT,
+    fingerprint TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS calls_deadline ON calls(deadline);
+CREATE INDEX IF NOT EXISTS calls_status ON calls(status);
+CREATE INDEX IF NOT EXISTS calls_source ON calls(source);
+CREATE INDEX IF NOT EXISTS calls_relevance ON calls(relevance);
+CREATE TABLE IF NOT EXISTS call_history (
+    call_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    old_value TEXT,
+    new_value TEXT,
+    changed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS call_history_call ON call_history(call_id);
+CREATE TABLE IF NOT EXISTS provenance (
+    call_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    url TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (call_id, source)
+);
+"""
 
-        # 1. Saltar las explicitamente cerradas
-        if status == "Closed":
-            skipped_closed += 1
-            continue
+# Tablas del volcado de texto, con el orden estable de sus filas
+RADAR_TABLES = (
+    ("meta", "key"),
+    ("calls", "id"),
+    ("call_history", "call_id, changed_at, rowid"),
+    ("provenance", "call_id, source"),
+)
+
+
+class RadarStore:
+    """Estado del radar en SQLite (WAL): convocatorias, primera/ultima vez
+    vistas, historico de cambios por campo y procedencia.
+
+    calls.data guarda el JSON de Call.to_dict(); las filas importadas de
+    seen_calls.json sin datos tienen data NULL y solo cuentan como vistas.
+    active = 1 marca las que salieron en la ultima ejecucion.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(RADAR_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(calls)")}
+        if "fingerprint" not in columns:  # bases creadas antes de la huella
+            self.conn.execute("ALTER TABLE calls ADD COLUMN fingerprint TEXT")
+
+    def close(self):
+        # Volcar el WAL al fichero principal: radar.db queda en un solo fichero
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.close()
+
+    def export_text(self, path):
+        """Vuelca la base a texto: una linea JSON [tabla, fila] por fila, en
+        orden de clave, con calls.data como objeto. Es lo que se commitea
+        (radar.db no): el diff de cada ejecucion son solo las filas que
+        cambian. Devuelve True si el fichero ha cambiado."""
+        lines = []
+        for table, order in RADAR_TABLES:
+            cursor = self.conn.execute(f"SELECT * FROM {table} ORDER BY {order}")
+            columns = [d[0] for d in cursor.description]
+            for values in cursor:
+                row = dict(zip(columns, values))
+                if table == "calls" and row["data"]:
+                    row["data"] = json.loads(row["data"])
+                lines.append(json.dumps([table, row], ensure_ascii=False, separators=(",", ":")))
+        text = "\n".join(lines) + "\n"
+        path = Path(path)
+        if path.exists() and path.read_text(encoding="utf-8") == text:
+            return False
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        return True
 
-        # 2. Si tiene deadline, comprobar si ya ha pasado
-        if deadline_str:
-            try:
-                deadline_date = datetime.strptime(deadline_str, "%d/%m/%Y").replace(tzinfo=timezone.utc)
-                if deadline_date < today:
-                    # Deadline ya pasado -> cerrada aunque la API diga otra cosa
-                    skipped_old += 1
+    def import_text(self, path):
+        """Inverso de export_text() sobre una base vacia. Devuelve las filas cargadas."""
+        rows = 0
+        with self.conn, open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
                     continue
-            except ValueError:
-                pass  # No se pudo parsear, mantener
-
-        # 3. Si no tiene deadline, comprobar el año del topic ID
-        # Convocatorias de 2023 o 2024 sin deadline probablemente ya estan cerradas
-        if not deadline_str:
-            topic_id = v.get("id", "")
-            if re.search(r'202[0-4]', topic_id):
-                skipped_old += 1
-                continue
-
-        # 4. Corregir status basado en deadline
-        if deadline_str and status != "Forthcoming":
-            try:
-                deadline_date = datetime.strptime(deadline_str, "%d/%m/%Y").replace(tzinfo=timezone.utc)
-                if deadline_date > today:
-                    v["status"] = "Open"
-            except ValueError:
-                pass
+                table, row = json.loads(line)
+                if table == "calls" and row.get("data") is not None:
+                    row["data"] = json.dumps(row["data"], ensure_ascii=False)
+                columns = ", ".join(row)
+                marks = ", ".join("?" * len(row))
+                self.conn.execute(f"INSERT INTO {table} ({columns}) VALUES ({marks})", list(row.values()))
+                rows += 1
+        return rows
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_json(self, seen, previous_calls):
+        """Carga inicial desde seen_calls.json + resultados_convocatorias.json.
+
+        `seen` debe venir ya migrado (migrate_seen_ids). Devuelve el numero de
+        IDs importados; no hace nada si la base ya se importo antes.
+        """
+        if self.get_meta("imported_at"):
+            return 0
+        now = datetime.now(timezone.utc).isoformat()
+        by_id = {}
+        for data in previous_calls:
+            if isinstance(data, dict) and data.get("id"):
+                try:
+                    by_id[data["id"]] = Call.from_dict(data)
+                except (KeyError, ValueError):
+                    continue
+        with self.conn:
+            for call_id in set(seen) | set(by_id):
+                call = by_id.get(call_id)
+                ts = seen.get(call_id) or (call.fetched_at if call else None) or now
+                if call:
+                    self._insert(call, ts, active=1)
+                else:
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO calls (id, first_seen, last_seen) VALUES (?, ?, ?)",
+                        (call_id, ts, ts))
+            self.set_meta("imported_at", now)
+        return len(set(seen) | set(by_id))
+
+    def seen(self):
+        """IDs ya vistos -> ultima vez (lo que antes era seen_calls.json)"""
+        return dict(self.conn.execute("SELECT id, last_seen FROM calls"))
+
+    def active_calls(self):
+        """Convocatorias de la ultima ejecucion, id -> Call"""
+        rows = self.conn.execute("SELECT data FROM calls WHERE active = 1 AND data IS NOT NULL ORDER BY rowid")
+        calls = {}
+        for (data,) in rows:
+            call = Call.from_dict(json.loads(data))
+            calls[call.id] = call
+        return calls
 
-        filtered[k] = v
+    def _insert(self, call, ts, active=1):
+        data = call.to_dict()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO calls (id, source, status, relevance, deadline, data, fingerprint,"
+            " first_seen, last_seen, active) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (call.id, call.source.value, call.status_text, call.relevance.value,
+             call.deadline.isoformat() if call.deadline else None,
+             json.dumps(data, ensure_ascii=False), call_fingerprint(data), ts, ts, active))
+        self.conn.execute(
+            "INSERT OR IGNORE INTO provenance (call_id, source, url, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)",
+            (call.id, call.source.value, call.url, ts, ts))
+
+    def _stored(self, ids):
+        """id -> (fingerprint, data) de las filas guardadas para esos IDs"""
+        stored = {}
+        for chunk in range(0, len(ids), 500):
+            part = ids[chunk:chunk + 500]
+            marks = ",".join("?" * len(part))
+            for call_id, fp, data in self.conn.execute(
+                    f"SELECT id, fingerprint, data FROM calls WHERE id IN ({marks})", part):
+                stored[call_id] = (fp, data)
+        return stored
+
+    def changeset(self, calls, skip_sources=()):
+        """Compara las convocatorias de esta ejecucion con las guardadas.
+
+        Solo se comparan huellas; el diff por campo se calcula para las que
+        no coinciden. Las que no cambian recuperan el fetched_at guardado, asi
+        los artefactos no varian entre ejecuciones. Las fuentes de
+        skip_sources (las que han fallado) no generan retiradas.
+        """
+        changes = Changeset(skipped_sources=tuple(skip_sources))
+        stored = self._stored(list(calls))
+        for call_id, call in calls.items():
+            if call_id not in stored:
+                changes.added[call_id] = call
+                continue
+            old_fp, old_data = stored[call_id]
+            if old_data is None:
+                continue  # visto antes de que hubiera base: sin datos que comparar
+            new = call.to_dict()
+            old = json.loads(old_data)
+            if (old_fp or call_fingerprint(old)) == call_fingerprint(new):
+                if call.fetched_at and old.get("fetched_at"):
+                    call.fetched_at = old["fetched_at"]
+                continue
+            diff = {k: (old.get(k), new.get(k)) for k in SIGNIFICANT_FIELDS if old.get(k) != new.get(k)}
+            if diff:
+                changes.modified[call_id] = call
+                changes.diffs[call_id] = diff
+
+        for call_id, source, data in self.conn.execute("SELECT id, source, data FROM calls WHERE active = 1"):
+            if call_id not in calls and source not in changes.skipped_sources and data:
+                changes.removed[call_id] = json.loads(data)
+        return changes
+
+    def save_run(self, calls, changes, run_at):
+        """Guarda la ejecucion en una transaccion, con cambios incrementales.
+
+        Nuevas: insert. Modificadas: fila completa + una entrada de
+        call_history por campo. Sin cambios: solo last_seen / active (los
+        datos guardados, fetched_at incluido, se conservan). Las que no han
+        salido quedan con active = 0, salvo las de fuentes que han fallado.
+        Devuelve el numero de filas tocadas.
+        """
+        calls = list(calls)
+        with self.conn:
+            skip = changes.skipped_sources
+            marks = ",".join("?" * len(skip))
+            self.conn.execute(
+                "UPDATE calls SET active = 0 WHERE active = 1" + (f" AND source NOT IN ({marks})" if skip else ""),
+                skip)
+            for call in calls:
+                if call.id in changes.added:
+                    self._insert(call, run_at)
+                    continue
+                if call.id in changes.modified:
+                    self.conn.executemany(
+                        "INSERT INTO call_history (call_id, field, old_value, new_value, changed_at) VALUES (?, ?, ?, ?, ?)",
+                        [(call.id, k, old, new, run_at) for k, (old, new) in changes.diffs[call.id].items()])
+                    data = call.to_dict()
+                    self.conn.execute(
+                        "UPDATE calls SET source = ?, status = ?, relevance = ?, deadline = ?, data = ?, fingerprint = ?,"
+                        " last_seen = ?, active = 1 WHERE id = ?",
+                        (call.source.value, call.status_text, call.relevance.value,
+                         call.deadline.isoformat() if call.deadline else None,
+                         json.dumps(data, ensure_ascii=False), call_fingerprint(data), run_at, call.id))
+                else:
+                    # Sin cambios (o visto sin datos: se rellenan ahora)
+                    data = call.to_dict()
+                    self.conn.execute(
+                        "UPDATE calls SET source = ?, status = ?, relevance = ?, deadline = ?,"
+                        " data = COALESCE(data, ?), fingerprint = COALESCE(fingerprint, ?), last_seen = ?, active = 1"
+                        " WHERE id = ?",
+                        (call.source.value, call.status_text, call.relevance.value,
+                         call.deadline.isoformat() if call.deadline else None,
+                         json.dumps(data, ensure_ascii=False), call_fingerprint(data), run_at, call.id))
+                self.conn.execute(
+                    "INSERT INTO provenance (call_id, source, url, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (call_id, source) DO UPDATE SET url = excluded.url, last_seen = excluded.last_seen",
+                    (call.id, call.source.value, call.url, run_at, run_at))
+            self.set_meta("last_run", run_at)
+        return len(calls)
+
+    def evict(self, ttl_days, today=None):
+        """Borra las convocatorias vencidas (o sin deadline y sin verse) hace mas de ttl_days"""
+        today = today or run_timestamp()
+        cutoff = today - timedelta(days=ttl_days)
+        with self.conn:
+            doomed = [row[0] for row in self.conn.execute(
+                "SELECT id FROM calls WHERE active = 0 AND ("
+                " (deadline IS NOT NULL AND deadline < ?) OR (deadline IS NULL AND last_seen < ?))",
+                (cutoff.date().isoformat(), cutoff.isoformat()))]
+            for chunk in range(0, len(doomed), 500):
+                part = doomed[chunk:chunk + 500]
+                marks = ",".join("?" * len(part))
+                for table, column in (("calls", "id"), ("call_history", "call_id"), ("provenance", "call_id")):
+                    self.conn.execute(f"DELETE FROM {table} WHERE {column} IN ({marks})", part)
+        return len(doomed)
+
+
+def open_store():
+    """Abre radar.db. Si no existe se reconstruye desde el volcado de texto y,
+    si tampoco hay volcado, se importan los JSON de estado anteriores."""
+    created = not Path(CONFIG["db_file"]).exists()
+    store = RadarStore(CONFIG["db_file"])
+    export = Path(CONFIG["db_export"])
+    if created and export.exists():
+        rows = store.import_text(export)
+        print(f"🗄️  {CONFIG['db_file']} reconstruido desde {export}: {rows} filas")
+    if not store.get_meta("imported_at"):
+        previous = load_previous_results()
+        seen, version = load_seen()
+        seen, renamed = migrate_seen_ids(seen, previous, version)
+        if renamed:
+            print(f"🔧 {CONFIG['seen_file']} (version {version}) migrado: {len(renamed)} IDs reescritos")
+            # El ultimo resultado lleva los mismos IDs antiguos
+            previous = [dict(c, id=renamed.get(c.get("id"), c.get("id"))) if isinstance(c, dict) else c
+                        for c in previous]
+        imported = store.import_json(seen, previous)
+        print(f"🗄️  {CONFIG['db_file']} creado: {imported} IDs importados de {CONFIG['seen_file']} / {CONFIG['output_file']}")
+    return store
+
+
+_OLD_TOPIC_RE = re.compile(r'202[0-4]')
+
+
+def closed_reason(call, today):
+    """Devuelve "closed"/"old" si la convocatoria ya no esta vigente, o None."""
+    # 1. Explicitamente cerrada
+    if call.status is CallStatus.CLOSED:
+        return "closed"
+
+    # 2. Si tiene deadline, comprobar si ya ha pasado (a las 00:00 UTC del
+    # dia del deadline ya cuenta como pasado)
+    if call.deadline and call.deadline <= today.date():
+        # Deadline ya pasado -> cerrada aunque la API diga otra cosa
+        return "old"
+
+    # 3. Si no tiene deadline, comprobar el año del topic ID
+    # Convocatorias de 2023 o 2024 sin deadline probablemente ya estan cerradas
+    if not call.deadline and not call.deadline_raw and _OLD_TOPIC_RE.search(call.id):
+        return "old"
+    return None
+
+
+class SediaSource(Source):
+    """Portal SEDIA de la Comision Europea: una busqueda paginada por keyword.
+
+    Las keywords se consultan en paralelo, pero los resultados salen en el
+    orden de CONFIG["keywords"], asi la deduplicacion es estable. SEDIA se
+    parsea ya al paginar (el corte temprano necesita estado y plazo), por
+    lo que sus elementos llegan al pipeline como calls.
+
+    Una keyword cortada antes de su ultima pagina no ve las convocatorias
+    de las paginas que no lee. Como BdnsSource con sus candidatas, las
+    vigentes de la ultima ejecucion (`previous`, id -> Call) que no salen en
+    esta se vuelven a entregar, y el pipeline las filtra por plazo; si
+    ninguna keyword se corta, las que faltan son retiradas de verdad.
+    """
+    name = "eu"
+
+    def __init__(self, seen=None, today=None, keywords=None, previous=None):
+        self.seen = seen or {}
+        self.today = today or run_timestamp()
+        self.keywords = keywords or CONFIG["keywords"]
+        self.previous = previous or {}
+        self.stopped = []  # keywords cortadas antes de su ultima pagina
+        self.carried = 0
+        # Mapa id -> call compartido por los workers: cada topic se parsea
+        # entero una sola vez aunque salga en muchas keywords.
+        self.known = {}
+        self.parse_stats = {"items": 0, "parsed": 0, "skipped": 0}
+        self.t0 = time.monotonic()
+
+    def items(self):
+        total = len(self.keywords)
+        print(f"\n🇪🇺 EU FUNDING RADAR — Bilbao Misión Climática")
+        print(f"{'='*50}")
+        print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+        workers = max(1, min(CONFIG["concurrency"], total))
+        print(f"🔍 Buscando en {total} categorías ({workers} en paralelo)...\n")
+
+        def fetch_keyword(keyword):
+            stats = {}
+            pages = list(iter_eu_pages(keyword, seen=self.seen, today=self.today, known=self.known, stats=stats))
+            return pages, stats
+
+        listed = set()
+        self.t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sedia") as pool:
+            results = pool.map(fetch_keyword, self.keywords)
+            for i, (keyword, (pages, stats)) in enumerate(zip(self.keywords, results), 1):
+                for k, v in stats.items():
+                    self.parse_stats[k] = self.parse_stats.get(k, 0) + v
+                if not pages:
+                    print(f"  [{i}/{total}] {keyword}... ✗ error")
+                    continue
+                if stats.get("early_stop"):
+                    self.stopped.append(keyword)
+                total_hits = pages[0][0].get("totalResults", 0)
+                calls = [call for _, page_calls in pages for call in page_calls]
+                new = len({c.id for c in calls} - listed)
+                listed.update(c.id for c in calls)
+                cut = " (corte temprano)" if stats.get("early_stop") else ""
+                print(f"  [{i}/{total}] {keyword}... ✓ {total_hits} hits, {len(pages)} pag.{cut}, {new} convocatorias nuevas")
+                yield from calls
+
+        # Paginas sin leer: se arrastran las de la ultima ejecucion
+        if self.stopped:
+            for call_id, call in self.previous.items():
+                if call_id not in listed:
+                    self.carried += 1
+                    yield call
+
+    def check(self, call, today):
+        # Cerradas, deadline pasado o topic antiguo sin deadline
+        reason = closed_reason(call, today)
+        if reason:
+            return reason
+
+        # Corregir status basado en deadline
+        if call.deadline and call.status is not CallStatus.FORTHCOMING and call.deadline > today.date():
+            call.status = CallStatus.OPEN
+        return None
 
-    print(f"📊 Descartadas cerradas: {skipped_closed}")
-    print(f"📊 Descartadas con deadline pasado: {skipped_old}")
-    print(f"📊 Convocatorias vigentes: {len(filtered)}")
-    return filtered
+    def score(self, call):
+        # Relevancia para Bilbao
+        level, call.relevance_note = get_relevance_for_call(call)
+        call.relevance = Relevance(level)
+
+    def close(self, summary):
+        ps = self.parse_stats
+        print(f"\n⏱️  Busqueda SEDIA: {time.monotonic() - self.t0:.1f}s")
+        print(f"♻️  Parseo: {ps['items']} resultados, {ps['parsed']} parseados, "
+              f"{ps['skipped']} duplicados sin re-parsear")
+        METRICS.count("sedia_results", ps["items"])
+        METRICS.count("sedia_results_reused", ps["skipped"])
+        if self.stopped:
+            print(f"✂️  Corte temprano en {len(self.stopped)} keywords: "
+                  f"{self.carried} convocatorias de la ultima ejecucion arrastradas")
+        METRICS.count("sedia_early_stops", len(self.stopped))
+        METRICS.count("sedia_carried", self.carried)
+        print(f"\n📊 Total convocatorias encontradas: {summary['unique']}")
+        print(f"📊 Descartadas cerradas: {summary.get('closed', 0)}")
+        print(f"📊 Descartadas con deadline pasado: {summary.get('old', 0)}")
+        print(f"📊 Convocatorias vigentes: {summary['emitted']}")
+
+
+def fetch_all_calls(seen=None, previous=None):
+    return collect(SediaSource(seen, previous=previous))
 
 
 # ──────────────────────────────────────────────
 # GENERACIÓN EXCEL
 # ──────────────────────────────────────────────
 
-def generate_excel(all_calls, new_calls):
+class _StableZipFile(zipfile.ZipFile):
+    """ZipFile con fecha fija en todas las entradas (xlsx reproducible)."""
+
+    @staticmethod
+    def _info(name):
+        info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        return info
+
+    def writestr(self, name, data, *args, **kwargs):
+        if not isinstance(name, zipfile.ZipInfo):
+            name = self._info(name)
+        super().writestr(name, data, *args, **kwargs)
+
+    def write(self, filename, arcname=None, *args, **kwargs):
+        # openpyxl vuelca las hojas a un temporal y lo anade con write(): se
+        # copia por bloques, sin cargar la hoja entera en memoria
+        with open(filename, "rb") as src, self.open(self._info(arcname or os.path.basename(filename)), "w") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+
+
+def save_workbook_stable(wb, path, generated_at):
+    """Guarda el libro byte a byte igual para el mismo contenido.
+
+    openpyxl pone la hora actual en docProps/core.xml y en cada entrada del
+    zip; aqui ambas salen de generated_at / una fecha fija. Escritura atomica.
+    """
+    stamp = generated_at.astimezone(timezone.utc).replace(tzinfo=None, microsecond=0)
+    wb.properties.created = wb.properties.modified = stamp
+    tmp = Path(str(path) + ".tmp")
+    with _StableZipFile(tmp, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        ExcelWriter(wb, archive).write_data()
+    os.replace(tmp, path)
+
+
+# Estilos con nombre del libro: se registran una vez y cada celda solo guarda
+# el nombre (antes se creaban Font/PatternFill/Alignment por celda)
+EXCEL_FONT = "Leelawadee UI"
+EXCEL_STYLE_PREFIX = "radar_"  # evita chocar con los estilos integrados de Excel
+EXCEL_SOURCE_COLORS = {  # fuente -> (relleno celda, texto, separador)
+    "EU": ("DBEAFE", "1E40AF", "1E40AF"),
+    "BDNS": ("FEF3C7", "92400E", "B45309"),
+    "KontratazioA": ("D1FAE5", "065F46", "065F46"),
+}
+EXCEL_STATUS_FILLS = {"Open": "E6F4EA", "Forthcoming": "E8F0FE", "Closed": "FCE8E6"}
+EXCEL_RELEVANCE_FILLS = {"MUY ALTA": "DCFCE7", "ALTA": "E8F0FE", "MEDIA": "FFF8E1"}
+EXCEL_SECTION_COLORS = {"EUROPA": "1E40AF", "ESPANA": "92400E", "EUSKADI / BIZKAIA": "065F46"}
+
+
+def excel_named_styles():
+    """NamedStyle de las cuatro hojas, por nombre"""
+    dark_blue, header_blue, white = "1B2A4A", "0057B7", "FFFFFF"
+    side = Side(style='thin', color="D1D5DB")
+    border = Border(left=side, right=side, top=side, bottom=side)
+    center = Alignment(horizontal='center', vertical='center')
+    wrap_center = Alignment(vertical='center', wrap_text=True)
+    wrap_top = Alignment(wrap_text=True, vertical='top')
+    link_font = Font(name=EXCEL_FONT, size=10, color=header_blue, underline='single')
+
+    def style(name, font=None, fill=None, alignment=None, bordered=True, **font_kw):
+        named = NamedStyle(name=EXCEL_STYLE_PREFIX + name)
+        named.font = font or Font(name=EXCEL_FONT, **font_kw)
+        if fill:
+            named.fill = PatternFill('solid', fgColor=fill)
+        if alignment:
+            named.alignment = alignment
+        if bordered:
+            named.border = border
+        return named
+
+    header_font = Font(name=EXCEL_FONT, bold=True, color=white, size=11)
+    styles = [
+        # Resumen
+        style("title", bold=True, size=16, color=dark_blue, alignment=Alignment(horizontal='left', vertical='center'), bordered=False),
+        style("subtitle", size=11, color="6B7280", bordered=False),
+        style("header", header_font, header_blue, Alignment(horizontal='center', vertical='center', wrap_text=True)),
+        style("cell", size=10, alignment=wrap_center),
+        style("bold", size=10, bold=True, alignment=center),
+        style("new", size=10, bold=True, color="DC2626", fill="FEF2F2", alignment=center),
+        style("changed", size=10, bold=True, color="1E40AF", fill="EFF6FF", alignment=center),
+        style("link", link_font, alignment=center),
+        # Fichas Detalladas
+        style("card_header", bold=True, size=12, color=white, fill=header_blue),
+        style("card_fill", fill=header_blue, size=10),
+        style("card_label", bold=True, size=10, color=dark_blue, fill="F1F5F9", alignment=Alignment(vertical='top')),
+        style("card_value", size=10, alignment=wrap_top),
+        style("card_value_muy", size=10, bold=True, color="166534", alignment=wrap_top),
+        style("card_value_alta", size=10, bold=True, color="1E40AF", alignment=wrap_top),
+        style("card_link", link_font, alignment=wrap_top),
+        # Seguimiento
+        style("track_header", header_font, "7C3AED", Alignment(horizontal='center', vertical='center', wrap_text=True)),
+        style("track_bold", size=10, bold=True, alignment=wrap_center),
+        style("track_removed", size=10, bold=True, color="6B7280", fill="F3F4F6", alignment=center),
+        # Recursos
+        style("res_title", bold=True, size=14, color=dark_blue, bordered=False),
+        style("res_header", header_font, "059669", center),
+        style("res_name", size=10, bold=True, alignment=wrap_center),
+        style("res_link", link_font, alignment=wrap_center),
+    ]
+    for source, (fill, text, sep) in EXCEL_SOURCE_COLORS.items():
+        styles.append(style(f"src_{source}", size=10, bold=True, color=text, fill=fill, alignment=center))
+        styles.append(style(f"sep_{source}", size=12, bold=True, color=white, fill=sep,
+                            alignment=Alignment(horizontal='left', vertical='center'), bordered=False))
+    for status, fill in EXCEL_STATUS_FILLS.items():
+        styles.append(style(f"status_{status}", size=10, bold=True, fill=fill, alignment=center))
+    for level, fill in EXCEL_RELEVANCE_FILLS.items():
+        styles.append(style(f"rel_{level}", size=10, bold=True, fill=fill, alignment=center))
+    for section, color in EXCEL_SECTION_COLORS.items():
+        styles.append(style(f"section_{section}", bold=True, size=11, color=white, fill=color))
+    styles.append(style("section_other", bold=True, size=11, color=white, fill="333333"))
+    return styles
+
+
+class SheetStream:
+    """Hoja write-only que escribe fila a fila con estilos con nombre.
+
+    Anchos, filtros y paneles se fijan antes de la primera fila; el alto de
+    cada fila, justo antes de escribirla. Con row_height la hoja lleva ese
+    alto por defecto y solo las filas con otro alto guardan su RowDimension
+    (con miles de fichas, la mayoria de las filas).
+    """
+
+    def __init__(self, wb, title, widths=(), row_height=None):
+        self.ws = wb.create_sheet(title)
+        self.rows = 0
+        self.row_height = row_height
+        if row_height:
+            self.ws.sheet_format.defaultRowHeight = row_height
+            self.ws.sheet_format.customHeight = True
+        for col, width in enumerate(widths, 1):
+            self.ws.column_dimensions[get_column_letter(col)].width = width
+
+    def cell(self, value=None, style="cell", hyperlink=None, comment=None):
+        cell = WriteOnlyCell(self.ws, value=value)
+        cell.style = EXCEL_STYLE_PREFIX + style
+        if hyperlink:
+            cell.hyperlink = hyperlink
+        if comment:
+            cell.comment = Comment(comment, "EU Funding Radar")
+        return cell
+
+    def append(self, cells, height=None, merge_to=None):
+        self.rows += 1
+        if merge_to:
+            self.ws.merged_cells.add(f"A{self.rows}:{merge_to}{self.rows}")
+        if height and height != self.row_height:
+            self.ws.row_dimensions[self.rows].height = height
+        self.ws.append(cells)
+
+
+CARD_SOURCE_LABELS = {
+    "EU": "🇪🇺 Europa",
+    "BDNS": "🇪🇸 España",
+    "KontratazioA": "🟢 Euskadi",
+}
+
+
+def call_card(call):
+    """Ficha de una convocatoria: [(etiqueta, valor)] en el orden de la hoja
+    "Fichas Detalladas", que es tambien el de las paginas de docs/calls/."""
+    source = call.source.value
+    return [
+        ("Fuente", CARD_SOURCE_LABELS.get(source, source)),
+        ("Titulo", call.title),
+        ("ID", call.id),
+        ("Programa", call.programme),
+        ("Estado", call.status_text),
+        ("Deadline", call.deadline_text),
+        ("Presupuesto (EUR)", call.budget_text or "No disponible"),
+        ("Tipo de Accion", call.action_type or "No disponible"),
+        ("Call ID", call.call_id),
+        ("Descripcion", call.description),
+        ("Tags", call.tags),
+        ("Relevancia Bilbao", f"{call.relevance.value} — {call.relevance_note or ''}"),
+        ("Enlace al portal", call.url),
+    ]
+
+
+def generate_excel(all_calls, new_calls, changes=None, generated_at=None):
     if not HAS_OPENPYXL:
         print("⚠️  Saltando Excel (openpyxl no instalado)")
         return
 
-    wb = Workbook()
-
-    # Colors
-    DARK_BLUE = "1B2A4A"
-    HEADER_BLUE = "0057B7"
-    LIGHT_BLUE = "E8F0FE"
-    LIGHT_GREEN = "E6F4EA"
-    LIGHT_RED = "FCE8E6"
-    LIGHT_YELLOW = "FFF8E1"
-    WHITE = "FFFFFF"
-    BORDER_GRAY = "D1D5DB"
-
-    thin_border = Border(
-        left=Side(style='thin', color=BORDER_GRAY),
-        right=Side(style='thin', color=BORDER_GRAY),
-        top=Side(style='thin', color=BORDER_GRAY),
-        bottom=Side(style='thin', color=BORDER_GRAY),
-    )
-    header_font = Font(name='Leelawadee UI', bold=True, color=WHITE, size=11)
-    header_fill = PatternFill('solid', fgColor=HEADER_BLUE)
-    title_font = Font(name='Leelawadee UI', bold=True, size=16, color=DARK_BLUE)
-    subtitle_font = Font(name='Leelawadee UI', size=11, color="6B7280")
+    generated_at = generated_at or run_timestamp()
+    wb = Workbook(write_only=True)
+    for named in excel_named_styles():
+        wb.add_named_style(named)
 
     # Sort: source group (EU, ES, Euskadi) -> status -> relevance -> deadline
-    def excel_sort_key(x):
-        source = x.get("source", "EU")
-        if source == "BDNS":
-            src_order = 1
-        elif source == "KontratazioA":
-            src_order = 2
-        else:
-            src_order = 0
-        rel_order = {"MUY ALTA": 0, "ALTA": 1, "MEDIA": 2}.get(x.get("relevance_level", ""), 3)
-        status_order = {"Open": 0, "Forthcoming": 1}.get(x.get("status", ""), 2)
-        return (src_order, status_order, rel_order, x.get("deadline", "99/99/9999"))
-
-    calls_sorted = sorted(all_calls.values(), key=excel_sort_key)
+    calls_sorted = sorted(all_calls.values(), key=lambda x: (x.source.rank, x.sort_key))
 
     # ─── SHEET 1: RESUMEN ───
-    ws = wb.active
-    ws.title = "Resumen"
-
-    ws.merge_cells('A1:M1')
-    ws['A1'] = "EU FUNDING RADAR — AYUNTAMIENTO DE BILBAO"
-    ws['A1'].font = title_font
-    ws['A1'].alignment = Alignment(horizontal='left', vertical='center')
-    ws.row_dimensions[1].height = 40
-
-    ws.merge_cells('A2:M2')
-    ws['A2'] = f"Mision Climatica - Neutralidad 2030 - Actualizado: {datetime.now().strftime('%d/%m/%Y %H:%M')} - {len(all_calls)} convocatorias - {len(new_calls)} nuevas"
-    ws['A2'].font = subtitle_font
-    ws.row_dimensions[2].height = 22
-
     headers = [
         ("Fuente", 12),
         ("ID Convocatoria", 28),
@@ -547,186 +2463,81 @@ def generate_excel(all_calls, new_calls):
         ("Relevancia Bilbao", 18),
         ("Nota Relevancia", 40),
         ("Descripcion", 50),
-        ("Nueva?", 10),
+        ("Novedad", 10),
         ("Link", 12),
     ]
+    short_labels = {"EU": "Europa", "BDNS": "España", "KontratazioA": "Euskadi"}
 
-    for col, (name, width) in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col, value=name)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        cell.border = thin_border
-        ws.column_dimensions[get_column_letter(col)].width = width
-    ws.row_dimensions[4].height = 32
-
-    status_fills = {
-        "Open": PatternFill('solid', fgColor=LIGHT_GREEN),
-        "Forthcoming": PatternFill('solid', fgColor=LIGHT_BLUE),
-        "Closed": PatternFill('solid', fgColor=LIGHT_RED),
-    }
-    relevance_fills = {
-        "MUY ALTA": PatternFill('solid', fgColor="DCFCE7"),
-        "ALTA": PatternFill('solid', fgColor=LIGHT_BLUE),
-        "MEDIA": PatternFill('solid', fgColor=LIGHT_YELLOW),
-    }
-    source_fills = {
-        "EU": PatternFill('solid', fgColor="DBEAFE"),
-        "BDNS": PatternFill('solid', fgColor="FEF3C7"),
-        "KontratazioA": PatternFill('solid', fgColor="D1FAE5"),
-    }
-    source_fonts = {
-        "EU": Font(name='Leelawadee UI', size=10, bold=True, color="1E40AF"),
-        "BDNS": Font(name='Leelawadee UI', size=10, bold=True, color="92400E"),
-        "KontratazioA": Font(name='Leelawadee UI', size=10, bold=True, color="065F46"),
-    }
-    source_labels = {
-        "EU": "🇪🇺 Europa",
-        "BDNS": "🇪🇸 España",
-        "KontratazioA": "🟢 Euskadi",
-    }
+    ws = SheetStream(wb, "Resumen", [width for _, width in headers], row_height=40)
+    groups = len({call.source for call in calls_sorted})
+    ws.ws.auto_filter.ref = f"A4:M{4 + groups + len(calls_sorted)}"
+    ws.ws.freeze_panes = "A5"
+
+    ws.append([ws.cell("EU FUNDING RADAR — AYUNTAMIENTO DE BILBAO", "title")], height=40, merge_to="M")
+    ws.append([ws.cell(f"Mision Climatica - Neutralidad 2030 - Actualizado: {generated_at.astimezone().strftime('%d/%m/%Y %H:%M')} - {len(all_calls)} convocatorias - {len(new_calls)} nuevas - {len(changes.modified) if changes else 0} con cambios"
+                      + (f" - {len(changes.removed)} retiradas" if changes and changes.removed else ""), "subtitle")],
+              height=22, merge_to="M")
+    ws.append([], height=15)
+    ws.append([ws.cell(name, "header") for name, _ in headers], height=32)
 
     # Write section headers + data rows
     current_source = None
-    row_num = 4  # header row
-
     for call in calls_sorted:
-        source = call.get("source", "EU")
-        is_new = call["id"] in new_calls
+        source = call.source.value
+        is_new = call.id in new_calls
+        is_changed = bool(changes) and call.id in changes.modified
 
         # Insert source group separator
         if source != current_source:
             current_source = source
-            row_num += 1
-            label = source_labels.get(source, source)
-            ws.merge_cells(start_row=row_num, start_column=1, end_row=row_num, end_column=13)
-            sep_cell = ws.cell(row=row_num, column=1, value=label)
-            sep_colors = {"EU": "1E40AF", "BDNS": "B45309", "KontratazioA": "065F46"}
-            sep_cell.font = Font(name='Leelawadee UI', size=12, bold=True, color="FFFFFF")
-            sep_cell.fill = PatternFill('solid', fgColor=sep_colors.get(source, "1E40AF"))
-            sep_cell.alignment = Alignment(horizontal='left', vertical='center')
-            ws.row_dimensions[row_num].height = 28
-
-        row_num += 1
-        ws.row_dimensions[row_num].height = 40
-
-        source_label = {"EU": "Europa", "BDNS": "España", "KontratazioA": "Euskadi"}.get(source, source)
-
-        values = [
-            source_label,
-            call["id"],
-            call["title"],
-            call["programme"],
-            call["status"],
-            call.get("deadline", ""),
-            call.get("budget", ""),
-            call.get("action_type", ""),
-            call.get("relevance_level", "INFO"),
-            call.get("relevance_note", ""),
-            call["description"][:200],
-            "NUEVA" if is_new else "",
-            "Ver",
-        ]
-
-        for col, val in enumerate(values, 1):
-            cell = ws.cell(row=row_num, column=col, value=val)
-            cell.font = Font(name='Leelawadee UI', size=10)
-            cell.alignment = Alignment(vertical='center', wrap_text=True)
-            cell.border = thin_border
-
-            if col == 1:  # Fuente
-                cell.fill = source_fills.get(source, PatternFill())
-                cell.font = source_fonts.get(source, Font(name='Leelawadee UI', size=10))
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            elif col == 5:  # Status
-                cell.fill = status_fills.get(val, PatternFill())
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.font = Font(name='Leelawadee UI', size=10, bold=True)
-            elif col == 9:  # Relevance
-                cell.fill = relevance_fills.get(val, PatternFill())
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.font = Font(name='Leelawadee UI', size=10, bold=True)
-            elif col == 12 and is_new:  # New badge
-                cell.font = Font(name='Leelawadee UI', size=10, bold=True, color="DC2626")
-                cell.fill = PatternFill('solid', fgColor="FEF2F2")
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            elif col == 13:  # Link
-                cell.font = Font(name='Leelawadee UI', size=10, color="0057B7", underline='single')
-                cell.hyperlink = call["url"]
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-
-    ws.auto_filter.ref = f"A4:M{row_num}"
-    ws.freeze_panes = "A5"
+            sep = f"sep_{source}" if source in EXCEL_SOURCE_COLORS else "sep_EU"
+            ws.append([ws.cell(CARD_SOURCE_LABELS.get(source, source), sep)], height=28, merge_to="M")
+
+        status = call.status_text
+        rel = call.relevance.value
+        if is_new:
+            novelty = ws.cell("NUEVA", "new")
+        elif is_changed:  # detalle del cambio como comentario
+            novelty = ws.cell("CAMBIO", "changed", comment=changes.describe(call.id, sep="\n"))
+        else:
+            novelty = ws.cell("")
+        ws.append([
+            ws.cell(short_labels.get(source, source), f"src_{source}" if source in EXCEL_SOURCE_COLORS else "bold"),
+            ws.cell(call.id),
+            ws.cell(call.title),
+            ws.cell(call.programme),
+            ws.cell(status, f"status_{status}" if status in EXCEL_STATUS_FILLS else "bold"),
+            ws.cell(call.deadline_text),
+            ws.cell(call.budget_text),
+            ws.cell(call.action_type),
+            ws.cell(rel, f"rel_{rel}" if rel in EXCEL_RELEVANCE_FILLS else "bold"),
+            ws.cell(call.relevance_note or ""),
+            ws.cell(call.description[:200]),
+            novelty,
+            ws.cell("Ver", "link", hyperlink=call.url),
+        ], height=40)
 
     # ─── SHEET 2: FICHAS DETALLADAS ───
-    ws2 = wb.create_sheet("Fichas Detalladas")
+    # Valor en una columna B ancha (lo que ocupaban B:F combinadas): sin
+    # celdas combinadas por campo, que con miles de fichas pesan mucho
+    ws2 = SheetStream(wb, "Fichas Detalladas", (22, 100), row_height=20)
 
-    row = 1
     for i, call in enumerate(calls_sorted):
-        # Header
-        ws2.merge_cells(start_row=row, start_column=1, end_row=row, end_column=6)
-        cell = ws2.cell(row=row, column=1, value=f"FICHA {i+1}: {call['id']}")
-        cell.font = Font(name='Leelawadee UI', bold=True, size=12, color=WHITE)
-        cell.fill = header_fill
-        for c in range(1, 7):
-            ws2.cell(row=row, column=c).fill = header_fill
-            ws2.cell(row=row, column=c).border = thin_border
-        ws2.row_dimensions[row].height = 30
-        row += 1
-
-        source = call.get("source", "EU")
-        source_label = {"EU": "🇪🇺 Europa", "BDNS": "🇪🇸 España", "KontratazioA": "🟢 Euskadi"}.get(source, source)
-        fields = [
-            ("Fuente", source_label),
-            ("Titulo", call["title"]),
-            ("ID", call["id"]),
-            ("Programa", call["programme"]),
-            ("Estado", call["status"]),
-            ("Deadline", call.get("deadline", "No disponible")),
-            ("Presupuesto (EUR)", call.get("budget", "No disponible") or "No disponible"),
-            ("Tipo de Accion", call.get("action_type", "No disponible") or "No disponible"),
-            ("Call ID", call.get("call_id", "") or ""),
-            ("Descripcion", call["description"]),
-            ("Tags", call.get("tags", "") or ""),
-            ("Relevancia Bilbao", f"{call.get('relevance_level', 'INFO')} — {call.get('relevance_note', '')}"),
-            ("Enlace al portal", call["url"]),
-        ]
-
-        for label, value in fields:
-            ws2.cell(row=row, column=1, value=label)
-            ws2.cell(row=row, column=1).font = Font(name='Leelawadee UI', bold=True, size=10, color=DARK_BLUE)
-            ws2.cell(row=row, column=1).fill = PatternFill('solid', fgColor="F1F5F9")
-            ws2.cell(row=row, column=1).alignment = Alignment(vertical='top')
-            ws2.cell(row=row, column=1).border = thin_border
-
-            ws2.merge_cells(start_row=row, start_column=2, end_row=row, end_column=6)
-            cell = ws2.cell(row=row, column=2, value=value)
-            cell.font = Font(name='Leelawadee UI', size=10)
-            cell.alignment = Alignment(wrap_text=True, vertical='top')
-            cell.border = thin_border
-            for c in range(2, 7):
-                ws2.cell(row=row, column=c).border = thin_border
+        ws2.append([ws2.cell(f"FICHA {i+1}: {call.id}", "card_header"), ws2.cell(None, "card_fill")], height=30)
 
+        for label, value in call_card(call):
             if label == "Relevancia Bilbao":
-                if "MUY ALTA" in str(value):
-                    cell.font = Font(name='Leelawadee UI', size=10, bold=True, color="166534")
-                elif "ALTA" in str(value):
-                    cell.font = Font(name='Leelawadee UI', size=10, bold=True, color="1E40AF")
+                value_cell = ws2.cell(value, "card_value_muy" if "MUY ALTA" in value
+                                      else "card_value_alta" if "ALTA" in value else "card_value")
             elif label == "Enlace al portal":
-                cell.font = Font(name='Leelawadee UI', size=10, color="0057B7", underline='single')
-                cell.hyperlink = value
-
-            ws2.row_dimensions[row].height = 20 if len(str(value)) < 80 else 45
-            row += 1
-        row += 1
-
-    ws2.column_dimensions['A'].width = 22
-    for c in 'BCDEF':
-        ws2.column_dimensions[c].width = 20
+                value_cell = ws2.cell(value, "card_link", hyperlink=value)
+            else:
+                value_cell = ws2.cell(value, "card_value")
+            ws2.append([ws2.cell(label, "card_label"), value_cell],
+                       height=20 if len(str(value)) < 80 else 45)
+        ws2.append([], height=15)
 
     # ─── SHEET 3: SEGUIMIENTO ───
-    ws3 = wb.create_sheet("Seguimiento")
-
     track_headers = [
         ("ID Convocatoria", 30),
         ("Titulo corto", 40),
@@ -739,38 +2550,46 @@ def generate_excel(all_calls, new_calls):
         ("Socios identificados", 30),
         ("Notas / Proximos pasos", 40),
     ]
+    ws3 = SheetStream(wb, "Seguimiento", [width for _, width in track_headers], row_height=28)
+    ws3.ws.auto_filter.ref = f"A1:J{1 + len(calls_sorted)}"
+    ws3.ws.freeze_panes = "A2"
 
-    for col, (name, width) in enumerate(track_headers, 1):
-        cell = ws3.cell(row=1, column=col, value=name)
-        cell.font = header_font
-        cell.fill = PatternFill('solid', fgColor="7C3AED")
-        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        cell.border = thin_border
-        ws3.column_dimensions[get_column_letter(col)].width = width
-    ws3.row_dimensions[1].height = 32
-
-    for i, call in enumerate(calls_sorted):
-        row = 2 + i
-        ws3.cell(row=row, column=1, value=call["id"]).font = Font(name='Leelawadee UI', size=10)
-        ws3.cell(row=row, column=2, value=call["title"][:60]).font = Font(name='Leelawadee UI', size=10)
-        ws3.cell(row=row, column=3, value=call["programme"]).font = Font(name='Leelawadee UI', size=10)
-        ws3.cell(row=row, column=4, value=call["status"]).font = Font(name='Leelawadee UI', size=10)
-        ws3.cell(row=row, column=5, value=call.get("deadline", "")).font = Font(name='Leelawadee UI', size=10)
-        ws3.cell(row=row, column=6, value=call.get("relevance_level", "")).font = Font(name='Leelawadee UI', size=10, bold=True)
-        ws3.cell(row=row, column=7, value="").font = Font(name='Leelawadee UI', size=10)
-        ws3.cell(row=row, column=8, value="Por revisar").font = Font(name='Leelawadee UI', size=10)
-        ws3.cell(row=row, column=9, value="").font = Font(name='Leelawadee UI', size=10)
-        ws3.cell(row=row, column=10, value="").font = Font(name='Leelawadee UI', size=10)
-        for col in range(1, 11):
-            ws3.cell(row=row, column=col).border = thin_border
-            ws3.cell(row=row, column=col).alignment = Alignment(vertical='center', wrap_text=True)
-        ws3.row_dimensions[row].height = 28
-
-    ws3.auto_filter.ref = f"A1:J{1 + len(calls_sorted)}"
-    ws3.freeze_panes = "A2"
+    ws3.append([ws3.cell(name, "track_header") for name, _ in track_headers], height=32)
+    for call in calls_sorted:
+        ws3.append([
+            ws3.cell(call.id),
+            ws3.cell(call.title[:60]),
+            ws3.cell(call.programme),
+            ws3.cell(call.status_text),
+            ws3.cell(call.deadline_text),
+            ws3.cell(call.relevance.value, "track_bold"),
+            ws3.cell(""),
+            ws3.cell("Por revisar"),
+            ws3.cell(""),
+            ws3.cell(""),
+        ], height=28)
+
+    # Retiradas en esta ejecucion (ya no salen en su fuente), debajo del filtro
+    removed = changes.removed_calls() if changes else []
+    if removed:
+        ws3.append([], height=15)
+        ws3.append([ws3.cell(f"RETIRADAS EN ESTA EJECUCION ({len(removed)})", "track_header")], height=28, merge_to="J")
+        for call in removed:
+            ws3.append([
+                ws3.cell(call.id),
+                ws3.cell(call.title[:60]),
+                ws3.cell(call.programme),
+                ws3.cell(call.status_text),
+                ws3.cell(call.deadline_text),
+                ws3.cell(call.relevance.value, "track_bold"),
+                ws3.cell(""),
+                ws3.cell("Retirada", "track_removed"),
+                ws3.cell(""),
+                ws3.cell(""),
+            ], height=28)
 
     # ─── SHEET 4: RECURSOS ───
-    ws4 = wb.create_sheet("Recursos")
+    ws4 = SheetStream(wb, "Recursos", (35, 75, 50))
 
     resources = [
         # --- EUROPA ---
@@ -816,49 +2635,25 @@ def generate_excel(all_calls, new_calls):
         ("KontratazioA - Licitaciones Euskadi", "https://www.contratacion.euskadi.eus/webkpe00-kpeperfi/es/ac70cPublicidadWar/busquedaAnuncios?locale=es", "Plataforma contratacion publica sector publico vasco"),
     ]
 
-    ws4.merge_cells('A1:C1')
-    ws4['A1'] = "RECURSOS Y ENLACES UTILES"
-    ws4['A1'].font = Font(name='Leelawadee UI', bold=True, size=14, color=DARK_BLUE)
-    ws4.row_dimensions[1].height = 35
-
-    for col, (name, width) in enumerate([("Recurso", 35), ("Enlace", 75), ("Descripcion", 50)], 1):
-        cell = ws4.cell(row=3, column=col, value=name)
-        cell.font = header_font
-        cell.fill = PatternFill('solid', fgColor="059669")
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = thin_border
-        ws4.column_dimensions[get_column_letter(col)].width = width
-
-    for i, (name, url, desc) in enumerate(resources):
-        row = 4 + i
+    ws4.append([ws4.cell("RECURSOS Y ENLACES UTILES", "res_title")], height=35, merge_to="C")
+    ws4.append([])
+    ws4.append([ws4.cell(name, "res_header") for name in ("Recurso", "Enlace", "Descripcion")])
+
+    for name, url, desc in resources:
         if name.startswith("SECCION:"):
             # Section header
-            ws4.merge_cells(start_row=row, start_column=1, end_row=row, end_column=3)
-            cell = ws4.cell(row=row, column=1, value=name.replace("SECCION: ", ""))
-            cell.font = Font(name='Leelawadee UI', bold=True, size=11, color="FFFFFF")
-            section_colors = {"EUROPA": "1E40AF", "ESPANA": "92400E", "EUSKADI / BIZKAIA": "065F46"}
-            color = "333333"
-            for k, v in section_colors.items():
-                if k in name:
-                    color = v
-            cell.fill = PatternFill('solid', fgColor=color)
-            for c in range(1, 4):
-                ws4.cell(row=row, column=c).fill = PatternFill('solid', fgColor=color)
-                ws4.cell(row=row, column=c).border = thin_border
-            ws4.row_dimensions[row].height = 28
+            section = name.replace("SECCION: ", "")
+            style = f"section_{section}" if section in EXCEL_SECTION_COLORS else "section_other"
+            ws4.append([ws4.cell(section, style), ws4.cell(None, style), ws4.cell(None, style)],
+                       height=28, merge_to="C")
         else:
-            ws4.cell(row=row, column=1, value=name).font = Font(name='Leelawadee UI', bold=True, size=10)
-            if url:
-                link_cell = ws4.cell(row=row, column=2, value=url)
-                link_cell.font = Font(name='Leelawadee UI', size=10, color="0057B7", underline='single')
-                link_cell.hyperlink = url
-            ws4.cell(row=row, column=3, value=desc).font = Font(name='Leelawadee UI', size=10)
-            for col in range(1, 4):
-                ws4.cell(row=row, column=col).border = thin_border
-                ws4.cell(row=row, column=col).alignment = Alignment(vertical='center', wrap_text=True)
-            ws4.row_dimensions[row].height = 28
-
-    wb.save(CONFIG["output_excel"])
+            ws4.append([
+                ws4.cell(name, "res_name"),
+                ws4.cell(url, "res_link", hyperlink=url) if url else ws4.cell(None),
+                ws4.cell(desc),
+            ], height=28)
+
+    save_workbook_stable(wb, CONFIG["output_excel"], generated_at)
     print(f"📊 Excel generado: {CONFIG['output_excel']}")
 
 
@@ -867,84 +2662,167 @@ def generate_excel(all_calls, new_calls):
 # ──────────────────────────────────────────────
 
 
-def generate_html(all_calls, new_calls):
-    eu_calls = [c for c in all_calls.values() if c.get("source") not in ("BDNS", "KontratazioA")]
-    es_calls = [c for c in all_calls.values() if c.get("source") == "BDNS"]
-    eus_calls = [c for c in all_calls.values() if c.get("source") == "KontratazioA"]
+# Textos de las etiquetas de cada fila (tambien entran en el indice de busqueda)
+HTML_SOURCE_LABELS = ("Europa", "España", "Euskadi")
+HTML_STATUS_LABELS = ("Abierta", "Próxima", "Info")
+HTML_KIND_LABELS = ("", "Licitación", "Ayuda")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def build_search_index(texts):
+    """Indice invertido para el buscador del informe.
+
+    Devuelve (tokens, postings): tokens ordenados (texto con fold_text) y,
+    en paralelo, la lista de filas de cada uno. El cliente busca cada
+    palabra como prefijo con busqueda binaria sobre tokens.
+    """
+    index = {}
+    for row, text in enumerate(texts):
+        for token in set(_TOKEN_RE.findall(fold_text(text))):
+            index.setdefault(token, []).append(row)
+    tokens = sorted(index)
+    return tokens, [index[t] for t in tokens]
+
+
+# Cliente del informe: pinta las filas desde el JSON embebido por paginas,
+# filtra sobre el array (no sobre el DOM) y busca en el indice con debounce
+HTML_REPORT_SCRIPT = r"""
+const D=JSON.parse(document.getElementById('radar-data').textContent),R=D.r,T=D.t,P=D.p,N=R.length,PAGE=50;
+const SRC=['eu','es','eus'];
+const SRCB=['<span class="badge-src-eu">Europa</span>','<span class="badge-src-es">España</span>','<span class="badge-src-eus">Euskadi</span>'];
+const STB=['<span class="badge-open">Abierta</span>','<span class="badge-forth">Próxima</span>','<span class="badge-info">Info</span>'];
+const TYB=['','<span class="badge-type-lic">Licitación</span>','<span class="badge-type-ayuda">Ayuda</span>'];
+const RELC={'MUY ALTA':'badge-rel-muy','ALTA':'badge-rel-alta','MEDIA':'badge-rel-media'};
+const FB=document.body.dataset.fichas||'';
+const cb=document.getElementById('cb'),nr=document.getElementById('nr'),mb=document.getElementById('more');
+let aS='all',aR='all',sT='',hit=null,view=[],shown=0,tq=0;
+function esc(s){return String(s).replace(/[&<>"']/g,c=>'&#'+c.charCodeAt(0)+';')}
+function row(i,showNew){
+  const c=R[i],rc=RELC[c[6]];
+  let b=(c[12]&1)&&showNew?' <span class="badge-new">NUEVA</span>':'';
+  if(c[13])b+=' <span class="badge-chg" title="'+esc(c[13])+'">CAMBIO</span>';
+  return '<tr class="call-row" data-new="'+(c[12]&1)+'"><td class="cell-main"><div class="call-title">'+(FB?'<a href="'+FB+esc(c[14])+'">'+esc(c[1])+'</a>':esc(c[1]))+b+'</div>'
+    +'<div class="call-meta">'+SRCB[c[2]]+STB[c[3]]+TYB[c[4]]+(c[5]?'<span class="badge-prog">'+esc(c[5])+'</span>':'')+(rc?'<span class="'+rc+'">'+c[6]+'</span>':'')+'</div>'
+    +'<div class="call-desc">'+esc(c[7])+'</div>'+(c[13]?'<div class="chg-note">🔄 '+esc(c[13])+'</div>':'')
+    +(c[8]?'<div class="rel-note">💡 '+esc(c[8])+'</div>':'')+(c[9]?'<div class="budget">💰 '+esc(c[9])+'</div>':'')
+    +'</td><td class="cell-deadline">'+esc(c[10])+'</td><td class="cell-link"><a href="'+esc(c[11])+'" target="_blank" class="link-ver">Ver →</a></td></tr>'}
+function fold(s){return s.toLowerCase().normalize('NFKD').replace(/[^\x00-\x7f]/g,'')}
+function lb(w){let lo=0,hi=T.length;while(lo<hi){const m=(lo+hi)>>1;if(T[m]<w)lo=m+1;else hi=m}return lo}
+function search(q){
+  const ws=fold(q).match(/[a-z0-9]+/g);if(!ws)return null;
+  let h=null;
+  for(const w of ws){const m=new Uint8Array(N);for(let i=lb(w);i<T.length&&T[i].startsWith(w);i++)for(const r of P[i])m[r]=1;if(h)for(let j=0;j<N;j++)h[j]&=m[j];else h=m}
+  return h}
+function match(i){
+  const c=R[i];
+  if(aS==='new'){if(!(c[12]&1))return false}else if(aS!=='all'&&SRC[c[2]]!==aS)return false;
+  if(aR==='muy-alta'&&c[6]!=='MUY ALTA')return false;
+  if(aR==='alta'&&c[6]!=='ALTA'&&c[6]!=='MUY ALTA')return false;
+  return !hit||hit[i]===1}
+function more(){
+  const end=Math.min(shown+PAGE,view.length);let h='';
+  for(let k=shown;k<end;k++)h+=row(view[k],true);
+  cb.insertAdjacentHTML('beforeend',h);shown=end;
+  mb.style.display=shown<view.length?'block':'none';mb.textContent='Mostrar más ('+(view.length-shown)+' restantes)'}
+function af(){
+  view=[];for(let i=0;i<N;i++)if(match(i))view.push(i);
+  cb.textContent='';shown=0;more();nr.style.display=view.length?'none':'block';
+  const top=(aS==='all'&&aR==='all'&&!sT)?'':'none';
+  for(const id of ['new-section','chg-section','rm-section']){const e=document.getElementById(id);if(e)e.style.display=top}}
+function fS(s,b){aS=s;document.querySelectorAll('.tabs .tab').forEach(t=>t.classList.remove('active'));b.classList.add('active');af()}
+function fR(r,b){aR=r;document.querySelectorAll('.fb').forEach(x=>x.classList.remove('active'));b.classList.add('active');af()}
+function fTx(v){clearTimeout(tq);tq=setTimeout(()=>{sT=v.trim();hit=sT?search(sT):null;af()},150)}
+function fill(id,flag){const e=document.getElementById(id);if(!e)return;let h='';for(let i=0;i<N;i++)if(R[i][12]&flag)h+=row(i,false);e.innerHTML=h}
+fill('nb',1);fill('chb',2);af();
+mb.onclick=more;
+if('IntersectionObserver' in window)new IntersectionObserver(es=>{if(es[0].isIntersecting&&shown<view.length)more()},{rootMargin:'400px'}).observe(mb);
+"""
+
+
+def generate_html(all_calls, new_calls, changes=None, generated_at=None):
+    eu_calls = [c for c in all_calls.values() if c.source is CallSource.EU]
+    es_calls = [c for c in all_calls.values() if c.source is CallSource.BDNS]
+    eus_calls = [c for c in all_calls.values() if c.source is CallSource.EUSKADI]
 
     def sort_key(x):
-        rel_order = {"MUY ALTA": 0, "ALTA": 1, "MEDIA": 2}
-        status_order = {"Open": 0, "Forthcoming": 1}
-        return (status_order.get(x["status"], 2), rel_order.get(x.get("relevance_level",""), 3), x.get("deadline","99/99/9999"))
+        return x.sort_key
 
     eu_calls.sort(key=sort_key); es_calls.sort(key=sort_key); eus_calls.sort(key=sort_key)
-    new_list = sorted([c for c in all_calls.values() if c["id"] in new_calls], key=sort_key)
-    muy_alta = sum(1 for c in all_calls.values() if c.get("relevance_level") == "MUY ALTA")
-
-    def make_row(call, show_new=True):
-        is_new = call["id"] in new_calls
-        new_badge = ' <span class="badge-new">NUEVA</span>' if is_new and show_new else ""
-        s = call["status"]
-        badge = '<span class="badge-open">Abierta</span>' if s == "Open" else '<span class="badge-forth">Próxima</span>' if s == "Forthcoming" else '<span class="badge-info">Info</span>'
-        source = call.get("source", "EU")
-        if source == "BDNS":
-            src_badge, src_tag = '<span class="badge-src-es">España</span>', "es"
-        elif source == "KontratazioA":
-            src_badge, src_tag = '<span class="badge-src-eus">Euskadi</span>', "eus"
-        else:
-            src_badge, src_tag = '<span class="badge-src-eu">Europa</span>', "eu"
-        prog = call.get("programme", "")
-        prog_badge = f'<span class="badge-prog">{prog[:30]}</span>' if prog else ""
-        rel = call.get("relevance_level", "")
-        rcls = {"MUY ALTA":"badge-rel-muy","ALTA":"badge-rel-alta","MEDIA":"badge-rel-media"}.get(rel,"")
-        rel_badge = f'<span class="{rcls}">{rel}</span>' if rcls else ""
-        desc = call["description"][:160]
-        rn = call.get("relevance_note","")
-        rh = f'<div class="rel-note">💡 {rn}</div>' if rn else ""
-        bu = call.get("budget","")
-        bh = f'<div class="budget">💰 {bu}</div>' if bu else ""
-        dl = call.get("deadline","") or "—"
-        at = call.get("action_type","")
-        tb = '<span class="badge-type-lic">Licitación</span>' if "Licitacion" in at else '<span class="badge-type-ayuda">Ayuda</span>' if ("Ayuda" in at or "Subvencion" in at) else ""
-        return f'''
-        <tr class="call-row" data-source="{src_tag}" data-rel="{rel}" data-new="{'1' if is_new else '0'}">
-            <td class="cell-main">
-                <div class="call-title">{call['title'][:130]}{new_badge}</div>
-                <div class="call-meta">{src_badge}{badge}{tb}{prog_badge}{rel_badge}</div>
-                <div class="call-desc">{desc}</div>{rh}{bh}
-            </td>
-            <td class="cell-deadline">{dl}</td>
-            <td class="cell-link"><a href="{call['url']}" target="_blank" class="link-ver">Ver →</a></td>
-        </tr>'''
+    new_list = sorted([c for c in all_calls.values() if c.id in new_calls], key=sort_key)
+    changes = changes or Changeset()
+    generated_at = generated_at or run_timestamp()
+    chg_list = sorted(changes.modified.values(), key=sort_key)
+    rm_list = changes.removed_calls()
+    muy_alta = sum(1 for c in all_calls.values() if c.relevance is Relevance.MUY_ALTA)
 
     all_sorted = sorted(all_calls.values(), key=sort_key)
-    all_rows = "".join(make_row(c) for c in all_sorted)
-
+    records, texts = [], []
+    for call in all_sorted:
+        chg = changes.describe(call.id)
+        at = call.action_type
+        kind = 1 if "Licitacion" in at else 2 if ("Ayuda" in at or "Subvencion" in at) else 0
+        status = {CallStatus.OPEN: 0, CallStatus.FORTHCOMING: 1}.get(call.status, 2)
+        record = [
+            call.id, call.title[:130], call.source.rank, status, kind, call.programme[:30],
+            call.relevance.value, call.description[:160], call.relevance_note or "", call.budget_text,
+            call.deadline_text or "—", call.url, (call.id in new_calls) | (2 if chg else 0), chg,
+            call_page_name(call.id),
+        ]
+        records.append(record)
+        # Lo que se ve en la fila, etiquetas incluidas, como al buscar en el texto de la tabla
+        texts.append(" ".join((call.id, call.title[:130], HTML_SOURCE_LABELS[call.source.rank],
+                               HTML_STATUS_LABELS[status], HTML_KIND_LABELS[kind], call.programme[:30],
+                               call.relevance.value, call.description[:160], call.relevance_note or "",
+                               call.budget_text, call.deadline_text, chg)))
+    tokens, postings = build_search_index(texts)
+    data = json.dumps({"r": records, "t": tokens, "p": postings}, ensure_ascii=False, separators=(",", ":"))
+    data = data.replace("</", "<\\/")
+
+    plural = lambda n: "s" if n > 1 else ""
     if new_list:
-        new_rows = "".join(make_row(c, show_new=False) for c in new_list)
         new_section = f'''
         <div class="new-alert" id="new-section">
-            <div class="new-alert-title">🆕 {len(new_list)} convocatoria{"s" if len(new_list)>1 else ""} nueva{"s" if len(new_list)>1 else ""}</div>
+            <div class="new-alert-title">🆕 {len(new_list)} convocatoria{plural(len(new_list))} nueva{plural(len(new_list))}</div>
             <table class="calls-table"><thead><tr class="table-head"><th>Convocatoria</th><th class="th-dl">Deadline</th><th class="th-lk"></th></tr></thead>
-            <tbody>{new_rows}</tbody></table></div>'''
+            <tbody id="nb"></tbody></table></div>'''
     else:
         new_section = '<div class="no-new-alert">✅ Sin novedades desde la última ejecución</div>'
 
-    html = f"""<!DOCTYPE html>
+    if chg_list:
+        new_section += f'''
+        <div class="chg-alert" id="chg-section">
+            <div class="chg-alert-title">🔄 {len(chg_list)} convocatoria{plural(len(chg_list))} con cambios</div>
+            <table class="calls-table"><thead><tr class="table-head"><th>Convocatoria</th><th class="th-dl">Deadline</th><th class="th-lk"></th></tr></thead>
+            <tbody id="chb"></tbody></table></div>'''
+
+    if rm_list:
+        # Ya no estan en el JSON de datos: se pintan aqui con su ultimo estado guardado
+        rm_rows = "".join(
+            f'<tr class="call-row"><td class="cell-main"><div class="call-title">{html.escape(c.title[:130])}</div>'
+            f'<div class="call-meta">{html.escape(HTML_SOURCE_LABELS[c.source.rank])} · {html.escape(c.id)}</div></td>'
+            f'<td class="cell-deadline">{html.escape(c.deadline_text or "—")}</td>'
+            f'<td class="cell-link"><a href="{html.escape(c.url)}" target="_blank" class="link-ver">Ver →</a></td></tr>'
+            for c in rm_list)
+        new_section += f'''
+        <div class="rm-alert" id="rm-section">
+            <div class="rm-alert-title">➖ {len(rm_list)} convocatoria{plural(len(rm_list))} retirada{plural(len(rm_list))}</div>
+            <table class="calls-table"><thead><tr class="table-head"><th>Convocatoria</th><th class="th-dl">Deadline</th><th class="th-lk"></th></tr></thead>
+            <tbody>{rm_rows}</tbody></table></div>'''
+
+    page = f"""<!DOCTYPE html>
 <html lang="es"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width,initial-scale=1.0">
 <title>Funding Radar — Bilbao</title>
-<link href="https://fonts.googleapis.com/css2?family=DM+Sans:opsz,wght@9..40,400;9..40,500;9..40,700&family=JetBrains+Mono:wght@500&display=swap" rel="stylesheet">
 <style>
-:root{{--bg:#F0F2F5;--card:#FFF;--bdr:#E4E7EC;--tx:#1A1D26;--tx2:#6B7280;--tx3:#9CA3AF;--eu:#1E40AF;--eubg:#EFF6FF;--eubd:#BFDBFE;--es:#B45309;--esbg:#FFFBEB;--esbd:#FCD34D;--eus:#047857;--eusbg:#ECFDF5;--eusbd:#6EE7B7;--red:#DC2626;--grn:#059669;--r:10px}}
+:root{{--sans:system-ui,-apple-system,'Segoe UI',Roboto,'Helvetica Neue',Arial,sans-serif;--mono:ui-monospace,SFMono-Regular,Menlo,Consolas,'Liberation Mono',monospace;--bg:#F0F2F5;--card:#FFF;--bdr:#E4E7EC;--tx:#1A1D26;--tx2:#6B7280;--tx3:#9CA3AF;--eu:#1E40AF;--eubg:#EFF6FF;--eubd:#BFDBFE;--es:#B45309;--esbg:#FFFBEB;--esbd:#FCD34D;--eus:#047857;--eusbg:#ECFDF5;--eusbd:#6EE7B7;--red:#DC2626;--grn:#059669;--r:10px}}
 *{{box-sizing:border-box;margin:0;padding:0}}
-body{{font-family:'DM Sans',sans-serif;background:var(--bg);color:var(--tx);font-size:14px}}
+body{{font-family:var(--sans);background:var(--bg);color:var(--tx);font-size:14px}}
 .ctn{{max-width:1060px;margin:0 auto;padding:16px}}
 .hdr{{display:flex;align-items:center;justify-content:space-between;padding:18px 22px;background:var(--card);border-radius:var(--r);border:1px solid var(--bdr);margin-bottom:12px}}
 .hdr-l{{display:flex;align-items:center;gap:12px}}
 .hdr-ico{{width:40px;height:40px;border-radius:10px;background:linear-gradient(135deg,#0057B7,#FFD700);display:flex;align-items:center;justify-content:center;font-size:16px;color:white;font-weight:800}}
 .hdr h1{{font-size:19px;font-weight:700;letter-spacing:-0.03em}}
 .hdr-sub{{font-size:11px;color:var(--tx3);font-weight:500}}
-.hdr-dt{{font-family:'JetBrains Mono',monospace;font-size:11px;color:var(--tx3);background:var(--bg);padding:4px 10px;border-radius:6px}}
+.hdr-dt{{font-family:var(--mono);font-size:11px;color:var(--tx3);background:var(--bg);padding:4px 10px;border-radius:6px}}
 
 .sts{{display:grid;grid-template-columns:repeat(6,1fr);gap:8px;margin-bottom:12px}}
 .st{{background:var(--card);border:1px solid var(--bdr);border-radius:var(--r);padding:10px;text-align:center}}
@@ -960,7 +2838,7 @@ body{{font-family:'DM Sans',sans-serif;background:var(--bg);color:var(--tx);font
 .tab.active.t-es{{background:var(--es)}}
 .tab.active.t-eus{{background:var(--eus)}}
 .tab.active.t-new{{background:var(--red)}}
-.tc{{font-family:'JetBrains Mono',monospace;font-size:10px;opacity:.7;margin-left:3px}}
+.tc{{font-family:var(--mono);font-size:10px;opacity:.7;margin-left:3px}}
 
 .tbar{{display:flex;gap:8px;margin-bottom:12px;align-items:center;flex-wrap:wrap}}
 .srch{{flex:1;min-width:180px;padding:8px 12px;border:1px solid var(--bdr);border-radius:8px;font-size:13px;font-family:inherit;outline:none;background:var(--card)}}
@@ -973,6 +2851,10 @@ body{{font-family:'DM Sans',sans-serif;background:var(--bg);color:var(--tx);font
 
 .new-alert{{background:#FEF2F2;border:2px solid #FECACA;border-radius:var(--r);padding:14px;margin-bottom:14px}}
 .new-alert-title{{font-size:14px;font-weight:700;color:var(--red);margin-bottom:8px}}
+.chg-alert{{background:var(--eubg);border:2px solid var(--eubd);border-radius:var(--r);padding:14px;margin-bottom:14px}}
+.chg-alert-title{{font-size:14px;font-weight:700;color:var(--eu);margin-bottom:8px}}
+.rm-alert{{background:#F9FAFB;border:2px solid var(--bdr);border-radius:var(--r);padding:14px;margin-bottom:14px}}
+.rm-alert-title{{font-size:14px;font-weight:700;color:var(--tx2);margin-bottom:8px}}
 .no-new-alert{{background:var(--eusbg);border:1px solid var(--eusbd);border-radius:var(--r);padding:10px 14px;margin-bottom:12px;color:var(--eus);font-weight:600;font-size:13px}}
 
 .calls-table{{width:100%;background:var(--card);border:1px solid var(--bdr);border-radius:var(--r);border-collapse:collapse;overflow:hidden}}
@@ -985,16 +2867,19 @@ body{{font-family:'DM Sans',sans-serif;background:var(--bg);color:var(--tx);font
 .call-row[data-new="1"]{{background:#FFFBEB}}
 
 .cell-main{{padding:9px 12px}}
-.cell-deadline{{padding:9px 12px;font-size:11px;color:#334155;font-weight:600;vertical-align:top;font-family:'JetBrains Mono',monospace;white-space:nowrap}}
+.cell-deadline{{padding:9px 12px;font-size:11px;color:#334155;font-weight:600;vertical-align:top;font-family:var(--mono);white-space:nowrap}}
 .cell-link{{padding:9px 12px;text-align:right;vertical-align:top}}
 
 .call-title{{font-weight:600;font-size:12.5px;line-height:1.35;margin-bottom:4px}}
+.call-title a{{color:inherit;text-decoration:none}}.call-title a:hover{{text-decoration:underline}}
 .call-meta{{display:flex;flex-wrap:wrap;gap:3px;margin-bottom:3px}}
 .call-desc{{font-size:11px;color:var(--tx2)}}
 .rel-note{{font-size:10px;color:var(--grn);margin-top:2px}}
 .budget{{font-size:10px;color:var(--es);margin-top:2px}}
+.chg-note{{font-size:10px;color:var(--eu);margin-top:2px}}
 
 .badge-new{{color:#fff;background:var(--red);padding:1px 6px;border-radius:3px;font-size:9px;font-weight:800;margin-left:4px}}
+.badge-chg{{color:#fff;background:var(--eu);padding:1px 6px;border-radius:3px;font-size:9px;font-weight:800;margin-left:4px;cursor:help}}
 .badge-open{{color:#065F46;background:#D1FAE5;padding:1px 7px;border-radius:3px;font-size:9px;font-weight:700}}
 .badge-forth{{color:var(--eu);background:var(--eubg);padding:1px 7px;border-radius:3px;font-size:9px;font-weight:700}}
 .badge-info{{color:var(--tx3);background:#F3F4F6;padding:1px 7px;border-radius:3px;font-size:9px}}
@@ -1018,11 +2903,13 @@ body{{font-family:'DM Sans',sans-serif;background:var(--bg);color:var(--tx);font
 .r-eus{{background:var(--eusbg);border:1px solid var(--eusbd)}}.r-eus a{{color:var(--eus)}}
 .ftr{{text-align:center;margin-top:18px;font-size:10px;color:var(--tx3);padding-bottom:16px}}
 .nr{{text-align:center;padding:30px;color:var(--tx3);font-size:13px;display:none}}
+.more{{display:none;width:100%;margin-top:8px;padding:9px;border-radius:var(--r);border:1px solid var(--bdr);background:var(--card);font-size:12px;font-weight:600;cursor:pointer;font-family:inherit;color:var(--tx2)}}
+.more:hover{{background:var(--bg)}}
 @media(max-width:700px){{.sts{{grid-template-columns:repeat(3,1fr)}}.tabs{{flex-wrap:wrap}}.hdr{{flex-direction:column;gap:8px}}}}
 </style></head>
 <body>
 <div class="ctn">
-    <div class="hdr"><div class="hdr-l"><div class="hdr-ico">FR</div><div><h1>Funding Radar</h1><div class="hdr-sub">Bilbao · Misión Climática · Neutralidad 2030</div></div></div><div class="hdr-dt">{datetime.now().strftime('%d/%m/%Y %H:%M')}</div></div>
+    <div class="hdr"><div class="hdr-l"><div class="hdr-ico">FR</div><div><h1>Funding Radar</h1><div class="hdr-sub">Bilbao · Misión Climática · Neutralidad 2030</div></div></div><div class="hdr-dt">{generated_at.astimezone().strftime('%d/%m/%Y %H:%M')}</div></div>
 
     <div class="sts">
         <div class="st"><div class="st-n">{len(all_calls)}</div><div class="st-l">Total</div></div>
@@ -1042,7 +2929,7 @@ body{{font-family:'DM Sans',sans-serif;background:var(--bg);color:var(--tx);font
     </div>
 
     <div class="tbar">
-        <input class="srch" type="text" placeholder="Buscar por título, programa, tema..." oninput="fTx(this.value)">
+        <input class="srch" type="search" placeholder="Buscar por título, programa, tema..." oninput="fTx(this.value)">
         <button class="fb active" onclick="fR('all',this)">Todas</button>
         <button class="fb" onclick="fR('muy-alta',this)">🔴 Muy Alta</button>
         <button class="fb" onclick="fR('alta',this)">🔵 Alta+</button>
@@ -1053,8 +2940,10 @@ body{{font-family:'DM Sans',sans-serif;background:var(--bg);color:var(--tx);font
     {new_section}
 
     <table class="calls-table" id="mt"><thead><tr class="table-head"><th>Convocatoria</th><th class="th-dl">Deadline</th><th class="th-lk"></th></tr></thead>
-    <tbody id="cb">{all_rows}</tbody></table>
+    <tbody id="cb"></tbody></table>
+    <noscript><div class="nr" style="display:block">El listado necesita JavaScript: <a href="resultados_convocatorias.xlsx">descarga el Excel</a></div></noscript>
     <div class="nr" id="nr">No se encontraron convocatorias con esos filtros</div>
+    <button class="more" id="more">Mostrar más</button>
 
     <div class="res">
         <div class="rb r-eu"><strong>🇪🇺 Europa — Programas y convocatorias</strong><div class="rl">
@@ -1097,35 +2986,222 @@ body{{font-family:'DM Sans',sans-serif;background:var(--bg);color:var(--tx);font
 
     <div class="ftr">Funding Radar · Ayuntamiento de Bilbao · Fuentes: API SEDIA (EU) · BDNS (España) · euskadi.eus (Euskadi)</div>
 </div>
-<script>
-let aS='all',aR='all',sT='';
-function af(){{const rows=document.querySelectorAll('#cb .call-row');let v=0;rows.forEach(r=>{{let s=true;if(aS==='new')s=r.dataset.new==='1';else if(aS!=='all')s=r.dataset.source===aS;if(s&&aR!=='all'){{if(aR==='muy-alta')s=r.dataset.rel==='MUY ALTA';else if(aR==='alta')s=r.dataset.rel==='ALTA'||r.dataset.rel==='MUY ALTA'}}if(s&&sT){{const t=r.textContent.toLowerCase();s=sT.split(' ').every(w=>t.includes(w))}}r.style.display=s?'':'none';if(s)v++}});document.getElementById('nr').style.display=v===0?'block':'none';const ns=document.getElementById('new-section');if(ns)ns.style.display=(aS==='all'&&aR==='all'&&!sT)?'':'none'}}
-function fS(s,b){{aS=s;document.querySelectorAll('.tabs .tab').forEach(t=>t.classList.remove('active'));b.classList.add('active');af()}}
-function fR(r,b){{aR=r;document.querySelectorAll('.fb').forEach(x=>x.classList.remove('active'));b.classList.add('active');af()}}
-function fTx(v){{sT=v.toLowerCase().trim();af()}}
-</script></body></html>"""
+<script type="application/json" id="radar-data">{data}</script>
+<script>{HTML_REPORT_SCRIPT}</script></body></html>"""
 
     with open(CONFIG["output_html"], "w", encoding="utf-8") as f:
-        f.write(html)
-    return html
+        f.write(page)
+    return page
+
+
+# ──────────────────────────────────────────────
+# WEB ESTATICA (docs/)
+# ──────────────────────────────────────────────
+
+def write_precompressed(path, data):
+    """Escribe path y sus hermanos .gz (y .br si hay brotli), reproducibles.
+
+    Devuelve {sufijo: bytes}. Un .br de una ejecucion anterior se borra si
+    ahora no se puede regenerar, para no servir contenido viejo.
+    """
+    path = Path(path)
+    sizes = {"": len(data)}
+    variants = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if HAS_BROTLI:
+        variants.append((".br", lambda d: brotli.compress(d, quality=11)))
+    else:
+        Path(str(path) + ".br").unlink(missing_ok=True)
+    path.write_bytes(data)
+    for suffix, compress in variants:
+        packed = compress(data)
+        Path(str(path) + suffix).write_bytes(packed)
+        sizes[suffix] = len(packed)
+    return sizes
+
+
+def publish_site():
+    """Construye la web estatica en CONFIG["site_dir"] a partir de los informes.
+
+    index.html (con los titulos enlazados a calls/) y el JSON compacto llevan
+    al lado su .gz/.br para servidores que sirven precomprimido; el Excel se copia tal cual
+    (ya es un zip).
+    """
+    site = Path(CONFIG["site_dir"])
+    site.mkdir(parents=True, exist_ok=True)
+    page = Path(CONFIG["output_html"]).read_text(encoding="utf-8")
+    # En la web cada titulo enlaza a su ficha en calls/ (ver publish_call_pages)
+    page = page.replace("<body>", '<body data-fichas="calls/">', 1)
+    html_sizes = write_precompressed(site / "index.html", page.encode("utf-8"))
+    data = json.loads(Path(CONFIG["output_file"]).read_text(encoding="utf-8"))
+    json_sizes = write_precompressed(site / Path(CONFIG["output_file"]).name,
+                                     json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    if Path(CONFIG["output_excel"]).exists():
+        shutil.copyfile(CONFIG["output_excel"], site / Path(CONFIG["output_excel"]).name)
+
+    def fmt(name, original, sizes):
+        packed = " / ".join(f"{sizes[k] / 1024:.0f} KB {k[1:]}" for k in (".gz", ".br") if k in sizes)
+        return f"{name} {original / 1024:.0f} KB -> {packed}"
+
+    print(f"🌐 Web en {site}/: {fmt('index.html', html_sizes[''], html_sizes)}; "
+          f"{fmt('JSON', Path(CONFIG['output_file']).stat().st_size, json_sizes)}")
+    if not HAS_BROTLI:
+        print("   (brotli no instalado: solo .gz. pip install brotli)")
+
+
+# ──────────────────────────────────────────────
+# FICHAS WEB (docs/calls/)
+# ──────────────────────────────────────────────
+
+# Sube al cambiar render_call_page: invalida los hashes y se regeneran todas
+CALL_PAGE_VERSION = 1
+CALL_PAGES_MANIFEST = "manifest.json"
+_PAGE_NAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+CALL_PAGE_CSS = """
+:root{--sans:system-ui,-apple-system,'Segoe UI',Roboto,'Helvetica Neue',Arial,sans-serif;--bg:#F0F2F5;--card:#FFF;--bdr:#E4E7EC;--tx:#1A1D26;--tx2:#6B7280;--tx3:#9CA3AF;--eu:#1E40AF;--es:#B45309;--eus:#047857;--r:10px}
+*{box-sizing:border-box;margin:0;padding:0}
+body{font-family:var(--sans);background:var(--bg);color:var(--tx);font-size:14px}
+.ctn{max-width:820px;margin:0 auto;padding:16px}
+.back{display:inline-block;margin-bottom:12px;color:var(--eu);font-size:12px;font-weight:600;text-decoration:none}
+.card{background:var(--card);border:1px solid var(--bdr);border-radius:var(--r);overflow:hidden}
+.card h1{font-size:18px;line-height:1.35;padding:16px 18px;color:#fff;background:var(--eu)}
+.card.src-BDNS h1{background:var(--es)}.card.src-KontratazioA h1{background:var(--eus)}
+table{width:100%;border-collapse:collapse}
+th{width:170px;text-align:left;vertical-align:top;padding:8px 18px;font-size:11px;color:var(--tx2);text-transform:uppercase;letter-spacing:.04em}
+td{padding:8px 18px 8px 0;font-size:13px;line-height:1.5;white-space:pre-line;word-break:break-word}
+tr+tr{border-top:1px solid #F3F4F6}
+a{color:var(--eu)}
+.ftr{text-align:center;margin-top:14px;font-size:10px;color:var(--tx3)}
+"""
+
+
+def call_page_name(call_id):
+    """Nombre de fichero estable para el permalink de una convocatoria.
+
+    Los ids con caracteres fuera de [A-Za-z0-9._-] llevan un sufijo con su
+    hash, para que dos ids distintos no acaben en la misma pagina.
+    """
+    name = _PAGE_NAME_RE.sub("-", call_id).strip("-.")[:100]
+    if name != call_id:
+        name = f"{name}-{hashlib.sha1(call_id.encode('utf-8')).hexdigest()[:8]}"
+    return f"{name}.html"
+
+
+def call_page_hash(call):
+    """Hash del contenido de la ficha: si no cambia, la pagina tampoco."""
+    raw = json.dumps([CALL_PAGE_VERSION, call.source.value, call_card(call)], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def render_call_page(call):
+    """Pagina de detalle de una convocatoria, con los campos de call_card.
+
+    No lleva fecha de generacion: el contenido depende solo de la ficha,
+    asi una pagina sin cambios es identica byte a byte.
+    """
+    esc = html.escape
+    rows = []
+    for label, value in call_card(call):
+        if label == "Enlace al portal":
+            value = f'<a href="{esc(value)}" target="_blank" rel="noopener">{esc(value)}</a>' if value else "—"
+        else:
+            value = esc(str(value or "—"))
+        rows.append(f"<tr><th>{esc(label)}</th><td>{value}</td></tr>")
+    rows = "\n".join(rows)
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width,initial-scale=1.0">
+<title>{esc(call.id)} — Funding Radar Bilbao</title>
+<meta name="description" content="{esc(call.title[:200])}">
+<style>{CALL_PAGE_CSS}</style></head>
+<body>
+<div class="ctn">
+<a class="back" href="../index.html">← Todas las convocatorias</a>
+<div class="card src-{esc(call.source.value)}">
+<h1>{esc(call.title)}</h1>
+<table>
+{rows}
+</table>
+</div>
+<div class="ftr">EU Funding Radar · Ayuntamiento de Bilbao · Misión Climática 2030</div>
+</div>
+</body></html>"""
+
+
+def publish_call_pages(all_calls, skip_sources=()):
+    """Una pagina por convocatoria en <site_dir>/calls/, incremental.
+
+    manifest.json guarda id -> {file, hash, source}. Solo se escriben las
+    paginas nuevas o cuyo hash ha cambiado (o que faltan en disco), y se
+    borran las de convocatorias que ya no estan. Las de fuentes que han
+    fallado en esta ejecucion (skip_sources) se conservan: no se sabe si
+    siguen abiertas. Devuelve (escritas, borradas).
+    """
+    pages_dir = Path(CONFIG["site_dir"]) / "calls"
+    pages_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = pages_dir / CALL_PAGES_MANIFEST
+    try:
+        previous = json.loads(manifest_path.read_text(encoding="utf-8")).get("pages", {})
+    except (OSError, ValueError, AttributeError):
+        previous = {}
+
+    pages, written = {}, 0
+    for call_id in sorted(all_calls):
+        call = all_calls[call_id]
+        entry = {"file": call_page_name(call_id), "hash": call_page_hash(call), "source": call.source.value}
+        if previous.get(call_id) != entry or not (pages_dir / entry["file"]).exists():
+            write_precompressed(pages_dir / entry["file"], render_call_page(call).encode("utf-8"))
+            written += 1
+        pages[call_id] = entry
+
+    pruned = 0
+    for call_id, entry in previous.items():
+        if call_id in pages or not isinstance(entry, dict) or not entry.get("file"):
+            continue
+        if entry.get("source") in skip_sources:
+            pages[call_id] = entry
+            continue
+        for suffix in ("", ".gz", ".br"):
+            (pages_dir / (entry["file"] + suffix)).unlink(missing_ok=True)
+        pruned += 1
+
+    manifest = json.dumps({"version": CALL_PAGE_VERSION, "pages": dict(sorted(pages.items()))},
+                          ensure_ascii=False, indent=1)
+    if not manifest_path.exists() or manifest_path.read_text(encoding="utf-8") != manifest:
+        manifest_path.write_text(manifest, encoding="utf-8")
+    print(f"🗂️  Fichas web en {pages_dir}/: {written} generadas, {len(pages) - written} sin cambios, {pruned} retiradas")
+    return written, pruned
 
 # ──────────────────────────────────────────────
 # EMAIL
 # ──────────────────────────────────────────────
 
-def send_email(new_calls, all_calls):
+def send_email(new_calls, all_calls, changes=None, generated_at=None):
     if not CONFIG["email_to"] or not CONFIG["smtp_user"]:
         print("\n📧 Email no configurado.")
         return
-    if not new_calls:
+    modified = changes.modified if changes else {}
+    removed = changes.removed_calls() if changes else []
+    if not new_calls and not modified and not removed:
         return
 
-    subject = f"EU Funding Radar: {len(new_calls)} nuevas — {datetime.now().strftime('%d/%m/%Y')}"
+    day = (generated_at or run_timestamp()).astimezone().strftime('%d/%m/%Y')
+    summary = (f"{len(new_calls)} nuevas" + (f", {len(modified)} con cambios" if modified else "")
+               + (f", {len(removed)} retiradas" if removed else ""))
+    subject = f"EU Funding Radar: {summary} — {day}"
     items = ""
-    for c in sorted(new_calls.values(), key=lambda x: x.get("deadline", "9999")):
-        items += f'<div style="background:#F8FAFC;border:1px solid #E2E8F0;border-radius:8px;padding:12px;margin-bottom:8px"><strong>{c["title"][:100]}</strong><br><span style="font-size:11px;color:#64748B">{c["id"]}</span><br><span style="font-size:12px;color:#475569">{c["description"][:150]}</span><br><a href="{c["url"]}" style="color:#0057B7;font-size:12px">Ver en portal</a></div>'
-
-    body = f'<div style="font-family:sans-serif;max-width:600px;margin:0 auto"><div style="background:#0C1220;color:white;padding:20px;border-radius:12px 12px 0 0"><h1 style="font-size:18px;margin:0">EU Funding Radar</h1><p style="font-size:12px;color:#94A3B8;margin:4px 0 0">Bilbao · {datetime.now().strftime("%d/%m/%Y")}</p></div><div style="padding:20px;background:white;border:1px solid #E2E8F0;border-radius:0 0 12px 12px"><p style="margin-bottom:16px"><strong style="color:#DC2626">{len(new_calls)} convocatorias nuevas</strong></p>{items}</div></div>'
+    for c in sorted(new_calls.values(), key=lambda x: (x.deadline_key, x.id)):
+        items += f'<div style="background:#F8FAFC;border:1px solid #E2E8F0;border-radius:8px;padding:12px;margin-bottom:8px"><strong>{c.title[:100]}</strong><br><span style="font-size:11px;color:#64748B">{c.id}</span><br><span style="font-size:12px;color:#475569">{c.description[:150]}</span><br><a href="{c.url}" style="color:#0057B7;font-size:12px">Ver en portal</a></div>'
+    if modified:
+        items += f'<p style="margin:16px 0"><strong style="color:#1E40AF">{len(modified)} convocatorias con cambios</strong></p>'
+        for c in sorted(modified.values(), key=lambda x: (x.deadline_key, x.id)):
+            diff = changes.describe(c.id, sep="<br>")
+            items += f'<div style="background:#EFF6FF;border:1px solid #BFDBFE;border-radius:8px;padding:12px;margin-bottom:8px"><strong>{c.title[:100]}</strong><br><span style="font-size:11px;color:#64748B">{c.id}</span><br><span style="font-size:12px;color:#1E40AF">{diff}</span><br><a href="{c.url}" style="color:#0057B7;font-size:12px">Ver en portal</a></div>'
+    if removed:
+        items += f'<p style="margin:16px 0"><strong style="color:#6B7280">{len(removed)} convocatorias retiradas</strong></p>'
+        for c in removed:
+            items += f'<div style="background:#F9FAFB;border:1px solid #E5E7EB;border-radius:8px;padding:12px;margin-bottom:8px"><strong>{c.title[:100]}</strong><br><span style="font-size:11px;color:#64748B">{c.id} · deadline {c.deadline_text or "—"}</span><br><a href="{c.url}" style="color:#0057B7;font-size:12px">Ver en portal</a></div>'
+
+    body = f'<div style="font-family:sans-serif;max-width:600px;margin:0 auto"><div style="background:#0C1220;color:white;padding:20px;border-radius:12px 12px 0 0"><h1 style="font-size:18px;margin:0">EU Funding Radar</h1><p style="font-size:12px;color:#94A3B8;margin:4px 0 0">Bilbao · {day}</p></div><div style="padding:20px;background:white;border:1px solid #E2E8F0;border-radius:0 0 12px 12px"><p style="margin-bottom:16px"><strong style="color:#DC2626">{len(new_calls)} convocatorias nuevas</strong></p>{items}</div></div>'
 
     try:
         msg = MIMEMultipart("alternative")
@@ -1183,17 +3259,122 @@ BDNS_TEMAS_OK = [
     "municipio", "ayuntamiento", "entidad local", "corporacion local",
 ]
 
+# Pre-filtro del listado: organos locales / autonomicos vascos (campo nivel2)
+BDNS_LOCAL_EUSKADI = [
+    "bilbao", "bizkaia", "vizcaya", "vitoria", "gasteiz",
+    "donostia", "san sebastian", "gipuzkoa", "guipuzcoa", "alava", "araba",
+    "euskadi", "pais vasco", "gobierno vasco", "diputacion foral",
+]
+BDNS_AUTONOMICO_EUSKADI = ["euskadi", "pais vasco", "gobierno vasco", "eve", "ihobe", "spri"]
+
+# Niveles de relevancia BDNS
+BDNS_MUY_ALTA_KW = ["municipio", "ayuntamiento", "entidad local", "corporacion local",
+                    "bilbao", "euskadi", "pais vasco", "bizkaia", "vizcaya"]
+BDNS_ALTA_KW = ["energia", "renovable", "climatico", "clima", "eficiencia", "movilidad",
+                "rehabilitacion", "residuo", "emision", "descarbonizacion", "urbano", "urbana"]
+
+BDNS_RELEVANCE_TIERS = [(BDNS_MUY_ALTA_KW, "MUY ALTA"), (BDNS_ALTA_KW, "ALTA")]
+
+
+class BdnsDetailCache:
+    """Cache en disco de detalles BDNS por numConv.
+
+    Guarda el JSON crudo, un hash del contenido y la fecha de descarga.
+    Las entradas caducan por TTL, por fechaFinSolicitud pasada o, si se
+    supera max_entries, por LRU (las menos usadas recientemente primero).
+    """
+
+    def __init__(self, path, ttl_days=3, max_entries=5000):
+        self.path = Path(path)
+        self.ttl = timedelta(days=ttl_days)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # numConv -> entrada, de menos a mas reciente
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        cache = cls(path, **kwargs)
+        if cache.path.exists():
+            try:
+                with open(cache.path, "r", encoding="utf-8") as f:
+                    cache._entries = OrderedDict(json.load(f))
+            except (OSError, ValueError):
+                cache._entries = OrderedDict()
+        cache.evict()
+        return cache
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _is_stale(self, entry, now):
+        try:
+            fetched = datetime.fromisoformat(entry["fetched_at"])
+        except (KeyError, ValueError):
+            return True
+        if now - fetched > self.ttl:
+            return True
+        fecha_fin = (entry.get("data") or {}).get("fechaFinSolicitud", "")
+        if fecha_fin and fecha_fin < now.strftime("%Y-%m-%d"):
+            return True
+        return False
+
+    def get(self, num_conv):
+        key = str(num_conv)
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_stale(entry, now):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["data"]
+
+    def put(self, num_conv, data):
+        raw = json.dumps(data, ensure_ascii=False, sort_keys=True)
+        entry = {
+            "data": data,
+            "hash": hashlib.sha256(raw.encode("utf-8")).hexdigest(),
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self._entries[str(num_conv)] = entry
+            self._entries.move_to_end(str(num_conv))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self):
+        """Elimina entradas caducadas (TTL o plazo vencido). Devuelve cuantas."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            stale = [k for k, v in self._entries.items() if self._is_stale(v, now)]
+            for k in stale:
+                del self._entries[k]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return len(stale)
+
+    def save(self):
+        self.evict()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
 
 def fetch_bdns_detail(num_conv):
     """Obtiene el detalle de una convocatoria BDNS por su numero"""
     try:
         url = f"https://www.infosubvenciones.es/bdnstrans/api/convocatorias?numConv={num_conv}&vpd=GE"
-        req = urllib.request.Request(url, headers={
+        return HTTP.get(url, headers={
             "Accept": "application/json",
             "User-Agent": "EU-Funding-Radar/1.0"
-        })
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            return json.loads(resp.read().decode("utf-8"))
+        }).json()
     except:
         return None
 
@@ -1211,10 +3392,8 @@ def is_region_relevant(detail):
         return False
 
     for r in regiones:
-        desc = r.get("descripcion", "").lower()
-        for ok in BDNS_REGIONES_OK:
-            if ok in desc:
-                return True
+        if contains_any(fold_text(r.get("descripcion", "")), BDNS_REGIONES_OK):
+            return True
 
     # Si tiene muchas regiones (>10), probablemente es nacional
     if len(regiones) > 10:
@@ -1225,181 +3404,333 @@ def is_region_relevant(detail):
 
 def is_tema_relevant(detail):
     """Comprueba si la tematica es relevante para clima/energia/sostenibilidad"""
-    titulo = detail.get("descripcion", "").lower()
-    finalidad = detail.get("descripcionFinalidad", "").lower()
-    bases = detail.get("descripcionBasesReguladoras", "").lower()
-    fondos = " ".join([f.get("descripcion", "") for f in detail.get("fondos", [])]).lower()
-    text = f"{titulo} {finalidad} {bases} {fondos}"
+    titulo = detail.get("descripcion", "")
+    finalidad = detail.get("descripcionFinalidad", "")
+    bases = detail.get("descripcionBasesReguladoras", "")
+    fondos = " ".join([f.get("descripcion", "") for f in detail.get("fondos", [])])
+    return contains_any(fold_text(f"{titulo} {finalidad} {bases} {fondos}"), BDNS_TEMAS_OK)
 
-    for kw in BDNS_TEMAS_OK:
-        if kw in text:
-            return True
-    return False
 
+def bdns_prefilter(conv):
+    """Pre-filtro rapido sobre el listado: descarta locales/autonomicas de otra region"""
+    nivel1 = (conv.get("nivel1", "") or "").upper()
+    nivel2 = fold_text(conv.get("nivel2", ""))
 
-def fetch_bdns_calls():
-    """Consulta las ultimas 200 convocatorias de la BDNS y filtra por region + tema"""
-    today = datetime.now(timezone.utc)
+    es_local = nivel1 == "LOCAL"
+    es_euskadi_local = es_local and contains_any(nivel2, BDNS_LOCAL_EUSKADI)
+    es_autonomico = nivel1 == "AUTONOMICO" or nivel1 == "AUTONÓMICO"
+    es_euskadi_auto = es_autonomico and contains_any(nivel2, BDNS_AUTONOMICO_EUSKADI)
 
-    print(f"\n🇪🇸 BDNS -- Base de Datos Nacional de Subvenciones")
-    print(f"{'='*50}")
+    # Solo pasar: locales de Euskadi, estatales, autonomicas vascas
+    if es_local and not es_euskadi_local:
+        return False
+    if es_autonomico and not es_euskadi_auto:
+        return False
+    return True
 
-    # Paso 1: Recoger las ultimas 500 convocatorias con pre-filtro
-    all_nums = []
-    prefiltro_skip = 0
-    for page in range(10):  # 10 paginas x 50 = 500
-        try:
-            url = f"https://www.infosubvenciones.es/bdnstrans/api/convocatorias/busqueda?page={page}&pageSize=50&vpd=GE"
-            req = urllib.request.Request(url, headers={
-                "Accept": "application/json",
-                "User-Agent": "EU-Funding-Radar/1.0"
-            })
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-            content = data.get("content", [])
-            for conv in content:
-                num = str(conv.get("numeroConvocatoria", ""))
-                if not num:
-                    continue
-                # Pre-filtro rapido: nivel1 + nivel2 + descripcion
-                nivel1 = (conv.get("nivel1", "") or "").upper()
-                nivel2 = (conv.get("nivel2", "") or "").lower()
-                desc = (conv.get("descripcion", "") or "").lower()
-
-                # Descartar rapido si es local de otra region
-                es_local = nivel1 == "LOCAL"
-                es_euskadi_local = any(kw in nivel2 for kw in ["bilbao", "bizkaia", "vizcaya", "vitoria", "gasteiz",
-                    "donostia", "san sebastian", "gipuzkoa", "guipuzcoa", "alava", "araba",
-                    "euskadi", "pais vasco", "gobierno vasco", "diputacion foral"])
-                es_estatal = nivel1 in ["ESTATAL", "AGE"]
-                es_autonomico = nivel1 == "AUTONOMICO" or nivel1 == "AUTONÓMICO"
-                es_euskadi_auto = es_autonomico and any(kw in nivel2 for kw in ["euskadi", "pais vasco", "gobierno vasco", "eve", "ihobe", "spri"])
-                es_otros_nacional = nivel1 in ["OTROS", "UNIVERSIDAD"]
-
-                # Solo pasar: locales de Euskadi, estatales, autonomicas vascas
-                if es_local and not es_euskadi_local:
-                    prefiltro_skip += 1
-                    continue
-                if es_autonomico and not es_euskadi_auto:
-                    prefiltro_skip += 1
-                    continue
 
-                all_nums.append(num)
-        except Exception as e:
-            print(f"  ⚠️  Error pagina {page}: {str(e)[:40]}")
-
-    print(f"🔍 500 ultimas convocatorias escaneadas")
-    print(f"   Pre-filtro: {prefiltro_skip} descartadas (local/autonomica de otra region)")
-    print(f"   Candidatas para detalle: {len(all_nums)}")
-    print(f"🔍 Consultando detalle...\n")
-
-    print(f"🔍 Ultimas 500 convocatorias registradas")
-    print(f"🔍 Consultando detalle y filtrando por Pais Vasco / Nacional...\n")
-
-    bdns_calls = {}
-    checked = 0
-    skipped_region = 0
-    skipped_tema = 0
-    skipped_closed = 0
-    open_count = 0
-
-    for num_conv in all_nums:
-        checked += 1
-        if checked % 50 == 0:
-            print(f"  ... {checked}/{len(all_nums)} consultadas | {open_count} relevantes | {skipped_region} fuera de region | {skipped_tema} tema no relevante | {skipped_closed} cerradas", flush=True)
-
-        detail = fetch_bdns_detail(num_conv)
-        if not detail:
-            continue
+def fetch_bdns_page(page, page_size=50):
+    """Descarga una pagina del listado de convocatorias BDNS (mas recientes primero)"""
+    url = f"https://www.infosubvenciones.es/bdnstrans/api/convocatorias/busqueda?page={page}&pageSize={page_size}&vpd=GE"
+    return HTTP.get(url, headers={
+        "Accept": "application/json",
+        "User-Agent": "EU-Funding-Radar/1.0"
+    }).json()
 
-        # Filtro 1: Region (Pais Vasco o Nacional)
-        if not is_region_relevant(detail):
-            skipped_region += 1
-            continue
 
-        # Filtro 2: Tema relevante
-        if not is_tema_relevant(detail):
-            skipped_tema += 1
-            continue
+def build_bdns_call(num_conv, detail, today):
+    """Aplica los filtros region/tema/plazo a un detalle BDNS.
 
-        # Filtro 3: Plazo abierto
-        fecha_fin = detail.get("fechaFinSolicitud", "")
-        abierto = detail.get("abierto", False)
-        deadline_str = ""
+    Devuelve (call, None) si es relevante o (None, motivo) con motivo en
+    "region", "tema" o "cerrada".
+    """
+    # Filtro 1: Region (Pais Vasco o Nacional)
+    if not is_region_relevant(detail):
+        return None, "region"
 
-        if fecha_fin:
-            try:
-                dt = datetime.strptime(fecha_fin, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-                if dt < today:
-                    skipped_closed += 1
-                    continue
-                deadline_str = dt.strftime("%d/%m/%Y")
-            except:
-                pass
+    # Filtro 2: Tema relevante
+    if not is_tema_relevant(detail):
+        return None, "tema"
 
-        if not abierto and not deadline_str:
-            skipped_closed += 1
-            continue
+    # Filtro 3: Plazo abierto
+    fecha_fin = detail.get("fechaFinSolicitud", "")
+    abierto = detail.get("abierto", False)
+    deadline = None
 
-        # Extraer datos
-        titulo = detail.get("descripcion", "Sin titulo")
-        organo = detail.get("organo", {})
-        organismo = organo.get("nivel2", organo.get("nivel1", ""))
-        presupuesto = detail.get("presupuestoTotal", "")
-
-        regiones = detail.get("regiones", [])
-        regiones_str = ", ".join([r.get("descripcion", "") for r in regiones[:3]])
-
-        beneficiarios = detail.get("tiposBeneficiarios", [])
-        benef_str = ", ".join([b.get("descripcion", "") for b in beneficiarios[:2]])
-
-        fondos = detail.get("fondos", [])
-        fondos_str = ", ".join([f.get("descripcion", "") for f in fondos[:2]])
-
-        url_conv = f"https://www.infosubvenciones.es/bdnstrans/GE/es/convocatoria/{num_conv}"
-
-        # Relevancia
-        text_lower = f"{titulo} {organismo} {regiones_str} {benef_str}".lower()
-        relevance = "MEDIA"
-        muy_alta_kw = ["municipio", "ayuntamiento", "entidad local", "corporacion local",
-                       "bilbao", "euskadi", "pais vasco", "bizkaia", "vizcaya"]
-        alta_kw = ["energia", "renovable", "climatico", "clima", "eficiencia", "movilidad",
-                   "rehabilitacion", "residuo", "emision", "descarbonizacion", "urbano", "urbana"]
-        for kw in muy_alta_kw:
-            if kw in text_lower:
-                relevance = "MUY ALTA"
-                break
-        if relevance != "MUY ALTA":
-            for kw in alta_kw:
-                if kw in text_lower:
-                    relevance = "ALTA"
-                    break
+    if fecha_fin:
+        deadline = _iso_date(fecha_fin)
+        # Vence a las 00:00 UTC del dia de fin
+        if deadline and deadline <= today.date():
+            return None, "cerrada"
 
-        bdns_id = f"BDNS-{num_conv}"
-        bdns_calls[bdns_id] = {
-            "id": bdns_id,
-            "title": titulo[:200],
-            "description": f"{benef_str}. {fondos_str}. Regiones: {regiones_str}".strip(". "),
-            "status": "Open" if abierto else "Open",
-            "deadline": deadline_str,
-            "url": url_conv,
-            "programme": organismo[:60] if organismo else "BDNS",
-            "budget": f"{presupuesto:,.2f} EUR" if isinstance(presupuesto, (int, float)) and presupuesto > 0 else "",
-            "action_type": "Subvencion Nacional",
-            "call_id": f"BDNS {num_conv}",
-            "tags": fondos_str,
-            "source": "BDNS",
-            "relevance_level": relevance,
-        }
-        open_count += 1
+    if not abierto and not deadline:
+        return None, "cerrada"
 
-    print(f"\n📊 BDNS resumen:")
-    print(f"   Consultadas: {checked}")
-    print(f"   Fuera de region: {skipped_region}")
-    print(f"   Tema no relevante: {skipped_tema}")
-    print(f"   Cerradas/sin plazo: {skipped_closed}")
-    print(f"   ✅ Relevantes abiertas: {open_count}")
-    return bdns_calls
+    # Extraer datos
+    titulo = detail.get("descripcion", "Sin titulo")
+    organo = detail.get("organo", {})
+    organismo = organo.get("nivel2", organo.get("nivel1", ""))
+    presupuesto = detail.get("presupuestoTotal", "")
+
+    regiones = detail.get("regiones", [])
+    regiones_str = ", ".join([r.get("descripcion", "") for r in regiones[:3]])
+
+    beneficiarios = detail.get("tiposBeneficiarios", [])
+    benef_str = ", ".join([b.get("descripcion", "") for b in beneficiarios[:2]])
+
+    fondos = detail.get("fondos", [])
+    fondos_str = ", ".join([f.get("descripcion", "") for f in fondos[:2]])
+
+    url_conv = f"https://www.infosubvenciones.es/bdnstrans/GE/es/convocatoria/{num_conv}"
+
+    # Relevancia
+    relevance = tiered_relevance(fold_text(f"{titulo} {organismo} {regiones_str} {benef_str}"),
+                                 BDNS_RELEVANCE_TIERS, "MEDIA")
+
+    budget = _euros_to_cents(presupuesto) if isinstance(presupuesto, (int, float)) and presupuesto > 0 else None
+    return Call(
+        id=f"BDNS-{num_conv}",
+        title=titulo[:200],
+        source=CallSource.BDNS,
+        description=f"{benef_str}. {fondos_str}. Regiones: {regiones_str}".strip(". "),
+        status=CallStatus.OPEN,
+        deadline=deadline,
+        url=url_conv,
+        programme=organismo[:60] if organismo else "BDNS",
+        budget_min=budget,
+        budget_max=budget,
+        action_type="Subvencion Nacional",
+        call_id=f"BDNS {num_conv}",
+        tags=fondos_str,
+        relevance=Relevance(relevance),
+    ), None
+
+
+def load_bdns_state():
+    """Marca de agua del listado BDNS + candidatas abiertas de ejecuciones previas"""
+    path = Path(CONFIG["cache_dir"]) / "bdns_state.json"
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_bdns_state(state):
+    path = Path(CONFIG["cache_dir"]) / "bdns_state.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Escritura atomica: si la fuente se abandona por timeout, el proceso
+    # puede terminar en mitad del guardado
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _bdns_num(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class BdnsSource(Source):
+    """Convocatorias BDNS nuevas desde la ultima ejecucion, filtradas por region + tema.
+
+    Sincronizacion incremental: se pagina el listado (mas recientes primero)
+    hasta cruzar la marca de agua guardada (numeroConvocatoria / fechaRecepcion).
+    Las candidatas relevantes de ejecuciones anteriores se vuelven a evaluar
+    (normalmente desde la cache de detalles) para no perder las que siguen abiertas.
+
+    Productor/consumidor: un hilo recorre el listado y mete los numeros
+    candidatos en una cola acotada; un pool de workers descarga el detalle.
+    items() entrega los detalles en el orden del listado en cuanto llega el
+    siguiente, y parse aplica los filtros region/tema/plazo.
+    """
+    name = "bdns"
+
+    def __init__(self, today=None):
+        self.today = today or run_timestamp()
+        self.workers = max(1, CONFIG["bdns_workers"])
+
+        state = load_bdns_state()
+        self.wm_num = _bdns_num(state.get("numero"))
+        self.wm_fecha = state.get("fecha", "")
+        self.carried = [str(n) for n in state.get("candidatas", [])]
+        self.pages = CONFIG["bdns_max_pages"] if self.wm_num else CONFIG["bdns_pages"]
+
+        self.cache = BdnsDetailCache.load(
+            Path(CONFIG["cache_dir"]) / "bdns_details.json",
+            ttl_days=CONFIG["bdns_cache_ttl_days"],
+            max_entries=CONFIG["bdns_cache_max_entries"],
+        )
+        self.lock = threading.Lock()
+        self.stats = {"candidatas": 0, "prefiltro": 0, "checked": 0, "region": 0, "tema": 0, "cerrada": 0, "open": 0}
+        self.keep = set()  # candidatas a revisar en la proxima ejecucion
+        self.listing = {"pages": 0, "errors": 0, "crossed": False, "numero": self.wm_num, "fecha": self.wm_fecha}
+
+    def items(self):
+        wm_num, wm_fecha, pages, workers = self.wm_num, self.wm_fecha, self.pages, self.workers
+        stats, listing, lock = self.stats, self.listing, self.lock
+
+        print(f"\n🇪🇸 BDNS -- Base de Datos Nacional de Subvenciones")
+        print(f"{'='*50}")
+        if wm_num:
+            print(f"🔍 Convocatorias posteriores a la n.º {wm_num} ({wm_fecha or 's/f'}), max. {pages * 50} ({workers} workers)")
+            print(f"🔍 {len(self.carried)} candidatas de ejecuciones anteriores a revisar")
+        else:
+            print(f"🔍 Ultimas {pages * 50} convocatorias registradas ({workers} workers)")
+        print(f"🔍 Consultando detalle y filtrando por Pais Vasco / Nacional...\n")
+
+        work = queue.Queue(maxsize=CONFIG["bdns_queue_size"])
+        done = queue.Queue()  # (orden, (num, detalle)) y al final (None, total)
+
+        # Paso 1 (productor): recorrer el listado con pre-filtro hasta la marca de agua
+        def producer():
+            order = 0
+            queued = set()
+            try:
+                for page in range(pages):
+                    try:
+                        data = fetch_bdns_page(page)
+                    except Exception as e:
+                        listing["errors"] += 1
+                        print(f"  ⚠️  Error pagina {page}: {str(e)[:40]}")
+                        continue
+                    listing["pages"] += 1
+                    content = data.get("content", [])
+                    for conv in content:
+                        num = str(conv.get("numeroConvocatoria", ""))
+                        if not num:
+                            continue
+                        fecha = str(conv.get("fechaRecepcion", "") or "")[:10]
+                        if wm_num and (_bdns_num(num) <= wm_num or (fecha and wm_fecha and fecha < wm_fecha)):
+                            listing["crossed"] = True
+                            continue
+                        listing["numero"] = max(listing["numero"], _bdns_num(num))
+                        listing["fecha"] = max(listing["fecha"], fecha)
+                        if not bdns_prefilter(conv):
+                            with lock:
+                                stats["prefiltro"] += 1
+                            continue
+                        with lock:
+                            stats["candidatas"] += 1
+                        queued.add(num)
+                        work.put((order, num))
+                        order += 1
+                    if listing["crossed"] or not content:
+                        break
+
+                # Candidatas abiertas de ejecuciones anteriores (detalle casi siempre en cache)
+                for num in self.carried:
+                    if num not in queued:
+                        queued.add(num)
+                        work.put((order, num))
+                        order += 1
+            finally:
+                for _ in range(workers):
+                    work.put(None)
+                done.put((None, order))
+
+        # Paso 2 (consumidores): detalle, de cache o descargado
+        def consumer():
+            while True:
+                job = work.get()
+                if job is None:
+                    return
+                order, num_conv = job
+                detail = None
+                try:
+                    detail = self.cache.get(num_conv)
+                    if detail is None:
+                        detail = fetch_bdns_detail(num_conv)
+                        if detail:
+                            self.cache.put(num_conv, detail)
+                finally:
+                    done.put((order, (num_conv, detail)))
+
+        threads = [threading.Thread(target=producer, name="bdns-listado", daemon=True)]
+        threads += [threading.Thread(target=consumer, name=f"bdns-detalle-{i}", daemon=True) for i in range(workers)]
+        for t in threads:
+            t.start()
+
+        # Orden determinista: el del listado BDNS (se reordena lo que llega)
+        pending = {}
+        next_order, total = 0, None
+        while total is None or next_order < total:
+            order, payload = done.get()
+            if order is None:
+                total = payload
+                continue
+            pending[order] = payload
+            while next_order in pending:
+                yield pending.pop(next_order)
+                next_order += 1
+        for t in threads:
+            t.join()
+
+    def parse(self, item):
+        # Filtros region/tema/plazo
+        num_conv, detail = item
+        stats = self.stats
+        stats["checked"] += 1
+        call, reason = build_bdns_call(num_conv, detail, self.today) if detail else (None, None)
+        if call:
+            self.keep.add(num_conv)
+            stats["open"] += 1
+        elif reason:
+            stats[reason] += 1
+        else:
+            self.keep.add(num_conv)  # fallo de descarga: reintentar la proxima vez
+        if stats["checked"] % 50 == 0:
+            print(f"  ... {stats['checked']} consultadas | {stats['open']} relevantes | {stats['region']} fuera de region | {stats['tema']} tema no relevante | {stats['cerrada']} cerradas", flush=True)
+        return call
+
+    def close(self, summary):
+        stats, listing, cache = self.stats, self.listing, self.cache
+
+        # La marca de agua solo avanza si el listado se leyo sin huecos hasta
+        # cruzarla (o en la primera ejecucion). Si se agoto bdns_max_pages
+        # antes, se conserva la anterior: lo que queda entre la ultima pagina
+        # leida y ella se vuelve a listar la proxima vez (el detalle de lo ya
+        # visto sale de la cache)
+        new_state = {"numero": self.wm_num, "fecha": self.wm_fecha, "candidatas": sorted(self.keep, key=_bdns_num)}
+        if not listing["errors"] and (listing["crossed"] or not self.wm_num):
+            new_state["numero"], new_state["fecha"] = listing["numero"], listing["fecha"]
+        if HTTP.closed:
+            # Fuente abandonada por timeout: la ejecucion ya termino sin ella y
+            # este recorrido esta incompleto, se conserva el estado anterior
+            print(f"  ⚠️  BDNS abandonada: no se guarda su estado")
+            return
+        try:
+            cache.save()
+            save_bdns_state(new_state)
+        except OSError as e:
+            print(f"  ⚠️  No se pudo guardar la cache BDNS: {e}")
+
+        print(f"\n📊 BDNS resumen:")
+        crossed = "marca de agua alcanzada" if listing["crossed"] else "limite de paginas" if self.wm_num else "ventana inicial"
+        print(f"   Listado: {listing['pages']} paginas ({crossed}), marca de agua n.º {new_state['numero']}")
+        if self.wm_num and not listing["crossed"] and not listing["errors"]:
+            print(f"   ⚠️  Se alcanzo el limite de {self.pages} paginas sin cruzar la marca de agua: "
+                  f"se mantiene la anterior (sube RADAR_BDNS_MAX_PAGES si se repite)")
+        print(f"   Pre-filtro: {stats['prefiltro']} descartadas (local/autonomica de otra region)")
+        print(f"   Candidatas para detalle: {stats['candidatas']}")
+        print(f"   Consultadas: {stats['checked']}")
+        print(f"   Fuera de region: {stats['region']}")
+        print(f"   Tema no relevante: {stats['tema']}")
+        print(f"   Cerradas/sin plazo: {stats['cerrada']}")
+        print(f"   Cache detalles: {cache.hits} aciertos, {cache.misses} descargas ({len(cache)} en cache)")
+        METRICS.count("bdns_detail_cache_hits", cache.hits)
+        METRICS.count("bdns_detail_cache_misses", cache.misses)
+        print(f"   ✅ Relevantes abiertas: {stats['open']}")
+
+
+def fetch_bdns_calls():
+    """Consulta la BDNS y devuelve las convocatorias abiertas relevantes."""
+    return collect(BdnsSource())
 
 
 # ──────────────────────────────────────────────
@@ -1424,6 +3755,16 @@ EUSKADI_TEMAS_OK = [
     "saneamiento", "depuracion", "pluvial", "drenaje",
 ]
 
+# Niveles de relevancia Euskadi
+EUSKADI_MUY_ALTA_KW = ["bilbao", "ayuntamiento", "municipio"]
+EUSKADI_ALTA_KW = ["energia", "renovable", "clima", "eficiencia", "movilidad",
+                   "rehabilitacion", "residuo", "emision", "sostenible", "descarbonizacion"]
+
+# Resultado del buscador: <em class="r01srItemDocName"><a href="/ayuda_subvencion/...">titulo</a></em>
+EUSKADI_RESULT_RE = re.compile(
+    r'<a\s+href="(/(?:ayuda_subvencion|anuncio_contratacion)/[^"]+)"[^>]*>([^<]+)</a>', re.IGNORECASE)
+EUSKADI_RELEVANCE_TIERS = [(EUSKADI_MUY_ALTA_KW, "MUY ALTA"), (EUSKADI_ALTA_KW, "ALTA")]
+
 # Busquedas tematicas para el buscador de euskadi.eus
 EUSKADI_SEARCH_QUERIES = [
     # (tipo_tramite, keyword)
@@ -1450,36 +3791,42 @@ EUSKADI_SEARCH_QUERIES = [
 ]
 
 
-def fetch_kontratazioa_calls():
-    """Consulta licitaciones y ayudas de Euskadi via API de euskadi.eus"""
-    today = datetime.now(timezone.utc)
-
-    print(f"\n🟢 Euskadi -- Contrataciones y Ayudas del Sector Publico Vasco")
-    print(f"{'='*50}")
-
-    eus_calls = {}
-
-    # ──── ESTRATEGIA 1: API eventos administrativos ────
-    # Patron: api.euskadi.eus/{domain}/{version}/{resource}
-    api_endpoints = [
-        # Eventos administrativos (contrataciones + ayudas)
-        "https://api.euskadi.eus/administration/events/v1.0/events/byType/anuncio_contratacion?_page=1&_pageSize=100",
-        "https://api.euskadi.eus/administration/v1.0/events/byType/anuncio_contratacion?_page=1&_pageSize=100",
-        # Subvenciones / ayudas
-        "https://api.euskadi.eus/administration/events/v1.0/events/byType/ayuda_subvencion?_page=1&_pageSize=100",
-        "https://api.euskadi.eus/administration/v1.0/events/byType/ayuda_subvencion?_page=1&_pageSize=100",
-    ]
+class EuskadiSource(Source):
+    """Licitaciones y ayudas de Euskadi via API y buscador de euskadi.eus.
 
-    api_data_found = False
-    for url in api_endpoints:
-        try:
-            req = urllib.request.Request(url, headers={
-                "Accept": "application/json",
-                "User-Agent": "EU-Funding-Radar/1.0"
-            })
-            with urllib.request.urlopen(req, timeout=20) as resp:
-                raw = resp.read().decode("utf-8")
-                data = json.loads(raw)
+    Los elementos en bruto van etiquetados con su origen: ("api", item),
+    ("web", url, titulo, busqueda) y ("dataset", item).
+    """
+    name = "euskadi"
+
+    def __init__(self, today=None):
+        self.today = today or run_timestamp()
+        self.relevant = 0
+
+    def items(self):
+        print(f"\n🟢 Euskadi -- Contrataciones y Ayudas del Sector Publico Vasco")
+        print(f"{'='*50}")
+
+        # ──── ESTRATEGIA 1: API eventos administrativos ────
+        # Patron: api.euskadi.eus/{domain}/{version}/{resource}
+        api_endpoints = [
+            # Eventos administrativos (contrataciones + ayudas)
+            "https://api.euskadi.eus/administration/events/v1.0/events/byType/anuncio_contratacion?_page=1&_pageSize=100",
+            "https://api.euskadi.eus/administration/v1.0/events/byType/anuncio_contratacion?_page=1&_pageSize=100",
+            # Subvenciones / ayudas
+            "https://api.euskadi.eus/administration/events/v1.0/events/byType/ayuda_subvencion?_page=1&_pageSize=100",
+            "https://api.euskadi.eus/administration/v1.0/events/byType/ayuda_subvencion?_page=1&_pageSize=100",
+        ]
+
+        api_data_found = False
+        for url in api_endpoints:
+            tipo = "contratacion" if "contratacion" in url else "ayuda"
+            try:
+                resp = HTTP.get(url, headers={
+                    "Accept": "application/json",
+                    "User-Agent": "EU-Funding-Radar/1.0"
+                })
+                data = resp.json()
                 items = []
                 if isinstance(data, list):
                     items = data
@@ -1488,160 +3835,134 @@ def fetch_kontratazioa_calls():
                         if key in data and isinstance(data[key], list):
                             items = data[key]
                             break
+            except Exception as e:
+                print(f"  ⚠️  API eventos ({tipo}): {str(e)[:60]}")
+                continue
 
-                tipo = "contratacion" if "contratacion" in url else "ayuda"
-                print(f"  ✓ API eventos ({tipo}): {len(items)} items")
-                api_data_found = True
+            print(f"  ✓ API eventos ({tipo}): {len(items)} items")
+            api_data_found = True
+            for item in items:
+                yield ("api", item)
 
-                for item in items:
-                    parsed = parse_euskadi_item(item, today)
-                    if parsed:
-                        eus_calls[parsed["id"]] = parsed
+        # ──── ESTRATEGIA 2: Buscador euskadi.eus (contenido web) ────
+        if not api_data_found:
+            print(f"  API eventos no disponible. Usando buscador web...")
 
-        except Exception as e:
-            err = str(e)[:60]
-            tipo = "contratacion" if "contratacion" in url else "ayuda"
-            print(f"  ⚠️  API eventos ({tipo}): {err}")
+        print(f"🔍 Buscando en euskadi.eus ({len(EUSKADI_SEARCH_QUERIES)} busquedas)...")
+        seen_urls = set()
+        for i, (tipo, kw) in enumerate(EUSKADI_SEARCH_QUERIES, 1):
+            try:
+                encoded_kw = urllib.parse.quote(kw)
+                # URL del buscador de tramites de euskadi.eus
+                search_url = (
+                    f"https://www.euskadi.eus/gobierno-vasco/tramites-servicios/"
+                    f"?r01kQry=tT:{tipo};tC:{encoded_kw}"
+                )
+                resp = HTTP.get(search_url, headers={
+                    "Accept": "text/html, */*",
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                })
+                # euskadi.eus usa ISO-8859-1 / Latin-1 (charset del Content-Type,
+                # y si no lo declara se prueba UTF-8 y luego Latin-1)
+                raw = resp.text()
+
+                results = EUSKADI_RESULT_RE.findall(raw)
+            except Exception as e:
+                print(f"  [{i}/{len(EUSKADI_SEARCH_QUERIES)}] {kw}... ⚠️ {str(e)[:40]}")
+                continue
 
-    # ──── ESTRATEGIA 2: Buscador euskadi.eus (contenido web) ────
-    if not api_data_found:
-        print(f"  API eventos no disponible. Usando buscador web...")
+            before = self.relevant
+            for url_path, title_raw in results:
+                title_clean = title_raw.strip()
+                if len(title_clean) < 15:
+                    continue
+                full_url = f"https://www.euskadi.eus{url_path}"
+                if full_url in seen_urls:
+                    continue
+                seen_urls.add(full_url)
+                yield ("web", full_url, title_clean, kw)
 
-    print(f"🔍 Buscando en euskadi.eus ({len(EUSKADI_SEARCH_QUERIES)} busquedas)...")
-    seen_urls = set()
-    for i, (tipo, kw) in enumerate(EUSKADI_SEARCH_QUERIES, 1):
-        try:
-            encoded_kw = urllib.parse.quote(kw)
-            # URL del buscador de tramites de euskadi.eus
-            search_url = (
-                f"https://www.euskadi.eus/gobierno-vasco/tramites-servicios/"
-                f"?r01kQry=tT:{tipo};tC:{encoded_kw}"
-            )
-            req = urllib.request.Request(search_url, headers={
-                "Accept": "text/html, */*",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            })
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                raw_bytes = resp.read()
-                # euskadi.eus usa ISO-8859-1 / Latin-1
-                ct = resp.headers.get("Content-Type", "")
-                if "iso-8859" in ct.lower() or "latin" in ct.lower():
-                    raw = raw_bytes.decode("iso-8859-1")
-                else:
-                    try:
-                        raw = raw_bytes.decode("utf-8")
-                    except UnicodeDecodeError:
-                        raw = raw_bytes.decode("iso-8859-1")
-
-                # Patron exacto: <em class="r01srItemDocName"><a href="/ayuda_subvencion/...">titulo</a></em>
-                results = re.findall(
-                    r'<a\s+href="(/(?:ayuda_subvencion|anuncio_contratacion)/[^"]+)"[^>]*>([^<]+)</a>',
-                    raw, re.IGNORECASE
-                )
+            tipo_label = "ayudas" if "ayuda" in tipo else "licitaciones"
+            print(f"  [{i}/{len(EUSKADI_SEARCH_QUERIES)}] {tipo_label}: {kw}... "
+                  f"{len(results)} resultados, {self.relevant - before} relevantes")
 
-                new = 0
-                for url_path, title_raw in results:
-                    title_clean = title_raw.strip()
-                    if len(title_clean) < 15:
-                        continue
+        # ──── ESTRATEGIA 3: JSON datasets de contrataciones ────
+        # Los datasets se publican periodicamente en Open Data Euskadi
+        json_urls = [
+            "https://opendata.euskadi.eus/contenidos/ds_contrataciones/contrataciones_702/opendata/contrataciones.json",
+        ]
+        for jurl in json_urls:
+            try:
+                resp = HTTP.get(jurl, headers={
+                    "Accept": "application/json",
+                    "User-Agent": "EU-Funding-Radar/1.0"
+                })
+                raw = resp.text(errors="replace")
+                data = json.loads(raw)
+            except Exception:
+                continue  # Silencioso, dataset puede no existir
+            if isinstance(data, list):
+                items = data
+            elif isinstance(data, dict):
+                items = data.get("items", data.get("contrataciones", []))
+            else:
+                items = []
 
-                    full_url = f"https://www.euskadi.eus{url_path}"
-                    if full_url in seen_urls:
-                        continue
-                    seen_urls.add(full_url)
+            before = self.relevant
+            for item in items:
+                yield ("dataset", item)
+            if self.relevant > before:
+                print(f"  ✓ Dataset JSON: {self.relevant - before} licitaciones relevantes")
 
-                    text_lower = title_clean.lower()
+    def parse(self, item):
+        if item[0] == "web":
+            call = parse_euskadi_search_result(*item[1:])
+        else:
+            call = parse_euskadi_item(item[1], self.today)
+        if call:
+            self.relevant += 1
+        return call
 
-                    # Filtro tematico
-                    if not any(t in text_lower for t in EUSKADI_TEMAS_OK):
-                        continue
+    def score(self, call):
+        call.relevance = Relevance(tiered_relevance(fold_text(call.title), EUSKADI_RELEVANCE_TIERS, "MEDIA"))
 
-                    eus_id = f"EUS-{abs(hash(full_url)) % 100000:05d}"
-                    if eus_id in eus_calls:
-                        continue
+    def close(self, summary):
+        print(f"\n📊 Euskadi resumen:")
+        print(f"   ✅ Resultados relevantes: {summary['emitted']}")
+        if not summary["emitted"]:
+            print(f"   ℹ️  Sin resultados automaticos. Consultar manualmente:")
+            print(f"      https://www.contratacion.euskadi.eus")
+            print(f"      https://www.euskadi.eus/gobierno-vasco/tramites-servicios/")
 
-                    relevance = "MEDIA"
-                    for mk in ["bilbao", "ayuntamiento", "municipio"]:
-                        if mk in text_lower:
-                            relevance = "MUY ALTA"
-                            break
-                    if relevance != "MUY ALTA":
-                        for ak in ["energia", "renovable", "clima", "eficiencia", "movilidad",
-                                   "rehabilitacion", "residuo", "emision", "sostenible",
-                                   "descarbonizacion"]:
-                            if ak in text_lower:
-                                relevance = "ALTA"
-                                break
-
-                    if "ayuda_subvencion" in url_path:
-                        tipo_accion = "Ayuda/Subvencion Euskadi"
-                    else:
-                        tipo_accion = "Licitacion Euskadi"
-
-                    eus_calls[eus_id] = {
-                        "id": eus_id,
-                        "title": title_clean[:200],
-                        "description": "Gobierno Vasco / Sector Publico Euskadi",
-                        "status": "Open",
-                        "deadline": "",
-                        "url": full_url,
-                        "programme": "Euskadi",
-                        "budget": "",
-                        "action_type": tipo_accion,
-                        "call_id": "",
-                        "tags": kw,
-                        "source": "KontratazioA",
-                        "relevance_level": relevance,
-                    }
-                    new += 1
-
-                tipo_label = "ayudas" if "ayuda" in tipo else "licitaciones"
-                print(f"  [{i}/{len(EUSKADI_SEARCH_QUERIES)}] {tipo_label}: {kw}... "
-                      f"{len(results)} resultados, {new} nuevas relevantes")
-            time.sleep(0.3)
-        except Exception as e:
-            print(f"  [{i}/{len(EUSKADI_SEARCH_QUERIES)}] {kw}... ⚠️ {str(e)[:40]}")
 
-    # ──── ESTRATEGIA 3: JSON datasets de contrataciones ────
-    # Los datasets se publican periodicamente en Open Data Euskadi
-    json_urls = [
-        "https://opendata.euskadi.eus/contenidos/ds_contrataciones/contrataciones_702/opendata/contrataciones.json",
-    ]
-    for jurl in json_urls:
-        try:
-            req = urllib.request.Request(jurl, headers={
-                "Accept": "application/json",
-                "User-Agent": "EU-Funding-Radar/1.0"
-            })
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                raw = resp.read().decode("utf-8", errors="replace")
-                data = json.loads(raw)
-                if isinstance(data, list):
-                    items = data
-                elif isinstance(data, dict):
-                    items = data.get("items", data.get("contrataciones", []))
-                else:
-                    items = []
+def fetch_kontratazioa_calls():
+    """Consulta licitaciones y ayudas de Euskadi via API de euskadi.eus"""
+    return collect(EuskadiSource())
 
-                parsed_count = 0
-                for item in items:
-                    parsed = parse_euskadi_item(item, today)
-                    if parsed and parsed["id"] not in eus_calls:
-                        eus_calls[parsed["id"]] = parsed
-                        parsed_count += 1
 
-                if parsed_count > 0:
-                    print(f"  ✓ Dataset JSON: {parsed_count} licitaciones relevantes")
-        except Exception as e:
-            pass  # Silencioso, dataset puede no existir
+def parse_euskadi_search_result(full_url, title, query):
+    """Parsea un resultado del buscador de tramites de euskadi.eus"""
+    # Filtro tematico
+    if not contains_any(fold_text(title), EUSKADI_TEMAS_OK):
+        return None
 
-    print(f"\n📊 Euskadi resumen:")
-    print(f"   ✅ Resultados relevantes: {len(eus_calls)}")
-    if not eus_calls:
-        print(f"   ℹ️  Sin resultados automaticos. Consultar manualmente:")
-        print(f"      https://www.contratacion.euskadi.eus")
-        print(f"      https://www.euskadi.eus/gobierno-vasco/tramites-servicios/")
-    return eus_calls
+    if "/ayuda_subvencion/" in full_url:
+        tipo_accion = "Ayuda/Subvencion Euskadi"
+    else:
+        tipo_accion = "Licitacion Euskadi"
+
+    return Call(
+        id=stable_id("EUS", canonical_url(full_url)),
+        title=title[:200],
+        source=CallSource.EUSKADI,
+        description="Gobierno Vasco / Sector Publico Euskadi",
+        status=CallStatus.OPEN,
+        url=full_url,
+        programme="Euskadi",
+        action_type=tipo_accion,
+        tags=query,
+        relevance=Relevance.MEDIA,
+    )
 
 
 def parse_euskadi_item(item, today):
@@ -1662,34 +3983,27 @@ def parse_euskadi_item(item, today):
     if not titulo or len(titulo) < 10:
         return None
 
-    text_lower = titulo.lower()
+    text_folded = fold_text(titulo)
 
     # Filtro tematico
-    if not any(kw in text_lower for kw in EUSKADI_TEMAS_OK):
+    if not contains_any(text_folded, EUSKADI_TEMAS_OK):
         return None
 
-    # ID
-    item_id = str(item.get("id", item.get("expedientNumber", item.get("code", hash(titulo) % 100000))))
-    eus_id = f"EUS-{item_id}"
-
     # URL
     url_conv = item.get("url", item.get("link", item.get("publicUrl", "")))
+
+    # ID: el del item; si no trae, el mismo esquema que el buscador
+    # (stable_id de la URL canonica) o, sin URL, del titulo normalizado
+    item_id = str(item.get("id", item.get("expedientNumber", item.get("code", ""))))
+    if item_id:
+        eus_id = f"EUS-{item_id}"
+    else:
+        eus_id = stable_id("EUS", canonical_url(url_conv) if url_conv else titulo.strip().lower())
+        item_id = eus_id[len("EUS-"):]
+
     if not url_conv:
         url_conv = "https://www.contratacion.euskadi.eus"
 
-    # Relevancia
-    relevance = "MEDIA"
-    for mk in ["bilbao", "ayuntamiento", "municipio"]:
-        if mk in text_lower:
-            relevance = "MUY ALTA"
-            break
-    if relevance != "MUY ALTA":
-        for ak in ["energia", "renovable", "clima", "eficiencia", "movilidad",
-                   "rehabilitacion", "residuo", "emision", "sostenible"]:
-            if ak in text_lower:
-                relevance = "ALTA"
-                break
-
     # Organismo
     organismo = ""
     for key in ["contractingAuthorityName", "poderAdjudicador", "buyerName", "organismo"]:
@@ -1700,80 +4014,328 @@ def parse_euskadi_item(item, today):
             organismo = str(val)[:60]
             break
 
-    return {
-        "id": eus_id,
-        "title": titulo[:200],
-        "description": organismo or "Sector Publico Euskadi",
-        "status": "Open",
-        "deadline": "",
-        "url": url_conv,
-        "programme": organismo[:40] if organismo else "Euskadi",
-        "budget": "",
-        "action_type": "Contratacion/Ayuda Euskadi",
-        "call_id": item_id,
-        "tags": "",
-        "source": "KontratazioA",
-        "relevance_level": relevance,
-    }
-
-
-def main():
-    all_calls = fetch_all_calls()
-
-    # Intentar BDNS (fuentes nacionales espanolas)
+    return Call(
+        id=eus_id,
+        title=titulo[:200],
+        source=CallSource.EUSKADI,
+        description=organismo or "Sector Publico Euskadi",
+        status=CallStatus.OPEN,
+        url=url_conv,
+        programme=organismo[:40] if organismo else "Euskadi",
+        action_type="Contratacion/Ayuda Euskadi",
+        call_id=item_id,
+        relevance=Relevance.MEDIA,
+    )
+
+
+# ──────────────────────────────────────────────
+# FUENTES EN PARALELO
+# ──────────────────────────────────────────────
+
+# Prefijo del nombre de hilo -> etiqueta de la fuente en el log
+SOURCE_LABELS = [("sedia", "EU"), ("bdns", "BDNS"), ("euskadi", "EUS")]
+
+
+def source_label():
+    name = threading.current_thread().name
+    for prefix, label in SOURCE_LABELS:
+        if name.startswith(prefix):
+            return label
+    return ""
+
+
+class LabelledStdout:
+    """stdout que antepone [EU] / [BDNS] / [EUS] a cada linea segun el hilo.
+
+    Cada hilo acumula su linea a medias y la escribe entera, asi las salidas
+    de las tres fuentes se intercalan por lineas completas y no se mezclan.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._partial = {}
+
+    def write(self, text):
+        label = source_label()
+        if not label:
+            with self._lock:
+                return self._stream.write(text)
+        ident = threading.get_ident()
+        buffered = self._partial.pop(ident, "") + text
+        *lines, rest = buffered.split("\n")
+        if rest:
+            self._partial[ident] = rest
+        if lines:
+            out = "".join(f"[{label}] {line}\n" if line.strip() else "\n" for line in lines)
+            with self._lock:
+                self._stream.write(out)
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_sources(sources):
+    """Ejecuta las fuentes a la vez, cada una en su hilo y con su presupuesto.
+
+    `sources` es una lista (nombre, hilo, funcion, timeout). Devuelve
+    [(nombre, resultado, error)] en el mismo orden, para que la fusion
+    mantenga la precedencia de siempre. Una fuente que falla o agota su
+    tiempo devuelve resultado None; su hilo (daemon) se abandona.
+    """
+    results = {}
+
+    def runner(name, fn):
+        try:
+            with METRICS.stage(f"fuente.{name}"):
+                results[name] = (fn(), None)
+        except Exception as e:
+            results[name] = (None, e)
+
+    t0 = time.monotonic()
+    threads = []
+    for name, thread_name, fn, _ in sources:
+        t = threading.Thread(target=runner, args=(name, fn), name=thread_name, daemon=True)
+        t.start()
+        threads.append(t)
+
+    out = []
+    for (name, _, _, budget), t in zip(sources, threads):
+        t.join(max(0.0, t0 + budget - time.monotonic()))
+        if t.is_alive():
+            out.append((name, None, TimeoutError(f"sin terminar tras {budget:g}s")))
+        else:
+            out.append((name,) + results[name])
+    return out
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="EU Funding Radar — Bilbao Mision Climatica")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", nargs="?", const=CONFIG["cassette_dir"], metavar="DIR",
+                      help="graba cada respuesta HTTP en DIR (por defecto %(const)s)")
+    mode.add_argument("--offline", nargs="?", const=CONFIG["cassette_dir"], metavar="DIR",
+                      help="sin red: sirve todas las peticiones desde las grabaciones de DIR")
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="DIR",
+                        help="cProfile + tracemalloc por etapa, informes en DIR (por defecto %(const)s); "
+                             "con --offline, sobre datos reales sin red")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        return run_mode(args)
+
+    METRICS.profiler = StageProfiler(args.profile)
+    METRICS.profiler.start()
+    print(f"🔬 Perfilando cada etapa en {args.profile}/ (los tiempos salen inflados por el perfilado)")
     try:
-        bdns_calls = fetch_bdns_calls()
-        if bdns_calls:
-            all_calls.update(bdns_calls)
-            print(f"📊 Total combinado (EU + BDNS): {len(all_calls)}")
-    except Exception as e:
-        print(f"\n⚠️  BDNS no disponible: {e}")
-        print("   Continuando solo con convocatorias europeas...")
+        return run_mode(args)
+    finally:
+        METRICS.profiler.stop()
+        METRICS.profiler = None
+
+
+def run_mode(args):
+    """Ejecucion normal o con grabaciones HTTP (--record / --offline)."""
+    if not (args.record or args.offline):
+        return run_radar(args)
 
-    # Intentar KontratazioA (licitaciones Euskadi)
+    if args.record:
+        HTTP.cassette = Cassette(args.record, "record")
+        HTTP.cassette.start_recording(run_timestamp())
+        print(f"📼 Grabando respuestas HTTP en {args.record}/")
+    else:
+        HTTP.cassette = Cassette(args.offline, "replay")
+        recorded_at = HTTP.cassette.recorded_at()
+        if recorded_at is None:
+            print(f"❌ {args.offline}/ no tiene grabaciones (ejecuta antes con --record)")
+            return 1
+        # Los filtros de plazo miran la fecha de la grabacion, no la de hoy
+        os.environ.setdefault("SOURCE_DATE_EPOCH", str(int(recorded_at.timestamp())))
+        print(f"📼 Modo offline: respuestas grabadas en {args.offline}/ el {recorded_at:%d/%m/%Y %H:%M} UTC")
+
+    # Grabando y reproduciendo se parte de caches vacias: con la marca de agua
+    # BDNS o los detalles cacheados de .cache/ se harian otras peticiones, y
+    # sin la revalidacion HTTP cada respuesta se graba entera
+    scratch = tempfile.mkdtemp(prefix="radar-cache-")
+    CONFIG["cache_dir"], HTTP.cache_dir = scratch, None
     try:
-        eus_calls = fetch_kontratazioa_calls()
-        if eus_calls:
-            all_calls.update(eus_calls)
-            print(f"📊 Total combinado (EU + BDNS + Euskadi): {len(all_calls)}")
-    except Exception as e:
-        print(f"\n⚠️  KontratazioA no disponible: {e}")
-        print("   Continuando sin licitaciones vascas...")
-
-    if not all_calls:
-        print("\n❌ No se encontraron convocatorias.")
-        return 1
-
-    seen = load_seen()
-    new_calls = {k: v for k, v in all_calls.items() if k not in seen}
-    print(f"🆕 Nuevas desde ultima ejecucion: {len(new_calls)}")
-
-    # Guardar JSON
-    with open(CONFIG["output_file"], "w", encoding="utf-8") as f:
-        json.dump(list(all_calls.values()), f, ensure_ascii=False, indent=2)
-
-    # Generar HTML
-    generate_html(all_calls, new_calls)
-
-    # Generar Excel
-    generate_excel(all_calls, new_calls)
-
-    # Email
-    if new_calls:
-        send_email(new_calls, all_calls)
-
-    # Actualizar vistos
-    seen.update({k: datetime.now(timezone.utc).isoformat() for k in all_calls})
-    save_seen(seen)
-
-    print(f"\n{'='*50}")
-    print(f"✅ COMPLETADO")
-    print(f"   📊 {len(all_calls)} convocatorias")
-    print(f"   🆕 {len(new_calls)} nuevas")
-    print(f"   📄 HTML: {CONFIG['output_html']}")
-    print(f"   📊 Excel: {CONFIG['output_excel']}")
-    print(f"{'='*50}\n")
-    return 0
+        return run_radar(args)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def write_run_metrics(started):
+    """Cierra las metricas de la ejecucion, las escribe y resume las etapas."""
+    METRICS.add_stage("total", time.perf_counter() - started)
+    try:
+        data = METRICS.write(CONFIG["metrics_file"], CONFIG["prometheus_file"])
+    except OSError as e:
+        print(f"⚠️  No se pudieron escribir las metricas: {e}")
+        return
+    # Solo las etapas de primer nivel, en el orden en que han corrido
+    stages = [f"{name} {seconds:.1f}s" for name, seconds in data["stages"].items() if "." not in name]
+    requests = sum(entry["requests"] for entry in data["http"].values())
+    print(f"⏱️  Etapas: {' · '.join(stages)}")
+    print(f"📈 Metricas: {CONFIG['metrics_file']} ({requests} peticiones HTTP a {len(data['http'])} hosts)"
+          + (f" + {CONFIG['prometheus_file']}" if CONFIG["prometheus_file"] else ""))
+
+
+def run_radar(args):
+    # Pase lo que pase (sin convocatorias, error), el pool HTTP se cierra y
+    # las fuentes abandonadas dejan de escribir en .cache/
+    try:
+        started = time.perf_counter()
+        METRICS.run.update(timestamp=int(run_timestamp().timestamp()), offline=bool(args.offline),
+                           profiled=bool(args.profile))
+        store = open_store()
+        seen = store.seen()
+        # Vigentes SEDIA de la ultima ejecucion, para las keywords que se cortan
+        previous_eu = {call_id: call for call_id, call in store.active_calls().items() if call.source is CallSource.EU}
+
+        # Las tres fuentes van a hosts distintos: se consultan a la vez. El log
+        # de cada una sale etiquetado (tambien si una abandonada sigue escribiendo)
+        if not isinstance(sys.stdout, LabelledStdout):
+            sys.stdout = LabelledStdout(sys.stdout)
+        with METRICS.stage("fuentes"):
+            outcome = run_sources([
+                ("eu", "sedia-fuente", lambda: fetch_all_calls(seen, previous_eu), CONFIG["eu_timeout"]),
+                ("bdns", "bdns-fuente", fetch_bdns_calls, CONFIG["bdns_timeout"]),
+                ("euskadi", "euskadi-fuente", fetch_kontratazioa_calls, CONFIG["euskadi_timeout"]),
+            ])
+        print(f"\n⏱️  Fuentes: {METRICS.stages['fuentes']:.1f}s")
+        METRICS.run["sources"] = {name: {"ok": error is None, "error": str(error) if error else None,
+                                         "calls": len(calls or {})} for name, calls, error in outcome}
+
+        # Fusion con la precedencia de siempre: EU, luego BDNS, luego Euskadi
+        all_calls = {}
+        for name, calls, error in outcome:
+            if name == "eu":
+                if error:
+                    print(f"\n⚠️  SEDIA no disponible: {error}")
+                    print("   Continuando con fuentes nacionales y vascas...")
+                all_calls.update(calls or {})
+            elif name == "bdns":
+                if error:
+                    print(f"\n⚠️  BDNS no disponible: {error}")
+                    print("   Continuando solo con convocatorias europeas...")
+                elif calls:
+                    all_calls.update(calls)
+                    print(f"📊 Total combinado (EU + BDNS): {len(all_calls)}")
+            elif name == "euskadi":
+                if error:
+                    print(f"\n⚠️  KontratazioA no disponible: {error}")
+                    print("   Continuando sin licitaciones vascas...")
+                elif calls:
+                    all_calls.update(calls)
+                    print(f"📊 Total combinado (EU + BDNS + Euskadi): {len(all_calls)}")
+
+        if not all_calls:
+            print("\n❌ No se encontraron convocatorias.")
+            store.close()
+            write_run_metrics(started)
+            return 1
+
+        # Cambios frente a la base: las fuentes que han fallado no cuentan como retiradas
+        failed = {"eu": CallSource.EU.value, "bdns": CallSource.BDNS.value, "euskadi": CallSource.EUSKADI.value}
+        with METRICS.stage("cambios"):
+            changes = store.changeset(all_calls, [failed[name] for name, _, error in outcome if error])
+        new_calls = changes.added
+        print(f"🆕 Nuevas desde ultima ejecucion: {len(new_calls)}")
+        print(f"🔄 Con cambios: {len(changes.modified)}")
+        print(f"➖ Retiradas: {len(changes.removed)}")
+
+        # Huella del conjunto: si es la de la ultima ejecucion no hay nada que
+        # publicar y los informes (y el email) se dejan como estan
+        generated_at = run_timestamp()
+        fingerprint = run_fingerprint(all_calls)
+        site = Path(CONFIG["site_dir"])
+        outputs = (CONFIG["output_file"], CONFIG["output_html"], site / "index.html",
+                   site / "calls" / CALL_PAGES_MANIFEST) + (
+            (CONFIG["output_excel"],) if HAS_OPENPYXL else ())
+        unchanged = (not CONFIG["force_reports"] and fingerprint == store.get_meta("run_fingerprint")
+                     and all(Path(p).exists() for p in outputs))
+        if unchanged:
+            print(f"⏭️  Sin cambios en el conjunto (huella {fingerprint[:12]}): no se regeneran informes ni se envia email")
+        else:
+            # Exportar JSON (el estado vive en radar.db; esto es el resultado
+            # publicado), en orden estable para que el diff sea solo lo que cambia
+            with METRICS.stage("json"):
+                ordered = sorted(all_calls.values(), key=lambda c: (c.source.rank, c.id))
+                with open(CONFIG["output_file"], "w", encoding="utf-8") as f:
+                    json.dump([c.to_dict() for c in ordered], f, ensure_ascii=False, indent=2)
+
+            # Generar HTML
+            with METRICS.stage("html"):
+                generate_html(all_calls, new_calls, changes, generated_at)
+
+            # Generar Excel
+            with METRICS.stage("excel"):
+                generate_excel(all_calls, new_calls, changes, generated_at)
+
+            # Web estatica (docs/)
+            with METRICS.stage("web"):
+                publish_site()
+            with METRICS.stage("fichas"):
+                publish_call_pages(all_calls, changes.skipped_sources)
+
+            # Email
+            if args.offline:
+                print("📧 Modo offline: no se envia email")
+            elif changes:
+                with METRICS.stage("email"):
+                    send_email(new_calls, all_calls, changes, generated_at)
+            store.set_meta("run_fingerprint", fingerprint)
+
+        # Actualizar la base: cambios incrementales + historico + caducidad. Sin
+        # cambios en el conjunto no se toca (last_seen / last_run incluidos), asi
+        # el volcado de texto, que se commitea, queda igual byte a byte
+        with METRICS.stage("base"):
+            if not unchanged:
+                saved = store.save_run(all_calls.values(), changes, generated_at.isoformat())
+            evicted = store.evict(CONFIG["db_ttl_days"])
+            exported = store.export_text(CONFIG["db_export"])
+            store.close()
+        if unchanged:
+            print(f"🗄️  {CONFIG['db_file']}: sin cambios, {evicted} caducadas")
+        else:
+            print(f"🗄️  {CONFIG['db_file']}: {saved} guardadas, {len(changes.added)} nuevas, "
+                  f"{len(changes.modified)} modificadas ({sum(map(len, changes.diffs.values()))} cambios de campo), {evicted} caducadas")
+        print(f"📝 {CONFIG['db_export']}: {'actualizado' if exported else 'sin cambios'}")
+
+        HTTP.prune_cache()
+        if HTTP.cassette:
+            print(f"📼 {HTTP.cassette.directory}/: {HTTP.cassette.summary() or 'sin peticiones'}")
+
+        METRICS.run.update(
+            calls=len(all_calls),
+            calls_by_source={source.value: sum(1 for c in all_calls.values() if c.source is source) for source in CallSource},
+            new=len(new_calls), modified=len(changes.modified), removed=len(changes.removed),
+            reports_regenerated=not unchanged,
+        )
+        write_run_metrics(started)
+
+        print(f"\n{'='*50}")
+        print(f"✅ COMPLETADO")
+        print(f"   📊 {len(all_calls)} convocatorias")
+        print(f"   🆕 {len(new_calls)} nuevas")
+        print(f"   🔄 {len(changes.modified)} con cambios")
+        if unchanged:
+            print(f"   ⏭️  Informes sin cambios")
+        else:
+            print(f"   📄 HTML: {CONFIG['output_html']}")
+            print(f"   📊 Excel: {CONFIG['output_excel']}")
+        print(f"{'='*50}\n")
+        return 0
+    finally:
+        HTTP.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+"""
+Utilidades comunes de los tests: importar eu_funding_radar desde la raiz
+del repo y llevar todos los ficheros de estado a un directorio temporal.
+"""
+
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import eu_funding_radar as radar  # noqa: E402
+
+DATA = Path(__file__).resolve().parent / "data"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """CONFIG apuntando a tmp_path (base, JSON, informes, web y cache)."""
+    for key, name in (("seen_file", "seen_calls.json"), ("output_file", "resultados_convocatorias.json"),
+                      ("db_file", "radar.db"), ("db_export", "radar_state.jsonl"),
+                      ("output_html", "resultados_convocatorias.html"),
+                      ("output_excel", "resultados_convocatorias.xlsx"), ("site_dir", "docs"),
+                      ("cache_dir", ".cache"), ("metrics_file", "radar_metrics.json")):
+        monkeypatch.setitem(radar.CONFIG, key, str(tmp_path / name))
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1767225600")  # 01/01/2026 00:00 UTC
+    return tmp_path
+
+
+def make_call(call_id, source=radar.CallSource.EU, deadline=date(2026, 6, 30), **kwargs):
+    """Call vigente minimo para los tests."""
+    kwargs.setdefault("title", f"Convocatoria {call_id}")
+    kwargs.setdefault("status", radar.CallStatus.OPEN)
+    kwargs.setdefault("url", f"https://example.org/{call_id}")
+    return radar.Call(id=call_id, source=source, deadline=deadline, **kwargs)
+
+
+def sedia_item(topic_id, status="Open", deadline="2026-06-30"):
+    """Resultado SEDIA con la forma que devuelve el buscador."""
+    actions = json.dumps([{"status": {"abbreviation": status}, "deadlineDates": [deadline]}])
+    return {
+        "reference": topic_id,
+        "metadata": {
+            "identifier": [topic_id],
+            "title": [f"Topic {topic_id}"],
+            "deadlineDate": [f"{deadline}T00:00:00.000+0000"],
+            "actions": [actions],
+        },
+    }
@@ -0,0 +1,31 @@
+"""
+Call: serializacion sin perdidas al formato de resultados_convocatorias.json.
+"""
+
+import json
+
+from conftest import radar, sedia_item
+
+
+def test_unknown_status_keeps_original_value():
+    data = {"id": "HORIZON-X", "title": "X", "status": "Cancelled", "deadline": "30/06/2026"}
+    call = radar.Call.from_dict(data)
+    assert call.status is radar.CallStatus.UNKNOWN
+    assert call.status_text == "Cancelled"
+    assert call.to_dict()["status"] == "Cancelled"
+    assert radar.Call.from_dict(call.to_dict()).to_dict() == call.to_dict()
+
+
+def test_known_status_has_no_raw_value():
+    call = radar.Call.from_dict({"id": "HORIZON-X", "title": "X", "status": "Forthcoming"})
+    assert call.status is radar.CallStatus.FORTHCOMING
+    assert call.status_raw == ""
+    assert radar.Call.from_dict({"id": "HORIZON-Y", "title": "Y"}).status_text == "Unknown"
+
+
+def test_sedia_unknown_abbreviation_is_published():
+    item = sedia_item("HORIZON-CL5-2026-01")
+    item["metadata"]["actions"] = [json.dumps([{"status": {"abbreviation": "Suspended"}}])]
+    call = radar.extract_sedia_record(item)
+    assert call.status is radar.CallStatus.UNKNOWN
+    assert call.to_dict()["status"] == "Suspended"
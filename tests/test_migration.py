@@ -0,0 +1,81 @@
+"""
+Migracion de seen_calls.json (version 1 -> SEEN_SCHEMA) e IDs estables de
+Euskadi.
+
+tests/data tiene el seen_calls.json de version 1 anterior a los IDs
+estables y los id/url de su resultados_convocatorias.json.
+"""
+
+import json
+import shutil
+
+from conftest import DATA, radar
+
+
+def load_v1():
+    seen = json.loads((DATA / "seen_calls_v1.json").read_text(encoding="utf-8"))
+    previous = json.loads((DATA / "resultados_v1.json").read_text(encoding="utf-8"))
+    return seen, previous
+
+
+def test_migrate_baseline_seen_file():
+    seen, previous = load_v1()
+    migrated, renamed = radar.migrate_seen_ids(seen, previous, version=1)
+
+    # 881 -> 872: 19 IDs del buscador a stable_id y 9 duplicados ".json"
+    assert len(seen) == 881
+    assert len(migrated) == 872
+    assert sum(1 for k in renamed if k.endswith(".json")) == 9
+    assert sum(1 for k in renamed if not k.endswith(".json")) == 19
+    assert not any(k.endswith(".json") for k in migrated)
+    # Los EUS-NNNNN sin URL del buscador en el ultimo resultado se conservan
+    assert sum(1 for k in migrated if radar._LEGACY_EUS_ID.match(k)) == 586 - 19
+
+
+def test_migrate_is_keyed_on_schema_version():
+    seen, previous = load_v1()
+    migrated, renamed = radar.migrate_seen_ids(seen, previous, version=radar.SEEN_SCHEMA)
+    assert migrated == seen
+    assert not renamed
+
+
+def test_api_ids_with_five_digits_are_kept():
+    seen = {"EUS-12345": "2026-01-01"}
+    previous = [{"id": "EUS-12345", "url": "https://api.euskadi.eus/events/12345"}]
+    migrated, renamed = radar.migrate_seen_ids(seen, previous, version=1)
+    assert migrated == seen
+    assert not renamed
+
+
+def test_committed_seen_file_is_migrated():
+    # El seen_calls.json del repo es el resultado de migrar el de version 1
+    seen, previous = load_v1()
+    expected, _ = radar.migrate_seen_ids(seen, previous, version=1)
+    committed = json.loads((DATA.parent.parent / "seen_calls.json").read_text(encoding="utf-8"))
+    assert committed["schema"] == radar.SEEN_SCHEMA
+    assert committed["seen"] == expected
+
+
+def test_open_store_imports_migrated_ids(workdir):
+    shutil.copy(DATA / "seen_calls_v1.json", radar.CONFIG["seen_file"])
+    shutil.copy(DATA / "resultados_v1.json", radar.CONFIG["output_file"])
+    store = radar.open_store()
+    try:
+        seen = store.seen()
+    finally:
+        store.close()
+    assert len(seen) == 872
+    assert "EUS-87271" not in seen
+    assert "EUS-f471a3b1810e" in seen
+
+
+def test_euskadi_ids_match_across_parsers():
+    url = "https://www.euskadi.eus/ayuda_subvencion/2026/energia-renovable/"
+    title = "Ayudas a la energia renovable en municipios"
+    web = radar.parse_euskadi_search_result(url, title, "energia")
+    api = radar.parse_euskadi_item({"title": title, "url": url}, radar.run_timestamp())
+    assert web.id == api.id == radar.stable_id("EUS", radar.canonical_url(url))
+
+    # Sin id ni URL: digest del titulo, igual en cada proceso
+    no_url = radar.parse_euskadi_item({"title": title}, radar.run_timestamp())
+    assert no_url.id == radar.stable_id("EUS", title.lower())
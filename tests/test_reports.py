@@ -0,0 +1,102 @@
+"""
+Convocatorias retiradas en los informes: HTML, Excel y email.
+"""
+
+import email
+import email.header
+
+import pytest
+from openpyxl import load_workbook
+
+from conftest import make_call, radar
+
+
+@pytest.fixture
+def changes():
+    removed = make_call("GONE-1", title="Convocatoria retirada de prueba")
+    return radar.Changeset(removed={"GONE-1": removed.to_dict()})
+
+
+@pytest.fixture
+def all_calls():
+    return {"A": make_call("A")}
+
+
+def test_html_lists_removed_calls(workdir, all_calls, changes):
+    radar.generate_html(all_calls, {}, changes, radar.run_timestamp())
+    page = (workdir / "resultados_convocatorias.html").read_text(encoding="utf-8")
+    assert 'id="rm-section"' in page
+    assert "Convocatoria retirada de prueba" in page
+    assert "1 convocatoria retirada" in page
+
+
+def test_html_without_removed_calls(workdir, all_calls):
+    radar.generate_html(all_calls, {}, radar.Changeset(), radar.run_timestamp())
+    page = (workdir / "resultados_convocatorias.html").read_text(encoding="utf-8")
+    assert 'id="rm-section"' not in page
+
+
+def test_excel_tracking_sheet_lists_removed_calls(workdir, all_calls, changes):
+    radar.generate_excel(all_calls, {}, changes, radar.run_timestamp())
+    wb = load_workbook(workdir / "resultados_convocatorias.xlsx")
+    rows = [row for row in wb["Seguimiento"].iter_rows(values_only=True)]
+    header = [i for i, row in enumerate(rows) if row[0] == "RETIRADAS EN ESTA EJECUCION (1)"]
+    assert header
+    removed_row = rows[header[0] + 1]
+    assert removed_row[0] == "GONE-1"
+    assert "Retirada" in removed_row
+    summary = [v for row in wb["Resumen"].iter_rows(values_only=True) for v in row if v]
+    assert any("1 retiradas" in str(v) for v in summary)
+
+
+class FakeSMTP:
+    sent = []
+
+    def __init__(self, server, port):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def sendmail(self, sender, to, message):
+        FakeSMTP.sent.append(message)
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    FakeSMTP.sent = []
+    monkeypatch.setattr(radar.smtplib, "SMTP", FakeSMTP)
+    for key, value in (("email_to", "radar@example.org"), ("email_from", "radar@example.org"),
+                       ("smtp_user", "radar"), ("smtp_pass", "x")):
+        monkeypatch.setitem(radar.CONFIG, key, value)
+    return FakeSMTP.sent
+
+
+def decode(message):
+    msg = email.message_from_string(message)
+    subject = str(email.header.make_header(email.header.decode_header(msg["Subject"])))
+    body = next(p for p in msg.walk() if p.get_content_type() == "text/html")
+    return subject, body.get_payload(decode=True).decode("utf-8")
+
+
+def test_email_sent_for_removed_calls_only(workdir, all_calls, changes, smtp):
+    radar.send_email({}, all_calls, changes, radar.run_timestamp())
+    assert len(smtp) == 1
+    subject, body = decode(smtp[0])
+    assert "1 retiradas" in subject
+    assert "1 convocatorias retiradas" in body
+    assert "GONE-1" in body
+
+
+def test_no_email_without_changes(workdir, all_calls, smtp):
+    radar.send_email({}, all_calls, radar.Changeset(), radar.run_timestamp())
+    assert not smtp
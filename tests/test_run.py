@@ -0,0 +1,44 @@
+"""
+run_radar de principio a fin con las fuentes sustituidas.
+"""
+
+import argparse
+import sys
+
+import pytest
+
+from conftest import radar
+
+
+@pytest.fixture
+def http(monkeypatch):
+    """Deja el cliente HTTP global como estaba al terminar el test."""
+    monkeypatch.setattr(radar.HTTP, "closed", False)
+    monkeypatch.setattr(radar.HTTP, "_idle", {})
+    monkeypatch.setattr(radar.HTTP, "cache_dir", None)
+    # run_radar envuelve stdout con LabelledStdout
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    return radar.HTTP
+
+
+def args(**kwargs):
+    return argparse.Namespace(**{"record": None, "offline": None, "profile": None, **kwargs})
+
+
+def test_run_without_calls_closes_http(workdir, http, monkeypatch):
+    class Conn:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    conn = Conn()
+    http._idle[("https", "example.org", 443)] = [conn]
+    monkeypatch.setattr(radar, "run_sources",
+                        lambda sources: [(name, None, TimeoutError("sin terminar")) for name, *_ in sources])
+
+    assert radar.run_radar(args()) == 1
+    assert http.closed and conn.closed and not http._idle
+    # Un hilo abandonado que siga pidiendo falla y no escribe en la cache
+    with pytest.raises(ConnectionError):
+        http.get("https://example.org/tarde")
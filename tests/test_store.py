@@ -0,0 +1,129 @@
+"""
+RadarStore.changeset y el arrastre de convocatorias SEDIA cuando una
+keyword se corta antes de su ultima pagina.
+"""
+
+from datetime import date
+
+import pytest
+
+from conftest import make_call, radar, sedia_item
+
+
+@pytest.fixture
+def store(workdir):
+    store = radar.RadarStore(radar.CONFIG["db_file"])
+    yield store
+    store.conn.close()
+
+
+def save(store, calls, run_at="2026-01-01T00:00:00+00:00"):
+    calls = {c.id: c for c in calls}
+    changes = store.changeset(calls)
+    store.save_run(calls.values(), changes, run_at)
+    return changes
+
+
+def test_changeset_added_modified_removed(store):
+    save(store, [make_call("A"), make_call("B"), make_call("C")])
+
+    changes = store.changeset({
+        "A": make_call("A"),
+        "B": make_call("B", deadline=date(2026, 9, 1)),
+        "D": make_call("D"),
+    })
+    assert list(changes.added) == ["D"]
+    assert list(changes.modified) == ["B"]
+    assert changes.diffs["B"] == {"deadline": ("30/06/2026", "01/09/2026")}
+    assert list(changes.removed) == ["C"]
+    assert changes.removed["C"]["title"] == "Convocatoria C"
+
+
+def test_changeset_failed_source_is_not_removed(store):
+    save(store, [make_call("A"), make_call("BDNS-1", source=radar.CallSource.BDNS)])
+
+    changes = store.changeset({"A": make_call("A")}, skip_sources=[radar.CallSource.BDNS.value])
+    assert not changes.removed
+    store.save_run([make_call("A")], changes, "2026-01-02T00:00:00+00:00")
+    # Sigue activa para la siguiente comparacion
+    assert set(store.active_calls()) == {"A", "BDNS-1"}
+
+
+def fake_sedia(pages):
+    """search_eu_api falso: keyword -> lista de paginas (listas de topic IDs)."""
+    def search(keyword, page_size=50, page_number=1):
+        keyword_pages = pages[keyword]
+        ids = keyword_pages[page_number - 1]
+        total = sum(len(p) for p in keyword_pages)
+        return {"totalResults": total, "results": [sedia_item(topic_id) for topic_id in ids]}
+    return search
+
+
+def run_sedia(monkeypatch, pages, seen, previous):
+    monkeypatch.setattr(radar, "search_eu_api", fake_sedia(pages))
+    monkeypatch.setitem(radar.CONFIG, "eu_page_size", 2)
+    return radar.collect(radar.SediaSource(seen, keywords=list(pages), previous=previous))
+
+
+def test_sedia_early_stop_carries_previous_calls(workdir, monkeypatch):
+    # Primera pagina ya vista (una vigente y otra cerrada, que nunca se guarda
+    # como vista): la keyword se corta y no se lee la segunda
+    pages = {"climate": [["T-1", "T-2"], ["T-3", "T-4"]]}
+    monkeypatch.setattr(radar, "closed_reason", lambda call, today: "closed" if call.id == "T-2" else None)
+    previous = {"T-1": make_call("T-1"), "T-3": make_call("T-3")}
+
+    calls = run_sedia(monkeypatch, pages, seen={"T-1": "2025-12-31"}, previous=previous)
+    assert set(calls) == {"T-1", "T-3"}
+
+
+def test_sedia_full_listing_does_not_carry(workdir, monkeypatch):
+    pages = {"climate": [["T-1", "T-2"], ["T-4"]]}
+    previous = {"T-1": make_call("T-1"), "T-3": make_call("T-3")}
+
+    calls = run_sedia(monkeypatch, pages, seen={"T-1": "2025-12-31"}, previous=previous)
+    # Sin corte temprano, T-3 ya no esta en SEDIA: es una retirada real
+    assert set(calls) == {"T-1", "T-2", "T-4"}
+
+
+def test_carried_calls_are_not_removed(store, monkeypatch):
+    save(store, [make_call("T-1"), make_call("T-3")])
+    pages = {"climate": [["T-1"], ["T-3"]]}
+    monkeypatch.setitem(radar.CONFIG, "eu_page_size", 1)
+    monkeypatch.setattr(radar, "search_eu_api", fake_sedia(pages))
+    previous = {k: v for k, v in store.active_calls().items() if v.source is radar.CallSource.EU}
+
+    calls = radar.collect(radar.SediaSource(store.seen(), keywords=list(pages), previous=previous))
+    changes = store.changeset(calls)
+    assert not changes.removed
+    assert not changes.added
+
+
+def test_text_export_round_trip(store, workdir):
+    save(store, [make_call("A"), make_call("B")])
+    save(store, [make_call("A", deadline=date(2026, 9, 1))], run_at="2026-01-02T00:00:00+00:00")
+    export = workdir / "radar_state.jsonl"
+    assert store.export_text(export)
+    assert not store.export_text(export)  # mismo contenido: no se reescribe
+
+    rebuilt = radar.RadarStore(workdir / "rebuilt.db")
+    try:
+        rebuilt.import_text(export)
+        assert rebuilt.export_text(export) is False
+        assert set(rebuilt.active_calls()) == {"A"}
+        assert rebuilt.seen() == store.seen()
+    finally:
+        rebuilt.conn.close()
+
+
+def test_open_store_rebuilds_from_export(workdir):
+    store = radar.open_store()
+    save(store, [make_call("A")])
+    store.export_text(radar.CONFIG["db_export"])
+    store.close()
+    (workdir / "radar.db").unlink()
+
+    store = radar.open_store()
+    try:
+        assert set(store.active_calls()) == {"A"}
+    finally:
+        store.close()